@@ -1,7 +1,6 @@
 from pathlib import Path
 from cli_git_changelog.utils.path_sourcing import resolve_highest_level_occurance_in_path, ensure_path_is_dir_or_create
 import os
-from dotenv import load_dotenv
 
 
 PROJECT_NAME = "cli_git_changelog"
@@ -33,21 +32,42 @@ def resolve_component_dirs_path(component_name: str) -> Path:
 # MARK: Now that the package is being installed in other projects it should use the .env 
 # file at the current working directory
 
+# The .env file is only read when one of its settings is first needed, so importing the package (or running
+# --help) does not touch the filesystem. Settings are read live, so a later load_dotenv is picked up.
 
-DOTENV_PATH = os.getcwd() + "/.env"
 
+ENV_DEFAULTS = {
+    "API_KEY": None,
+    "BASE_URL": "",
+    "BASE_MODEL": "claude-3-5-sonnet-latest",
+}
+_env_loaded = False
 
-load_dotenv(DOTENV_PATH)
 
+def load_env() -> None:
+    """
+    Load the .env file of the current working directory, once.
+    """
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv(os.getcwd() + "/.env")
+        _env_loaded = True
 
-API_KEY = os.getenv("API_KEY")
-BASE_URL = os.getenv("BASE_URL", "")
-BASE_MODEL = os.getenv("BASE_MODEL", "claude-3-5-sonnet-latest")
 
-def reload_env_vars():
-    global BASE_URL, BASE_MODEL, API_KEY
-    BASE_URL = os.getenv("BASE_URL", "")
-    BASE_MODEL = os.getenv("BASE_MODEL", "claude-3-5-sonnet-latest")
-    API_KEY = os.getenv("API_KEY")
-    print(f"API_KEY: {API_KEY}")
+def __getattr__(name: str):
+    # API_KEY, BASE_URL and BASE_MODEL
+    if name in ENV_DEFAULTS:
+        load_env()
+        return os.getenv(name, ENV_DEFAULTS[name])
+    if name == "DOTENV_PATH":
+        return os.getcwd() + "/.env"
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
+def reload_env_vars():
+    """
+    Load the .env file of the current working directory if it was not yet; every setting is read live, so
+    variables another load_dotenv set are picked up too. Values are never printed, API_KEY is a secret.
+    """
+    load_env()
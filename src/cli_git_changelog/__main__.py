@@ -1,11 +1,89 @@
 import argparse
+import sys
 import time
 import os
 from pathlib import Path
-from dotenv import load_dotenv
-from cli_git_changelog import BASE_MODEL, API_KEY, reload_env_vars
+from typing import List, Optional
+import cli_git_changelog
 
 
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 600.0
+
+
+
+# ----------------------------------------------------------------------------------------------------
+# MARK: SHARED ARGS
+# ----------------------------------------------------------------------------------------------------
+def add_rate_limit_args(parser: argparse.ArgumentParser) -> None:
+    # MARK: RATE LIMIT ARGS
+    rate_limit_group = parser.add_argument_group('Rate Limit Options')
+    rate_limit_group.add_argument("--requests-per-minute", type=int,
+                        help="Max model requests started per minute (default: 50)")
+    rate_limit_group.add_argument("--input-tokens-per-minute", type=int,
+                        help="Max prompt tokens sent per minute (default: unlimited)")
+    rate_limit_group.add_argument("--output-tokens-per-minute", type=int,
+                        help="Max completion tokens per minute, reserved from max_tokens and settled on the real usage (default: unlimited)")
+    rate_limit_group.add_argument("--dispatcher-workers", type=int,
+                        help="Max model requests the rate limited dispatcher runs at once (default: 10)")
+
+
+def validate_rate_limit_args(parser: argparse.ArgumentParser, args) -> None:
+    # A budget of 0 or less would divide by zero on the first request instead of disabling the limit
+    for flag in ("--requests-per-minute", "--input-tokens-per-minute", "--output-tokens-per-minute", "--dispatcher-workers"):
+        value = getattr(args, flag.lstrip("-").replace("-", "_"))
+        if value is not None and value < 1:
+            parser.error(f"{flag} must be at least 1")
+
+
+def add_http_args(parser: argparse.ArgumentParser) -> None:
+    # MARK: HTTP ARGS
+    http_group = parser.add_argument_group('HTTP Options')
+    http_group.add_argument("--http-pool-size", type=int,
+                        help="Max pooled keep-alive connections shared by all workers (default: --dispatcher-workers, or --max-in-flight with --asyncio)")
+    http_group.add_argument("--connect-timeout", type=float, default=DEFAULT_CONNECT_TIMEOUT,
+                        help="Seconds to wait for a connection to the API (default: 10)")
+    http_group.add_argument("--read-timeout", type=float, default=DEFAULT_READ_TIMEOUT,
+                        help="Seconds to wait for the API between received bytes (default: 600)")
+    http_group.add_argument("--http2", action="store_true", default=False,
+                        help="Multiplex requests over HTTP/2 connections (needs the http2 extra)")
+
+
+def resolve_api_key(api_key: Optional[str], dotenv_path: Optional[str]) -> str:
+    if dotenv_path is not None:
+        from dotenv import load_dotenv
+        load_dotenv(Path(dotenv_path))
+        cli_git_changelog.reload_env_vars()
+        api_key = api_key or os.getenv("API_KEY")
+    else:
+        api_key = api_key or cli_git_changelog.API_KEY
+    if not api_key:
+        raise ValueError("No API key provided; set --api-key or API_KEY in env")
+    return api_key
+
+
+def configure_api_clients(args, in_flight: Optional[int] = None) -> None:
+    """
+    Configure the shared dispatcher and HTTP transport from the rate limit and HTTP args.
+    :param in_flight: requests that may be in flight at once when the dispatcher workers do not bound it (asyncio)
+    """
+    # local import so --help and argument errors do not pay for the provider SDK import
+    from cli_git_changelog.model_interface.api_dispatcher import AnthropicAPIReliantDispatcher
+    AnthropicAPIReliantDispatcher.configure(
+        requests_per_minute=args.requests_per_minute,
+        input_tokens_per_minute=args.input_tokens_per_minute,
+        output_tokens_per_minute=args.output_tokens_per_minute,
+        max_workers=args.dispatcher_workers,
+    )
+    # One pooled connection per request that may be in flight at once
+    from cli_git_changelog.model_interface.http_transport import SharedHttpTransport
+    SharedHttpTransport.configure(
+        pool_size=args.http_pool_size or in_flight or AnthropicAPIReliantDispatcher.MAX_WORKERS,
+        connect_timeout=args.connect_timeout,
+        read_timeout=args.read_timeout,
+        http2=args.http2,
+    )
+
 
 # ----------------------------------------------------------------------------------------------------
 # MARK: CLI APPLICATION
@@ -16,8 +94,8 @@ def parse_args():
     )
 
     # MARK: CORE OVERRIDE ARGS
-    parser.add_argument("--model-override", type=str, default=BASE_MODEL,
-                        help="Override which Claude model to call")
+    parser.add_argument("--model-override", type=str,
+                        help="Override which Claude model to call (default: BASE_MODEL in env)")
     parser.add_argument("--wd-override", type=str, default=os.getcwd(),
                         help="Working directory to run git commands in")
     parser.add_argument("--api-key", type=str,
@@ -32,6 +110,28 @@ def parse_args():
                         help="Number of commits to summarize")
     parser.add_argument("--commit-strategy", action="store_true", default=False,
                         help="Use the commit strategy for fetching git history")
+    parser.add_argument("--range", type=str, dest="revision_range",
+                        help="Summarize an explicit revision range (e.g. v1.2.0..HEAD) instead of the last N commits")
+    parser.add_argument("--incremental", action="store_true", default=False,
+                        help="Only summarize commits since the watermark stored in the output directory, then advance it")
+    parser.add_argument("--git-backend", type=str, choices=["log-stream", "per-file"], default="log-stream",
+                        help="How the commit strategy extracts history: one streamed `git log -p` (log-stream) or git calls per file (per-file)")
+    parser.add_argument("--git-workers", type=int, default=1,
+                        help="Extract commits on this many worker processes, each with its own git processes (commit strategy only)")
+    parser.add_argument("--context-budget", type=int, default=16000,
+                        help="Estimated token budget of a file-level prompt; small diffs are packed together up to it and pre-images trimmed to fit")
+    parser.add_argument("--reduce-fan-in", type=int, default=8,
+                        help="Max commit summaries merged per call when reducing a large range to one release changelog")
+    parser.add_argument("--reduce-group-by", type=str, choices=["time", "directory", "author"], default="time",
+                        help="How commit summaries are chunked for the first merge level: runs in log order (time), top-level directory or author")
+    parser.add_argument("--dedup-threshold", type=float, default=0.8,
+                        help="Similarity (0-1) above which near-identical file diffs of a commit are summarized once, e.g. for codemods")
+    parser.add_argument("--no-dedup", action="store_true", default=False,
+                        help="Summarize every changed file separately, even near-identical ones")
+    parser.add_argument("--no-stream", action="store_true", default=False,
+                        help="Wait for complete responses instead of streaming commit and release changelogs into their files as they are generated")
+    parser.add_argument("--resume", type=str, metavar="RUN_DIR",
+                        help="Finish an interrupted run in its output directory (e.g. out/20250101T120000): replays its journal and only requests the missing summaries")
 
     # MARK: OUTPUT ARGS
     parser.add_argument("-o", "--output-dir", type=str,
@@ -43,6 +143,14 @@ def parse_args():
     parser.add_argument("--batch-output-override", type=str,
                         help="Override the default batch output file, the full path to the file not just the filename or directory")
 
+    # MARK: CACHE ARGS
+    parser.add_argument("--cache-dir", type=str,
+                        help="Directory of the persistent summary cache (default: $XDG_CACHE_HOME/cli_git_changelog)")
+    parser.add_argument("--no-cache", action="store_true", default=False,
+                        help="Disable the persistent summary cache, every prompt is sent to the model")
+    parser.add_argument("--cache-max-mb", type=int, default=512,
+                        help="Size budget of the summary cache, least recently used entries are evicted beyond it")
+
     # MARK: CONCURRENCY ARGS
     parser.add_argument("--disable-concurency", action="store_true",
                         help="Disable concurency")
@@ -52,21 +160,254 @@ def parse_args():
                         help="Max workers per commit (only available when concurrency is enabled)")
     concurrency_group.add_argument("--max-commit-workers", type=int,
                         help="Max commit workers (only available when concurrency is enabled)")
+    concurrency_group.add_argument("--asyncio", action="store_true", default=False,
+                        help="Run the file -> commit -> batch fan-out as asyncio tasks on a single thread instead of nested thread pools")
+    concurrency_group.add_argument("--max-in-flight", type=int, default=64,
+                        help="Max model requests in flight at once (only used with --asyncio)")
+
+    # MARK: BATCH API ARGS
+    batch_api_group = parser.add_argument_group('Message Batches Options')
+    batch_api_group.add_argument("--batch-api", action="store_true", default=False,
+                        help="Send every round of prompts through the Message Batches API, cheaper but slower; suited to large backfills")
+    batch_api_group.add_argument("--batch-poll-interval", type=float, default=30.0,
+                        help="Seconds between status checks of submitted message batches (only used with --batch-api)")
+
+    # MARK: MULTI-REPO ARGS
+    multi_repo_group = parser.add_argument_group('Multi-Repository Options')
+    multi_repo_group.add_argument("--repos", type=str, metavar="MANIFEST",
+                        help="Summarize every repository listed in this file (one path per line, optionally followed by its revision range) instead of --wd-override, sharing one rate limit")
+    multi_repo_group.add_argument("--repo-workers", type=int, default=8,
+                        help="Repositories extracted and summarized at once (only used with --repos)")
+    multi_repo_group.add_argument("--cross-repo-summary", action="store_true", default=False,
+                        help="Also merge the release changelogs of all repositories into one release summary (only used with --repos)")
+
+    add_rate_limit_args(parser)
+    add_http_args(parser)
+
+    # MARK: DAEMON ARGS
+    daemon_group = parser.add_argument_group('Daemon Options')
+    daemon_group.add_argument("--daemon-socket", type=str,
+                        help="Socket of the changelog daemon to forward the run to when it is running (default: $CHANGELOG_DAEMON_SOCKET or the per-user socket)")
+    daemon_group.add_argument("--no-daemon", action="store_true", default=False,
+                        help="Run in this process even when a changelog daemon is running")
+
+    # MARK: OBSERVABILITY ARGS
+    observability_group = parser.add_argument_group('Observability Options')
+    observability_group.add_argument("--trace-out", type=str,
+                        help="Write every span of the run (git commands, dispatcher waits, model requests, ...) to this JSON trace file, viewable in Perfetto")
+    observability_group.add_argument("--metrics-out", type=str,
+                        help="Write the run's stage timings and counters to this file in the Prometheus text format")
+    observability_group.add_argument("--otel", action="store_true", default=False,
+                        help="Also emit spans through OpenTelemetry, exported by the SDK the environment configures (needs the otel extra)")
     
     args = parser.parse_args()
+
+    if args.incremental and args.revision_range:
+        parser.error("--incremental derives its range from the stored watermark and cannot be combined with --range")
     
     # Validate that worker arguments are only used when concurrency is enabled
     if args.disable_concurency and (args.max_workers_per_commit or args.max_commit_workers):
         parser.error("Worker-related arguments can only be set when concurrency is enabled (--disable-concurency is not set)")
+    if args.disable_concurency and args.asyncio:
+        parser.error("--asyncio is a concurrent mode and cannot be combined with --disable-concurency")
+    if args.git_workers < 1:
+        parser.error("--git-workers must be at least 1")
+    if args.max_in_flight < 1:
+        parser.error("--max-in-flight must be at least 1")
+    if not 0 < args.dedup_threshold <= 1:
+        parser.error("--dedup-threshold must be in (0, 1]")
+    if args.batch_api and args.asyncio:
+        parser.error("--batch-api and --asyncio are separate execution modes, pick one")
+    if args.resume and (args.revision_range or args.incremental):
+        parser.error("--resume reuses the range recorded by the interrupted run and cannot be combined with --range or --incremental")
+    if args.http_pool_size is not None and args.http_pool_size < 1:
+        parser.error("--http-pool-size must be at least 1")
+    validate_rate_limit_args(parser, args)
+    if args.resume and args.batch_api:
+        parser.error("--batch-api runs resume from their batch checkpoint, --resume is for the other execution modes")
+    if args.repos and (args.asyncio or args.batch_api or args.resume):
+        parser.error("--repos runs the threaded pipeline once per repository and cannot be combined with --asyncio, --batch-api or --resume")
+    if args.repos and args.batch_output_override:
+        parser.error("--repos writes each release changelog into its repository's output directory, --batch-output-override would overwrite them")
+    if args.cross_repo_summary and (not args.repos or args.disable_batch_writing):
+        parser.error("--cross-repo-summary merges the release changelogs of --repos and needs batch writing enabled")
+    if args.repo_workers < 1:
+        parser.error("--repo-workers must be at least 1")
+    # resolved after parsing, so --help and argument errors do not read the .env file
+    if args.model_override is None:
+        args.model_override = cli_git_changelog.BASE_MODEL
     
     return args
 
 
+def process_level_options(args) -> List[str]:
+    """
+    :return: the options set for this invocation that a daemon job cannot honour, the daemon's own API key, rate
+        limits, HTTP settings and concurrency apply to every job it runs
+    """
+    options = {
+        "--api-key": args.api_key,
+        "--dotenv-path": args.dotenv_path,
+        "--disable-concurency": args.disable_concurency,
+        "--max-workers-per-commit": args.max_workers_per_commit,
+        "--max-commit-workers": args.max_commit_workers,
+        "--requests-per-minute": args.requests_per_minute,
+        "--input-tokens-per-minute": args.input_tokens_per_minute,
+        "--output-tokens-per-minute": args.output_tokens_per_minute,
+        "--dispatcher-workers": args.dispatcher_workers,
+        "--http-pool-size": args.http_pool_size,
+        "--connect-timeout": args.connect_timeout != DEFAULT_CONNECT_TIMEOUT,
+        "--read-timeout": args.read_timeout != DEFAULT_READ_TIMEOUT,
+        "--http2": args.http2,
+    }
+    return [name for name, value in options.items() if value is not None and value is not False]
+
+
+def forward_to_daemon(args, output_dir: Path, cache_dir: Optional[Path], dedup_threshold: Optional[float], logger) -> bool:
+    """
+    Hand the run to a running changelog daemon and wait for it to finish.
+    :return: False when no daemon is running or the run needs this process (--batch-api, --asyncio, --repos,
+        --resume, tracing, or an option only this process can apply), the caller then runs it itself
+    """
+    if args.no_daemon or args.batch_api or args.asyncio or args.repos or args.resume or args.trace_out or args.metrics_out or args.otel:
+        return False
+    from cli_git_changelog.daemon_client import daemon_running, default_socket_path, submit_job, wait_for_job
+    socket_path = Path(args.daemon_socket) if args.daemon_socket else default_socket_path()
+    if not daemon_running(socket_path):
+        return False
+    local_options = process_level_options(args)
+    if local_options:
+        logger.info(f"Not forwarding to the changelog daemon on {socket_path}, it cannot apply {', '.join(local_options)}")
+        return False
+
+    # The daemon runs elsewhere, every path is sent absolute
+    job = {
+        "working_directory": str(Path(args.wd_override).resolve()),
+        "output_dir": str(output_dir.resolve()),
+        "model": args.model_override,
+        "n_commits": args.commits,
+        "revision_range": args.revision_range,
+        "incremental": args.incremental,
+        "commit_strategy": args.commit_strategy,
+        "single_pass": args.git_backend == "log-stream",
+        "disable_commit_writing": args.disable_commit_writing,
+        "disable_batch_writing": args.disable_batch_writing,
+        "batch_output_override": str(Path(args.batch_output_override).resolve()) if args.batch_output_override else None,
+        "cache_dir": str(Path(cache_dir).resolve()) if cache_dir is not None else None,
+        "cache_max_bytes": args.cache_max_mb * 1024 * 1024,
+        "context_budget": args.context_budget,
+        "fan_in": args.reduce_fan_in,
+        "group_by": args.reduce_group_by,
+        "git_workers": args.git_workers,
+        "dedup_threshold": dedup_threshold,
+        "stream": not args.no_stream,
+    }
+    start_time = time.time()
+    job_id = submit_job(socket_path, job)["id"]
+    logger.info(f"Forwarded the run to the changelog daemon on {socket_path} as job {job_id}")
+    result = wait_for_job(socket_path, job_id)
+    if result["status"] == "failed":
+        logger.error(f"Daemon job {job_id} failed: {result['error']}")
+        raise RuntimeError(f"Daemon job {job_id} failed: {result['error']}")
+    logger.info(f"Daemon job {job_id} succeeded, wrote to {output_dir}. Time taken: {time.time() - start_time} seconds")
+    return True
+
+
+# ----------------------------------------------------------------------------------------------------
+# MARK: DAEMON APPLICATION
+# ----------------------------------------------------------------------------------------------------
+def parse_serve_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="generate-changelog serve",
+        description="Run a changelog daemon that keeps the model client, connection pool, rate limiter and caches "
+                    "warm between runs. generate-changelog forwards its runs to it while it is running.",
+    )
+    parser.add_argument("--socket", type=str,
+                        help="Unix socket to listen on (default: $CHANGELOG_DAEMON_SOCKET or the per-user socket)")
+    parser.add_argument("--model-override", type=str,
+                        help="Model of the jobs that do not pick their own (default: BASE_MODEL in env)")
+    parser.add_argument("--api-key", type=str,
+                        help="Override API key (otherwise from env)")
+    parser.add_argument("--dotenv-path", type=str,
+                        help="Path to the .env file")
+    parser.add_argument("--quiet", action="store_true",
+                        help="Quiet mode, no terminal logging")
+    parser.add_argument("--cache-dir", type=str,
+                        help="Summary cache of the jobs that do not pick their own (default: $XDG_CACHE_HOME/cli_git_changelog)")
+
+    # MARK: JOB ARGS
+    job_group = parser.add_argument_group('Job Options')
+    job_group.add_argument("--max-jobs", type=int, default=4,
+                        help="Jobs that run at once; their model calls share the rate limit round-robin")
+    job_group.add_argument("--max-workers-per-commit", type=int, default=5,
+                        help="Max workers per commit of each job")
+    job_group.add_argument("--max-commit-workers", type=int, default=2,
+                        help="Max commit workers of each job")
+
+    add_rate_limit_args(parser)
+    add_http_args(parser)
+
+    args = parser.parse_args(argv)
+    if args.max_jobs < 1:
+        parser.error("--max-jobs must be at least 1")
+    if args.max_workers_per_commit < 1:
+        parser.error("--max-workers-per-commit must be at least 1")
+    if args.max_commit_workers < 1:
+        parser.error("--max-commit-workers must be at least 1")
+    if args.http_pool_size is not None and args.http_pool_size < 1:
+        parser.error("--http-pool-size must be at least 1")
+    validate_rate_limit_args(parser, args)
+    if args.model_override is None:
+        args.model_override = cli_git_changelog.BASE_MODEL
+    return args
+
+
+def serve(args) -> None:
+    if args.quiet:
+        os.environ["QUIET_MODE"] = "true"
+    api_key = resolve_api_key(args.api_key, args.dotenv_path)
+    configure_api_clients(args)
+
+    from cli_git_changelog.daemon import ChangelogDaemon
+    from cli_git_changelog.daemon_client import default_socket_path
+    from cli_git_changelog.summary_cache import default_cache_dir
+    daemon = ChangelogDaemon(Path(args.socket) if args.socket else default_socket_path(),
+                             api_key,
+                             args.model_override,
+                             True,
+                             args.max_workers_per_commit,
+                             args.max_commit_workers,
+                             args.max_jobs,
+                             Path(args.cache_dir) if args.cache_dir else default_cache_dir())
+    daemon.warm_up()
+    daemon.serve()
+
+
+def report_run(args, start_time: float, logger) -> None:
+    """
+    End-of-run summary of where the time went, plus the trace and metrics files when they were asked for.
+    """
+    from cli_git_changelog.model_interface.http_transport import SharedHttpTransport
+    from cli_git_changelog.utils.tracing import tracer
+    elapsed = time.time() - start_time
+    tracer.record_span("run", time.perf_counter() - elapsed, elapsed)
+    SharedHttpTransport.log_stats()
+    logger.info(f"Run summary (stage times are summed over threads):\n{tracer.summary_table()}")
+    if args.trace_out:
+        tracer.write_trace(args.trace_out)
+    if args.metrics_out:
+        tracer.write_prometheus(args.metrics_out)
+    logger.info(f"Time taken: {elapsed} seconds")
+
+
 def main():
     """
     Main entry point for the CLI application.
     """
 
+    if sys.argv[1:2] == ["serve"]:
+        return serve(parse_serve_args(sys.argv[2:]))
+
     args = parse_args()
     # Mutes logging
     if args.quiet:
@@ -82,51 +423,152 @@ def main():
         max_commit_workers = 1
 
     commit_strategy = args.commit_strategy
+    single_pass = args.git_backend == "log-stream"
+    dedup_threshold = None if args.no_dedup else args.dedup_threshold
     disable_commit_writing = args.disable_commit_writing
     disable_batch_writing = args.disable_batch_writing
     batch_output_override = args.batch_output_override or None
-    wd = args.wd_override 
-    dotenv_path = Path(args.dotenv_path or wd + "/.env")
-    if args.dotenv_path is not None:
-        load_dotenv(dotenv_path)
-        reload_env_vars()
-        api_key = args.api_key or os.getenv("API_KEY")
+    if args.no_cache:
+        cache_dir = None
     else:
-        api_key = args.api_key or API_KEY
-    if not api_key:
-        raise ValueError("No API key provided; set --api-key or API_KEY in env")
-    model = args.model_override 
-    n_commits = args.commits 
-    if any(i is None for i in [wd, model, api_key, n_commits]):
-        raise ValueError("Missing required arguments")
+        from cli_git_changelog.summary_cache import default_cache_dir
+        cache_dir = Path(args.cache_dir) if args.cache_dir else default_cache_dir()
+    wd = args.wd_override 
+    output_dir = Path(args.output_dir) if args.output_dir else Path(wd + "/changelogs")
 
     # local import and configuration of logger to enable --quiet taget properly grab the env var
     from cli_git_changelog.utils.logger import get_logger
     logger = get_logger(__name__) 
 
+    if forward_to_daemon(args, output_dir, cache_dir, dedup_threshold, logger):
+        return
 
-    output_dir = Path(args.output_dir) if args.output_dir else Path(wd + "/changelogs")
+    api_key = resolve_api_key(args.api_key, args.dotenv_path)
+    model = args.model_override 
+    n_commits = args.commits 
+    if any(i is None for i in [wd, model, api_key, n_commits]):
+        raise ValueError("Missing required arguments")
+
+    resume_dir = Path(args.resume) if args.resume else None
     output_dir.mkdir(parents=True, exist_ok=True)
     logger.info(f"Outputing to directory: {output_dir}")
 
-    # local import in order to have env vars properly loaded internally for the changelog module
-    from cli_git_changelog.generate_changelog import create_changelog
+    from cli_git_changelog.utils.tracing import tracer
+    if args.trace_out:
+        tracer.record_events()
+    if args.otel:
+        tracer.enable_opentelemetry()
+
+    configure_api_clients(args, args.max_in_flight if args.asyncio else None)
 
     start_time = time.time()
-    create_changelog(api_key, 
-                     model, 
-                     wd, 
-                     output_dir, 
-                     n_commits, 
-                     concurrency, 
-                     max_workers_per_commit, 
-                     max_commit_workers,
-                     disable_commit_writing, 
-                     disable_batch_writing, 
-                     batch_output_override, 
-                     commit_strategy)
-    end_time = time.time()
-    logger.info(f"Time taken: {end_time - start_time} seconds")
+    try:
+        if args.batch_api:
+            # local import in order to have env vars properly loaded internally for the changelog module
+            from cli_git_changelog.generate_changelog_batch_api import create_changelog_batch_api
+            create_changelog_batch_api(api_key,
+                                       model,
+                                       wd,
+                                       output_dir,
+                                       n_commits,
+                                       disable_commit_writing,
+                                       disable_batch_writing,
+                                       batch_output_override,
+                                       commit_strategy,
+                                       single_pass,
+                                       cache_dir,
+                                       args.cache_max_mb * 1024 * 1024,
+                                       args.revision_range,
+                                       args.incremental,
+                                       args.batch_poll_interval,
+                                       args.context_budget,
+                                       args.reduce_fan_in,
+                                       args.reduce_group_by,
+                                       args.git_workers,
+                                       dedup_threshold)
+        elif args.repos:
+            # local import in order to have env vars properly loaded internally for the changelog module
+            from cli_git_changelog.multi_repo import create_multi_repo_changelog, load_repo_manifest
+            create_multi_repo_changelog(api_key,
+                                        model,
+                                        load_repo_manifest(args.repos),
+                                        output_dir,
+                                        n_commits,
+                                        concurrency,
+                                        max_workers_per_commit,
+                                        max_commit_workers,
+                                        args.repo_workers,
+                                        args.cross_repo_summary,
+                                        disable_commit_writing=disable_commit_writing,
+                                        disable_batch_writing=disable_batch_writing,
+                                        commit_strategy=commit_strategy,
+                                        single_pass=single_pass,
+                                        cache_dir=cache_dir,
+                                        cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+                                        revision_range=args.revision_range,
+                                        incremental=args.incremental,
+                                        context_budget=args.context_budget,
+                                        fan_in=args.reduce_fan_in,
+                                        group_by=args.reduce_group_by,
+                                        git_workers=args.git_workers,
+                                        dedup_threshold=dedup_threshold,
+                                        stream=not args.no_stream)
+        elif args.asyncio:
+            # local import in order to have env vars properly loaded internally for the changelog module
+            import asyncio
+            from cli_git_changelog.generate_changelog_async import acreate_changelog
+            asyncio.run(acreate_changelog(api_key,
+                                          model,
+                                          wd,
+                                          output_dir,
+                                          n_commits,
+                                          args.max_in_flight,
+                                          disable_commit_writing,
+                                          disable_batch_writing,
+                                          batch_output_override,
+                                          commit_strategy,
+                                          single_pass,
+                                          cache_dir,
+                                          args.cache_max_mb * 1024 * 1024,
+                                          args.revision_range,
+                                          args.incremental,
+                                          args.context_budget,
+                                          args.reduce_fan_in,
+                                          args.reduce_group_by,
+                                          args.git_workers,
+                                          dedup_threshold,
+                                          not args.no_stream,
+                                          resume_dir))
+        else:
+            # local import in order to have env vars properly loaded internally for the changelog module
+            from cli_git_changelog.generate_changelog import create_changelog
+            create_changelog(api_key, 
+                             model, 
+                             wd, 
+                             output_dir, 
+                             n_commits, 
+                             concurrency, 
+                             max_workers_per_commit, 
+                             max_commit_workers,
+                             disable_commit_writing, 
+                             disable_batch_writing, 
+                             batch_output_override, 
+                             commit_strategy,
+                             single_pass,
+                             cache_dir,
+                             args.cache_max_mb * 1024 * 1024,
+                             args.revision_range,
+                             args.incremental,
+                             args.context_budget,
+                             args.reduce_fan_in,
+                             args.reduce_group_by,
+                             args.git_workers,
+                             dedup_threshold,
+                             not args.no_stream,
+                             resume_dir)
+    finally:
+        report_run(args, start_time, logger)
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
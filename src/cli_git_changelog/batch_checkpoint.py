@@ -0,0 +1,57 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict, List
+from cli_git_changelog.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+CHECKPOINT_FILENAME = ".changelog_batch_checkpoint.json"
+
+
+class BatchCheckpoint:
+    """
+    Progress of a Message Batches run, kept in the output directory so a restarted run polls the batches it
+    already submitted instead of paying for them again. Each round (file, commit, batch) records the ids of
+    the batches still to collect and the summaries collected so far, keyed by request custom id.
+    """
+
+    def __init__(self, output_dir: Path, identity: Dict[str, str]) -> None:
+        """
+        :param output_dir: directory the checkpoint file lives in
+        :param identity: what the run covers (range, model, ...); a checkpoint left by a different run is discarded
+        """
+        self.path = Path(output_dir) / CHECKPOINT_FILENAME
+        self.identity = identity
+        self.rounds: Dict[str, Dict] = {}
+        if self.path.exists():
+            try:
+                state = json.loads(self.path.read_text())
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable batch checkpoint {self.path}: {e}")
+                return
+            if state.get("identity") == identity:
+                self.rounds = state.get("rounds", {})
+                logger.info(f"Resuming message batch run from {self.path}")
+            else:
+                logger.warning(f"Discarding batch checkpoint {self.path} left by a different run")
+
+    def round(self, name: str) -> Dict:
+        return self.rounds.setdefault(name, {"pending": [], "results": {}})
+
+    def pending(self, name: str) -> List[str]:
+        return self.round(name)["pending"]
+
+    def results(self, name: str) -> Dict[str, str]:
+        return self.round(name)["results"]
+
+    def save(self) -> None:
+        """Replace the checkpoint atomically so a crash never leaves a truncated file behind."""
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"identity": self.identity, "rounds": self.rounds}))
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
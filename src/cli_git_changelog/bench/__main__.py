@@ -0,0 +1,121 @@
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+from cli_git_changelog.bench.run_benchmark import BENCH_MODES, measure_extraction, run_pipeline, summarize_runs, tool_version
+from cli_git_changelog.bench.synthetic_repo import RepoShape, create_synthetic_repo
+from cli_git_changelog.mock_server import start_mock_server
+
+
+DEFAULT_SHAPE = RepoShape()
+
+
+# ----------------------------------------------------------------------------------------------------
+# MARK: BENCHMARK CLI
+# ----------------------------------------------------------------------------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Benchmark generate-changelog on a synthetic repository against a local mock model server, "
+                    "without spending API tokens. Arguments after -- are passed to generate-changelog.",
+    )
+
+    # MARK: REPOSITORY ARGS
+    repo_group = parser.add_argument_group('Synthetic Repository Options')
+    repo_group.add_argument("--commits", type=int, default=DEFAULT_SHAPE.commits,
+                        help="Commits to generate and summarize")
+    repo_group.add_argument("--files", type=int, default=DEFAULT_SHAPE.files,
+                        help="Text files in the repository")
+    repo_group.add_argument("--files-per-commit", type=int, default=DEFAULT_SHAPE.files_per_commit,
+                        help="Files each commit edits")
+    repo_group.add_argument("--lines-per-file", type=int, default=DEFAULT_SHAPE.lines_per_file,
+                        help="Lines in each file")
+    repo_group.add_argument("--diff-lines", type=int, default=DEFAULT_SHAPE.diff_lines,
+                        help="Lines rewritten in each edited file")
+    repo_group.add_argument("--binary-ratio", type=float, default=DEFAULT_SHAPE.binary_ratio,
+                        help="Share of commits that also change a binary file")
+    repo_group.add_argument("--rename-ratio", type=float, default=DEFAULT_SHAPE.rename_ratio,
+                        help="Share of commits that also rename a file")
+    repo_group.add_argument("--seed", type=int, default=DEFAULT_SHAPE.seed,
+                        help="Seed of the generated history and of the 429 injection")
+    repo_group.add_argument("--repo", type=str,
+                        help="Benchmark this existing repository instead of generating one")
+
+    # MARK: MOCK SERVER ARGS
+    server_group = parser.add_argument_group('Mock Server Options')
+    server_group.add_argument("--latency", type=float, default=0.2,
+                        help="Seconds before each response or the first event of a stream")
+    server_group.add_argument("--token-delay", type=float, default=0.0,
+                        help="Seconds between the text deltas of a streamed response")
+    server_group.add_argument("--rate-limit-probability", type=float, default=0.0,
+                        help="Share (0-1) of requests answered with an injected 429")
+    server_group.add_argument("--retry-after", type=float, default=1.0,
+                        help="retry-after seconds sent with an injected 429")
+
+    # MARK: RUN ARGS
+    parser.add_argument("--mode", type=str, choices=list(BENCH_MODES), default="threads",
+                        help="Execution mode of generate-changelog")
+    parser.add_argument("--batch-strategy", action="store_true", default=False,
+                        help="Summarize with the batch strategy instead of --commit-strategy")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Runs of the pipeline, the report holds every run and their medians")
+    parser.add_argument("--out", type=str,
+                        help="Write the JSON report to this file instead of stdout")
+    parser.add_argument("pipeline_args", nargs=argparse.REMAINDER,
+                        help="Extra generate-changelog arguments, after --")
+
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    if not 0 <= args.rate_limit_probability < 1:
+        parser.error("--rate-limit-probability must be in [0, 1)")
+    if args.pipeline_args[:1] == ["--"]:
+        args.pipeline_args = args.pipeline_args[1:]
+    return args
+
+
+def main():
+    args = parse_args()
+    shape = RepoShape(args.commits, args.files, args.files_per_commit, args.lines_per_file, args.diff_lines,
+                      args.binary_ratio, args.rename_ratio, args.seed)
+    commit_strategy = not args.batch_strategy
+    server_options = {
+        "latency": args.latency,
+        "token_delay": args.token_delay,
+        "rate_limit_probability": args.rate_limit_probability,
+        "retry_after": args.retry_after,
+        "seed": args.seed,
+    }
+
+    with tempfile.TemporaryDirectory(prefix="changelog-bench-") as scratch:
+        repo = Path(args.repo) if args.repo else create_synthetic_repo(Path(scratch) / "repo", shape)
+        extraction = measure_extraction(str(repo), args.commits, commit_strategy)
+        server = start_mock_server(**server_options)
+        try:
+            runs = [
+                run_pipeline(server, str(repo), Path(scratch) / f"out-{i}", args.commits, commit_strategy, args.mode, args.pipeline_args)
+                for i in range(args.repeat)
+            ]
+        finally:
+            server.shutdown()
+
+    report = {
+        "tool": tool_version(),
+        "repository": {"path": args.repo} if args.repo else shape._asdict(),
+        "server": server_options,
+        "pipeline": {"mode": args.mode, "commit_strategy": commit_strategy, "commits": args.commits, "args": args.pipeline_args},
+        "extraction": extraction,
+        "runs": runs,
+        "median": summarize_runs(runs),
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n")
+    else:
+        print(text)
+    if any(run["exit_code"] != 0 for run in runs):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+from cli_git_changelog.bench.run_benchmark import SOURCE_ROOT, tool_version
+
+
+# ----------------------------------------------------------------------------------------------------
+# MARK: IMPORT-TIME BUDGET
+# ----------------------------------------------------------------------------------------------------
+# `generate-changelog --help` and the runs that fail before any model call (no API key, not a git repository)
+# should come back in tens of milliseconds. Each scenario runs in a fresh process under `python -X importtime`;
+# the import time is what the tool adds on top of a bare interpreter, and the provider SDK (with the HTTP and
+# validation stacks it pulls in) must not be imported at all. Exits 1 when a scenario breaks the budget.
+
+
+# -X importtime's own bookkeeping roughly doubles the import times it reports
+DEFAULT_BUDGET_MS = 75.0
+FORBIDDEN_MODULES = ("anthropic", "httpx", "pydantic")
+TOP_MODULES = 10
+
+
+def scenarios(scratch: Path) -> Dict[str, List[str]]:
+    """generate-changelog arguments of each scenario, none of which may get as far as a model call"""
+    not_a_repo = scratch / "not-a-repo"
+    not_a_repo.mkdir(exist_ok=True)
+    return {
+        "help": ["--help"],
+        "missing_api_key": ["--wd-override", str(not_a_repo), "-o", str(scratch / "out"), "--no-daemon"],
+        "not_a_repo": ["--wd-override", str(not_a_repo), "-o", str(scratch / "out"), "--no-daemon", "--api-key", "budget"],
+    }
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """
+    :return: module -> its own import time in microseconds, from the `import time:` lines of -X importtime
+    """
+    modules: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue    # the header line
+        modules[fields[2].strip()] = modules.get(fields[2].strip(), 0) + int(fields[0])
+    return modules
+
+
+def run_importtime(command: List[str], cwd: Path) -> Tuple[float, int, Dict[str, int]]:
+    """
+    :return: the wall time in ms, the exit code and the imported modules of one run of `python -X importtime <command>`
+    """
+    env = {name: value for name, value in os.environ.items() if name not in ("API_KEY", "PYTHONPROFILEIMPORTTIME")}
+    env.update(
+        QUIET_MODE="true",
+        DISABLE_FILE_LOGGING="true",
+        PYTHONPATH=os.pathsep.join([str(SOURCE_ROOT)] + [p for p in [os.environ.get("PYTHONPATH")] if p]),
+    )
+    started = time.monotonic()
+    proc = subprocess.run([sys.executable, "-X", "importtime"] + command, cwd=cwd, env=env, capture_output=True, text=True)
+    return (time.monotonic() - started) * 1000, proc.returncode, parse_importtime(proc.stderr)
+
+
+def measure_scenario(args: List[str], baseline: Dict[str, int], scratch: Path, repeat: int) -> Dict[str, Any]:
+    walls, import_ms, exit_codes = [], [], set()
+    own: Dict[str, int] = {}
+    for _ in range(repeat):
+        wall, exit_code, modules = run_importtime(["-m", "cli_git_changelog"] + args, scratch)
+        # Modules a bare interpreter imports anyway (site, encodings, ...) are not the tool's cost
+        own = {name: micros for name, micros in modules.items() if name not in baseline}
+        walls.append(wall)
+        import_ms.append(sum(own.values()) / 1000)
+        exit_codes.add(exit_code)
+    slowest = sorted(own.items(), key=lambda item: item[1], reverse=True)[:TOP_MODULES]
+    return {
+        "args": args,
+        "exit_codes": sorted(exit_codes),
+        "wall_ms": statistics.median(walls),
+        "import_ms": statistics.median(import_ms),
+        "modules": len(own),
+        "slowest_modules_ms": {name: micros / 1000 for name, micros in slowest},
+        "forbidden_imports": sorted(name for name in own if name.split(".")[0] in FORBIDDEN_MODULES),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Check that generate-changelog --help and its early error paths start fast: each scenario runs "
+                    "under python -X importtime and must stay within the import budget without loading the provider SDK.",
+    )
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Max median import time (ms) the tool may add to a bare interpreter in each scenario")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Runs of each scenario, the report holds their medians")
+    parser.add_argument("--out", type=str,
+                        help="Write the JSON report to this file instead of stdout")
+
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    return args
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix="changelog-import-budget-") as scratch:
+        scratch = Path(scratch)
+        baseline_wall, _, baseline = run_importtime(["-c", "pass"], scratch)
+        results = {name: measure_scenario(scenario_args, baseline, scratch, args.repeat)
+                   for name, scenario_args in scenarios(scratch).items()}
+
+    violations = []
+    for name, result in results.items():
+        if result["import_ms"] > args.budget_ms:
+            violations.append(f"{name}: {result['import_ms']:.1f} ms of imports, over the {args.budget_ms:g} ms budget")
+        if result["forbidden_imports"]:
+            violations.append(f"{name}: imports {', '.join(result['forbidden_imports'])}")
+
+    report = {
+        "tool": tool_version(),
+        "budget_ms": args.budget_ms,
+        "interpreter_wall_ms": baseline_wall,
+        "scenarios": results,
+        "violations": violations,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n")
+    else:
+        print(text)
+    if violations:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from cli_git_changelog.mock_server import MockAnthropicServer
+from cli_git_changelog.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# CLI flags of each execution mode the benchmark can drive
+BENCH_MODES = {
+    "threads": [],
+    "asyncio": ["--asyncio"],
+    "sequential": ["--disable-concurency"],
+    "batch-api": ["--batch-api", "--batch-poll-interval", "0.2"],
+}
+BENCH_MODEL = "claude-bench"
+# The mock server has no rate limit of its own beyond the injected 429s, the dispatcher should not add one
+BENCH_REQUESTS_PER_MINUTE = 1_000_000
+SOURCE_ROOT = Path(__file__).resolve().parents[2]
+
+
+def tool_version() -> Dict[str, Optional[str]]:
+    """The installed version and the source revision, so reports from different versions can be told apart."""
+    try:
+        installed: Optional[str] = version("cli_git_changelog")
+    except PackageNotFoundError:
+        installed = None
+    try:
+        revision: Optional[str] = subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=SOURCE_ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (subprocess.CalledProcessError, OSError):
+        revision = None
+    return {"version": installed, "revision": revision}
+
+
+def measure_extraction(working_directory: str, n_commits: int, commit_strategy: bool, single_pass: bool = True, git_workers: int = 1) -> Dict[str, Any]:
+    """
+    Time git extraction on its own: the commit stream is drained without any model calls.
+    """
+    from cli_git_changelog.generate_changelog import open_commit_stream
+    from cli_git_changelog.git_interface_strategies import revision_range_for_last_n
+
+    started = time.monotonic()
+    revision_range, max_count = revision_range_for_last_n(n_commits, working_directory, commit_strategy)
+    commits = files = diff_bytes = 0
+    for _, info in open_commit_stream(revision_range, working_directory, commit_strategy, single_pass, max_count, git_workers):
+        commits += 1
+        files += len(info["files"])
+        diff_bytes += sum(len(str(diff)) for _, diff in info["files"].values())
+    return {"seconds": time.monotonic() - started, "commits": commits, "files": files, "diff_bytes": diff_bytes}
+
+
+def run_pipeline(server: MockAnthropicServer, working_directory: str, output_dir: Path, n_commits: int, commit_strategy: bool, mode: str, pipeline_args: List[str]) -> Dict[str, Any]:
+    """
+    Run `generate-changelog` once, in its own process so every run starts from a cold import and fresh
+    dispatcher state, against the mock server.
+    """
+    command = [
+        sys.executable, "-m", "cli_git_changelog",
+        "--wd-override", working_directory,
+        "-n", str(n_commits),
+        "--api-key", "bench",
+        "--model-override", BENCH_MODEL,
+        "-o", str(output_dir),
+        "--no-cache",
+        "--requests-per-minute", str(BENCH_REQUESTS_PER_MINUTE),
+    ] + (["--commit-strategy"] if commit_strategy else []) + BENCH_MODES[mode] + pipeline_args
+    env = dict(
+        os.environ,
+        ANTHROPIC_BASE_URL=server.base_url,
+        QUIET_MODE="true",
+        DISABLE_FILE_LOGGING="true",
+        PYTHONPATH=os.pathsep.join([str(SOURCE_ROOT)] + [p for p in [os.environ.get("PYTHONPATH")] if p]),
+    )
+
+    server.reset_stats()
+    started = time.monotonic()
+    proc = subprocess.run(command, env=env, capture_output=True, text=True)
+    wall = time.monotonic() - started
+    stats = dict(server.stats)
+
+    first, last = stats.pop("first_request_at"), stats.pop("last_response_at")
+    busy = stats.pop("busy_seconds")
+    result: Dict[str, Any] = {
+        "wall_seconds": wall,
+        "exit_code": proc.returncode,
+        "time_to_first_request": first - started if first is not None else None,
+        **stats,
+    }
+    # Batched requests are processed by the server on its own schedule, there is no client concurrency to report
+    if mode != "batch-api":
+        # Average number of requests the server was handling while the model phase ran
+        result["mean_concurrency"] = busy / (last - first) if first is not None and last is not None and last > first else None
+    if proc.returncode != 0:
+        result["stderr_tail"] = proc.stderr.strip().splitlines()[-5:]
+        logger.error(f"generate-changelog exited with {proc.returncode}: {proc.stderr.strip()[-500:]}")
+    return result
+
+
+def summarize_runs(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Median of every numeric metric over the repeats."""
+    keys = [k for k, v in runs[0].items() if isinstance(v, (int, float)) and k != "exit_code"]
+    return {
+        k: statistics.median(values)
+        for k in keys
+        if (values := [run[k] for run in runs if isinstance(run.get(k), (int, float))])
+    }
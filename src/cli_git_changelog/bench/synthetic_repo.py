@@ -0,0 +1,96 @@
+import random
+import subprocess
+from pathlib import Path
+from typing import Dict, List, NamedTuple
+
+
+# ----------------------------------------------------------------------------------------------------
+# MARK: SYNTHETIC REPOSITORIES
+# ----------------------------------------------------------------------------------------------------
+# Benchmark repositories are written with one `git fast-import` stream instead of a checkout and a commit per
+# step, so a repository of thousands of commits takes seconds. Contents, authors and timestamps all derive from
+# the seed, the same shape always produces the same history (and the same commit SHAs).
+
+
+WORDS = ("alpha", "beta", "gamma", "delta", "config", "handler", "request", "result", "value", "index", "buffer", "cache")
+BASE_TIMESTAMP = 1_700_000_000
+AUTHORS = ("Ada <ada@example.com>", "Brian <brian@example.com>", "Chen <chen@example.com>")
+
+
+class RepoShape(NamedTuple):
+    commits: int = 50
+    files: int = 40                 # tracked text files the commits edit
+    files_per_commit: int = 4
+    lines_per_file: int = 200
+    diff_lines: int = 20            # lines rewritten in each edited file
+    binary_ratio: float = 0.1       # share of commits that also add or replace a binary file
+    rename_ratio: float = 0.05      # share of commits that also rename a file
+    seed: int = 0
+
+
+def _source_line(rng: random.Random, n: int) -> str:
+    name, other = rng.choice(WORDS), rng.choice(WORDS)
+    return f"    {name}_{n} = compute_{other}({rng.randrange(1000)}, {other}_{rng.randrange(50)})"
+
+
+def _data(payload: bytes) -> bytes:
+    return b"data %d\n" % len(payload) + payload + b"\n"
+
+
+def fast_import_stream(shape: RepoShape) -> bytes:
+    """
+    The fast-import commands of a history of `shape.commits` commits on top of one initial commit that adds
+    every file. Each commit rewrites `diff_lines` lines in `files_per_commit` files, and some commits add a
+    binary blob or rename a file.
+    """
+    rng = random.Random(shape.seed)
+    contents: Dict[str, List[str]] = {}
+    for idx in range(shape.files):
+        path = f"src/module_{idx // 10}/file_{idx}.py"
+        contents[path] = [f"def function_{idx}():"] + [_source_line(rng, n) for n in range(shape.lines_per_file - 1)]
+
+    out: List[bytes] = []
+
+    def commit(number: int, message: str, commands: List[bytes]) -> None:
+        author = AUTHORS[number % len(AUTHORS)]
+        when = f"{BASE_TIMESTAMP + number * 3600} +0000"
+        out.append(b"commit refs/heads/main\n")
+        out.append(f"author {author} {when}\ncommitter {author} {when}\n".encode("utf-8"))
+        out.append(_data(message.encode("utf-8")))
+        out.extend(commands)
+        out.append(b"\n")
+
+    def write_file(path: str) -> bytes:
+        return f"M 100644 inline {path}\n".encode("utf-8") + _data(("\n".join(contents[path]) + "\n").encode("utf-8"))
+
+    commit(0, "Initial import", [write_file(path) for path in contents])
+    for number in range(1, shape.commits + 1):
+        commands: List[bytes] = []
+        paths = sorted(contents)
+        for path in rng.sample(paths, min(shape.files_per_commit, len(paths))):
+            lines = contents[path]
+            for _ in range(shape.diff_lines):
+                lines[rng.randrange(1, len(lines))] = _source_line(rng, number)
+            commands.append(write_file(path))
+        if rng.random() < shape.binary_ratio:
+            blob = bytes(rng.randrange(256) for _ in range(2048)) + b"\0"
+            commands.append(f"M 100644 inline assets/blob_{number % 5}.bin\n".encode("utf-8") + _data(blob))
+        if rng.random() < shape.rename_ratio:
+            old = rng.choice(sorted(contents))
+            new = old.replace(".py", f"_r{number}.py")
+            contents[new] = contents.pop(old)
+            commands.append(f"R {old} {new}\n".encode("utf-8"))
+        commit(number, f"Change {number}: update {len(commands)} files", commands)
+    return b"".join(out)
+
+
+def create_synthetic_repo(path: Path, shape: RepoShape) -> Path:
+    """
+    Create (or replace the history of) a git repository at `path` shaped like `shape`, with `main` checked out.
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    subprocess.run(["git", "init", "-q", "-b", "main"], cwd=path, check=True)
+    subprocess.run(["git", "fast-import", "--quiet", "--force"], cwd=path, input=fast_import_stream(shape), check=True)
+    subprocess.run(["git", "reset", "-q", "--hard", "main"], cwd=path, check=True)
+    return path
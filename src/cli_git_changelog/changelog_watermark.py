@@ -0,0 +1,62 @@
+import json
+import os
+import subprocess
+from pathlib import Path
+from typing import Dict, Optional
+from cli_git_changelog.utils.logger import get_logger
+from cli_git_changelog.utils.tracing import traced
+
+
+logger = get_logger(__name__)
+
+
+WATERMARK_FILENAME = ".changelog_watermark.json"
+
+
+@traced("git.rev-parse")
+def current_branch(working_directory: str) -> str:
+    """
+    Name of the checked out branch, or "HEAD" when detached (as is common in CI checkouts).
+    """
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--abbrev-ref", "HEAD"],
+            cwd=working_directory,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except subprocess.CalledProcessError:
+        logger.error("Failed to resolve the current branch — are you in a Git repo?")
+        raise RuntimeError("Failed to resolve the current branch — are you in a Git repo?")
+
+
+def _load_watermarks(output_dir: Path) -> Dict[str, str]:
+    path = output_dir / WATERMARK_FILENAME
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable watermark file {path}: {e}")
+        return {}
+
+
+def read_watermark(output_dir: Path, branch: str) -> Optional[str]:
+    """
+    :return: the last SHA summarized for `branch` into `output_dir`, or None on the first incremental run
+    """
+    return _load_watermarks(output_dir).get(branch)
+
+
+def write_watermark(output_dir: Path, branch: str, sha: str) -> None:
+    """
+    Record `sha` as the last summarized commit for `branch`. The file is replaced atomically so a crash
+    never leaves a truncated watermark behind.
+    """
+    watermarks = _load_watermarks(output_dir)
+    watermarks[branch] = sha
+    path = output_dir / WATERMARK_FILENAME
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(watermarks, indent=4))
+    os.replace(tmp, path)
+    logger.info(f"Advanced watermark for {branch} to {sha}")
@@ -0,0 +1,262 @@
+import json
+import os
+import signal
+import socketserver
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+from cli_git_changelog.daemon_client import daemon_running
+from cli_git_changelog.generate_changelog import API_URL, create_changelog
+from cli_git_changelog.global_rate_limited_dispatcher import current_tenant
+from cli_git_changelog.model_interface import get_model
+from cli_git_changelog.utils.context_executor import ContextThreadPoolExecutor
+from cli_git_changelog.utils.logger import get_logger
+from cli_git_changelog.utils.tracing import count, span, tracer
+
+
+logger = get_logger(__name__)
+
+
+# ----------------------------------------------------------------------------------------------------
+# MARK: CHANGELOG DAEMON
+# ----------------------------------------------------------------------------------------------------
+# `generate-changelog serve` keeps one process warm for many runs: the SDK is imported once, the pooled HTTP
+# connections, the rate limiter and the summary cache's size accounting live as long as the daemon, and jobs from
+# any number of CI invocations run concurrently. Each job is its own dispatcher tenant, so its model calls are
+# started round-robin with the other jobs' instead of queueing behind a large one.
+#
+# The API is JSON over HTTP on a Unix socket, which only local users with access to the socket file can reach:
+#   POST /jobs        submit a job, 202 with its state
+#   GET  /jobs        every known job
+#   GET  /jobs/<id>   one job, with its release changelog once it succeeded
+#   GET  /health      liveness and queue depth
+#   GET  /metrics     stage timings and counters of every job so far, in the Prometheus text format
+
+
+DEFAULT_MAX_JOBS = 4
+MAX_FINISHED_JOBS = 500
+# Options a job may set, the keyword arguments of `create_changelog` that describe what to summarize and where
+JOB_OPTIONS = (
+    "n_commits",
+    "revision_range",
+    "incremental",
+    "commit_strategy",
+    "single_pass",
+    "disable_commit_writing",
+    "disable_batch_writing",
+    "batch_output_override",
+    "cache_dir",
+    "cache_max_bytes",
+    "context_budget",
+    "fan_in",
+    "group_by",
+    "git_workers",
+    "dedup_threshold",
+    "stream",
+)
+PATH_OPTIONS = ("working_directory", "output_dir", "batch_output_override", "cache_dir")
+
+
+class ChangelogJob:
+    def __init__(self, options: Dict[str, Any]) -> None:
+        self.id = uuid.uuid4().hex[:12]
+        self.options = options
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.release_changelog: Optional[str] = None
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.future: Optional[Future] = None
+
+    def to_dict(self, include_changelog: bool = False) -> Dict[str, Any]:
+        state = {
+            "id": self.id,
+            "status": self.status,
+            "error": self.error,
+            "options": self.options,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if include_changelog:
+            state["release_changelog"] = self.release_changelog
+        return state
+
+
+def validate_job(body: Any) -> Dict[str, Any]:
+    """
+    :return: the job's options, with `model` and the output directory filled in
+    :raises ValueError: with a message for the client when the job is malformed
+    """
+    if not isinstance(body, dict):
+        raise ValueError("A job is a JSON object")
+    unknown = sorted(set(body) - set(JOB_OPTIONS) - {"working_directory", "output_dir", "model"})
+    if unknown:
+        raise ValueError(f"Unknown job options: {', '.join(unknown)}")
+    if not body.get("working_directory"):
+        raise ValueError("working_directory is required")
+    # The daemon's working directory is not the client's, only absolute paths mean the same to both
+    relative = [name for name in PATH_OPTIONS if body.get(name) is not None and not Path(body[name]).is_absolute()]
+    if relative:
+        raise ValueError(f"Paths must be absolute: {', '.join(relative)}")
+    options = dict(body)
+    options.setdefault("output_dir", str(Path(body["working_directory"]) / "changelogs"))
+    return options
+
+
+class ChangelogDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self,
+                 socket_path: Union[str, Path],
+                 api_key: str,
+                 model: str,
+                 concurrency: bool = True,
+                 max_workers_per_commit: int = 5,
+                 max_commit_workers: int = 2,
+                 max_jobs: int = DEFAULT_MAX_JOBS,
+                 cache_dir: Union[str, Path, None] = None) -> None:
+        """
+        :param model: model of the jobs that do not pick their own
+        :param max_jobs: jobs that run at once, later ones queue in submission order
+        :param cache_dir: summary cache of the jobs that do not pick their own, None to disable it
+        """
+        self.socket_path = Path(socket_path)
+        self.api_key = api_key
+        self.model = model
+        self.concurrency = concurrency
+        self.max_workers_per_commit = max_workers_per_commit
+        self.max_commit_workers = max_commit_workers
+        self.max_jobs = max_jobs
+        self.cache_dir = str(cache_dir) if cache_dir is not None else None
+        self.jobs: Dict[str, ChangelogJob] = {}
+        self.lock = threading.Lock()
+        self.executor = ContextThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="job")
+
+        if daemon_running(self.socket_path):
+            logger.error(f"A changelog daemon is already listening on {self.socket_path}")
+            raise RuntimeError(f"A changelog daemon is already listening on {self.socket_path}")
+        # A socket file nobody answers on was left behind by a daemon that did not shut down cleanly
+        self.socket_path.unlink(missing_ok=True)
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        super().__init__(str(self.socket_path), ChangelogRequestHandler)
+        os.chmod(self.socket_path, 0o600)
+
+    def warm_up(self) -> None:
+        """Build a model once, so the SDK import and the shared dispatcher and HTTP pool are ready for the first job."""
+        get_model(api_url=API_URL, api_key=self.api_key, model=self.model)
+
+    def submit(self, options: Dict[str, Any]) -> ChangelogJob:
+        job = ChangelogJob(options)
+        with self.lock:
+            self.jobs[job.id] = job
+            self._prune()
+            job.future = self.executor.submit(self._run_job, job)
+        logger.info(f"Queued job {job.id} for {options['working_directory']}")
+        return job
+
+    def _prune(self) -> None:
+        finished = [job for job in self.jobs.values() if job.finished_at is not None]
+        for job in sorted(finished, key=lambda job: job.finished_at)[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self.jobs[job.id]
+
+    def _run_job(self, job: ChangelogJob) -> None:
+        # Runs in its own copy of the context, so the job's calls are queued under its own tenant
+        current_tenant.set(f"job:{job.id}")
+        options = dict(job.options)
+        working_directory = options.pop("working_directory")
+        output_dir = Path(options.pop("output_dir"))
+        model = options.pop("model", None) or self.model
+        options.setdefault("cache_dir", self.cache_dir)
+        job.status, job.started_at = "running", time.time()
+        logger.info(f"Running job {job.id} for {working_directory}")
+        try:
+            with span("job", job=job.id):
+                job.release_changelog = create_changelog(self.api_key, model, working_directory, output_dir, options.pop("n_commits", 1),
+                                                         self.concurrency, self.max_workers_per_commit, self.max_commit_workers, **options)
+            job.status = "succeeded"
+        except Exception as e:
+            job.status, job.error = "failed", str(e)
+            logger.error(f"Job {job.id} failed: {e}")
+        finally:
+            job.finished_at = time.time()
+            count("daemon_jobs", status=job.status)
+            logger.info(f"Job {job.id} {job.status} in {job.finished_at - job.started_at:.1f}s")
+
+    def job_counts(self) -> Dict[str, int]:
+        with self.lock:
+            statuses = [job.status for job in self.jobs.values()]
+        return {status: statuses.count(status) for status in ("queued", "running", "succeeded", "failed")}
+
+    def serve(self) -> None:
+        """Serve until interrupted or sent SIGTERM, then let the running jobs finish and drop the queued ones."""
+        def stop(signum, frame):
+            raise KeyboardInterrupt
+        signal.signal(signal.SIGTERM, stop)
+        logger.info(f"Changelog daemon listening on {self.socket_path}, running up to {self.max_jobs} jobs at once")
+        try:
+            self.serve_forever()
+        except KeyboardInterrupt:
+            running = self.job_counts()["running"]
+            logger.info(f"Shutting down, waiting for {running} running jobs")
+        finally:
+            self.server_close()
+            self.socket_path.unlink(missing_ok=True)
+            self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+class ChangelogRequestHandler(BaseHTTPRequestHandler):
+    server: ChangelogDaemon
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args) -> None:
+        # Unix socket peers have no address, which the default implementation would print
+        logger.debug(format % args)
+
+    def _send(self, status: int, body: str, content_type: str = "application/json") -> None:
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("content-type", content_type)
+        self.send_header("content-length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_json(self, status: int, body: Any) -> None:
+        self._send(status, json.dumps(body))
+
+    def _send_error(self, status: int, message: str) -> None:
+        self._send_json(status, {"error": message})
+
+    def do_POST(self) -> None:
+        if self.path.split("?")[0].rstrip("/") != "/jobs":
+            return self._send_error(404, f"No route for {self.path}")
+        try:
+            length = int(self.headers.get("content-length") or 0)
+            options = validate_job(json.loads(self.rfile.read(length) or b"{}"))
+        except ValueError as e:
+            return self._send_error(400, str(e))
+        self._send_json(202, self.server.submit(options).to_dict())
+
+    def do_GET(self) -> None:
+        parts = self.path.split("?")[0].strip("/").split("/")
+        if parts == ["health"]:
+            return self._send_json(200, {"status": "ok", "pid": os.getpid(), "jobs": self.server.job_counts()})
+        if parts == ["metrics"]:
+            return self._send(200, tracer.prometheus_text(), "text/plain; version=0.0.4")
+        if parts == ["jobs"]:
+            with self.server.lock:
+                jobs: List[Dict[str, Any]] = [job.to_dict() for job in self.server.jobs.values()]
+            return self._send_json(200, jobs)
+        if len(parts) == 2 and parts[0] == "jobs":
+            with self.server.lock:
+                job = self.server.jobs.get(parts[1])
+                state = job.to_dict(include_changelog=True) if job is not None else None
+            if state is None:
+                return self._send_error(404, f"No job {parts[1]}")
+            return self._send_json(200, state)
+        self._send_error(404, f"No route for {self.path}")
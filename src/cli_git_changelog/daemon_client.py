@@ -0,0 +1,86 @@
+import http.client
+import json
+import os
+import socket
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+
+# ----------------------------------------------------------------------------------------------------
+# MARK: DAEMON CLIENT
+# ----------------------------------------------------------------------------------------------------
+# Talks to a running `generate-changelog serve` over its Unix socket. Only the standard library is imported here,
+# so a CLI invocation that forwards its job to the daemon never pays for the SDK imports.
+
+
+DAEMON_SOCKET_ENV = "CHANGELOG_DAEMON_SOCKET"
+FINISHED_STATUSES = ("succeeded", "failed")
+
+
+def default_socket_path() -> Path:
+    """
+    $CHANGELOG_DAEMON_SOCKET when set, otherwise a socket in $XDG_RUNTIME_DIR (or the cache directory).
+    """
+    override = os.getenv(DAEMON_SOCKET_ENV)
+    if override:
+        return Path(override)
+    base = os.getenv("XDG_RUNTIME_DIR") or os.getenv("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "cli_git_changelog" / "daemon.sock"
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: Union[str, Path], timeout: float = 10.0) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = str(socket_path)
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def daemon_request(socket_path: Union[str, Path], method: str, path: str, body: Optional[Dict[str, Any]] = None, timeout: float = 10.0) -> Tuple[int, Dict[str, Any]]:
+    """
+    :return: the status code and JSON body of the daemon's response
+    """
+    connection = UnixHTTPConnection(socket_path, timeout)
+    try:
+        payload = json.dumps(body) if body is not None else None
+        connection.request(method, path, body=payload, headers={"content-type": "application/json"})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read() or b"{}")
+    finally:
+        connection.close()
+
+
+def daemon_running(socket_path: Union[str, Path]) -> bool:
+    """Whether a daemon answers on `socket_path`; a socket file left behind by a dead daemon does not count."""
+    if not Path(socket_path).exists():
+        return False
+    try:
+        status, _ = daemon_request(socket_path, "GET", "/health", timeout=2.0)
+    except (OSError, http.client.HTTPException, ValueError):
+        return False
+    return status == 200
+
+
+def submit_job(socket_path: Union[str, Path], job: Dict[str, Any]) -> Dict[str, Any]:
+    status, body = daemon_request(socket_path, "POST", "/jobs", job)
+    if status != 202:
+        raise RuntimeError(f"The changelog daemon rejected the job: {body.get('error', body)}")
+    return body
+
+
+def wait_for_job(socket_path: Union[str, Path], job_id: str, poll_interval: float = 1.0) -> Dict[str, Any]:
+    """Poll the job until it succeeded or failed, :return: its final state"""
+    while True:
+        try:
+            status, body = daemon_request(socket_path, "GET", f"/jobs/{job_id}")
+        except (OSError, http.client.HTTPException) as e:
+            raise RuntimeError(f"Lost the changelog daemon on {socket_path} while waiting for job {job_id}, it may have been stopped: {e}")
+        if status != 200:
+            raise RuntimeError(f"Lost track of daemon job {job_id}: {body.get('error', body)}")
+        if body["status"] in FINISHED_STATUSES:
+            return body
+        time.sleep(poll_interval)
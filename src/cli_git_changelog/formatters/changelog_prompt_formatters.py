@@ -1,23 +1,58 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
 from cli_git_changelog.formatters import CHANGELOG_EXAMPLE
 
 
+# Bump whenever a prompt builder's wording or layout changes, so cached summaries built from old prompts are not reused
+PROMPT_BUILDER_VERSION = "2"
+
+
 def build_file_change_summary_prompt(file_name: str, full_file: str, changes: str) -> str:
     return (
         "You are a release manager. Given the following changes to your given file, "
         "generate a user‑friendly high level changelog grouped by type (e.g., Features, Fixes):\n\n"
-        "Be very terse and concise. Only include the most important changes in the changelog."
+        "Be very terse and concise. Only include the most important changes in the changelog.\n\n"
         f"File changed: {file_name}\n{full_file}\n\nChanges:\n{changes}\n\n Changelog:"
     )
 
 
-def build_changelog_prompt(changes_log = Dict[str, str]) -> str:
+def describe_file_group(paths: List[str], max_listed: int = 20) -> str:
+    """
+    Name a file whose change was also applied, near-identically, to other files, e.g. for a codemod. Summaries are
+    only requested for the first file, the name tells the model (and the commit prompt) where else it applies.
+    """
+    if len(paths) == 1:
+        return paths[0]
+    others = paths[1:max_listed + 1]
+    more = f" and {len(paths) - 1 - len(others)} more" if len(paths) - 1 > len(others) else ""
+    return f"{paths[0]} (the same change was also made to {len(paths) - 1} other files: {', '.join(others)}{more})"
+
+
+def build_packed_file_changes_summary_prompt(changes: Dict[str, str]) -> str:
+    """
+    One prompt for several small file diffs, each labelled with the file it belongs to.
+    """
+    return (
+        "You are a release manager. Given the following small changes to several files, "
+        "generate a user‑friendly high level changelog grouped by type (e.g., Features, Fixes):\n\n"
+        "Be very terse and concise. Only include the most important changes in the changelog.\n\n" +
+        "\n\n".join(f"File changed: {file_name}\nChanges:\n{diff}" for file_name, diff in changes.items()) +
+        "\n\n Changelog:"
+    )
+
+
+def build_changelog_prompt(changes_log = Dict[str, str], renames: Optional[Dict[str, str]] = None, copies: Optional[Dict[str, str]] = None) -> str:
+    """
+    :param renames: new path -> old path of files moved without edits, listed as one line each instead of a summary
+    :param copies: new path -> source path of files copied without edits
+    """
+    moves = [f"File renamed: {old} -> {new} (contents unchanged)" for new, old in (renames or {}).items()]
+    moves += [f"File copied: {old} -> {new} (contents unchanged)" for new, old in (copies or {}).items()]
     return (
         "You are a release manager. Given the following changelogs of files, build a comprehensive changelog"
         " for all of the changes in the repo done by this commit. Please include a high level summary of the changes"
-        f" in a form mimicking this example: {CHANGELOG_EXAMPLE}"
-        "\n".join(f"File changed: {k}\nChanges: {v}" for k, v in changes_log.items()) +
-        " Changelog:"
+        f" in a form mimicking this example: {CHANGELOG_EXAMPLE}\n" +
+        "\n".join([f"File changed: {k}\nChanges: {v}" for k, v in changes_log.items()] + moves) +
+        "\n Changelog:"
     )
 
 
@@ -26,7 +61,39 @@ def build_full_commit_batch_changelog_prompt(commits_changelogs: List[str]) -> s
         "You are a release manager. Given the following changelogs of files, build a comprehensive changelog"
         " for all of the changes in the repo done by this commit. Please include a high level summary of the changes"
         f" in a form mimicking this example: {CHANGELOG_EXAMPLE}"
-        " Join the following sub release change logs into a single release change log, only include the most important changes:"
+        " Join the following sub release change logs into a single release change log, only include the most important changes:\n" +
         "\n".join(f"sub release change log: {v}" for v in commits_changelogs) +
-        " Changelog:"
-    )
\ No newline at end of file
+        "\n Changelog:"
+    )
+
+
+def build_partial_release_changelog_prompt(sub_changelogs: List[str], scope: str = "") -> str:
+    """
+    Intermediate step of the tree reduce: merge a chunk of change logs into one partial change log that is
+    merged again with its siblings later.
+    :param scope: optional description of what the chunk covers, e.g. "changes under src/"
+    """
+    scope = f" ({scope})" if scope else ""
+    return (
+        f"You are a release manager. The following change logs cover one part{scope} of a larger release."
+        " Merge them into a single partial change log grouped by type (e.g., Features, Fixes)."
+        " Keep every user facing change, drop duplicates and internal noise, and be terse;"
+        " it will be merged with the other parts of the release later:\n" +
+        "\n".join(f"sub release change log: {v}" for v in sub_changelogs) +
+        "\n Partial changelog:"
+    )
+
+
+def build_cross_repo_release_prompt(repo_changelogs: List[str]) -> str:
+    """
+    Final step of a multi-repo run: one summary of the release changelogs of every repository in the release.
+    :param repo_changelogs: the release changelog of each repository, prefixed with its name
+    """
+    return (
+        "You are a release manager. The following release change logs each cover one repository (or a group of"
+        " repositories) shipped together in the same release. Write a single cross-repository release summary:"
+        " start with the highlights users will notice, then list the notable changes per repository, and call out"
+        " changes that span several repositories. Only include the most important changes:\n" +
+        "\n".join(f"repository release change log: {v}" for v in repo_changelogs) +
+        "\n Release summary:"
+    )
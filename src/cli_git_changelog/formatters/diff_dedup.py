@@ -0,0 +1,130 @@
+import hashlib
+import random
+import re
+from collections import Counter, defaultdict
+from pathlib import PurePosixPath
+from typing import Dict, List, Set, Tuple
+
+
+# ----------------------------------------------------------------------------------------------------
+# MARK: NEAR-DUPLICATE FILE CHANGES
+# ----------------------------------------------------------------------------------------------------
+# Mechanical commits (import reorders, header bumps, codemods) touch many files with the same edit. Diffs are
+# normalized, shingled and MinHashed; locality sensitive hashing finds candidate pairs, and the ones whose
+# estimated similarity clears the threshold and whose changed lines really are alike are clustered, so each
+# distinct change pattern is summarized once. Only the representative of a cluster reaches the model, so a
+# wrongly merged change would be missing from the changelog: the confirmation errs on the side of not merging.
+
+
+DEFAULT_DEDUP_THRESHOLD = 0.8
+SHINGLE_SIZE = 4
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16                  # NUM_PERMUTATIONS / LSH_BANDS rows per band
+MIN_SHINGLES = 32               # diffs with fewer shingles are too small to call duplicates
+MAX_SHINGLES = 2_000            # larger diffs are rarely mechanical and would dominate the hashing time
+
+TOKEN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+|\S")
+HUNK_HEADER_LINE = re.compile(r"^@@[^\n]*@@[^\n]*$", re.MULTILINE)
+CHANGED_LINE = re.compile(r"^[+-](?![+-]{2} )[^\n]*$", re.MULTILINE)
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(0)  # fixed seeds, so clusters (and the prompts built from them) are the same every run
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERMUTATIONS)]
+
+
+def _tokens(path: str, text: str) -> List[str]:
+    # The file's own name says nothing about the shape of the change
+    names = {PurePosixPath(path).stem, PurePosixPath(path).name}
+    return ["<path>" if t in names else t for t in TOKEN.findall(text)]
+
+
+def normalize_diffs(files: Dict[str, str]) -> Dict[str, List[str]]:
+    """
+    Token streams of the diffs with paths, line numbers and file-local identifiers masked. An identifier only one
+    diff uses (a local variable, the class named after the file, ...) is renamed to a placeholder numbered by its
+    first position, so two diffs only match when their local names are used in the same places; one several diffs
+    share (the renamed function of a codemod) is the change itself and is kept, as are all literals.
+    """
+    streams = {path: _tokens(path, HUNK_HEADER_LINE.sub("", str(diff))) for path, diff in files.items()}
+    document_frequency = Counter(t for stream in streams.values() for t in set(stream))
+    normalized: Dict[str, List[str]] = {}
+    for path, stream in streams.items():
+        placeholders: Dict[str, str] = {}
+        normalized[path] = [
+            placeholders.setdefault(t, f"<id{len(placeholders)}>") if document_frequency[t] == 1 and (t[0].isalpha() or t[0] == "_") else t
+            for t in stream
+        ]
+    return normalized
+
+
+def changed_tokens(path: str, diff: str) -> Set[str]:
+    """Tokens of the added and removed lines, unmasked: the change itself, without the context around it."""
+    return set(_tokens(path, "\n".join(CHANGED_LINE.findall(str(diff)))))
+
+
+def _jaccard(left: Set[str], right: Set[str]) -> float:
+    return len(left & right) / len(left | right) if left or right else 1.0
+
+
+def _shingles(tokens: List[str]) -> Set[int]:
+    return {
+        int.from_bytes(hashlib.blake2b("\x00".join(tokens[i:i + SHINGLE_SIZE]).encode(), digest_size=8).digest(), "big")
+        for i in range(max(len(tokens) - SHINGLE_SIZE + 1, 1))
+    }
+
+
+def minhash(shingles: Set[int]) -> Tuple[int, ...]:
+    return tuple(min((a * s + b) % _MERSENNE_PRIME for s in shingles) for a, b in _PERMUTATIONS)
+
+
+def _similarity(left: Tuple[int, ...], right: Tuple[int, ...]) -> float:
+    return sum(x == y for x, y in zip(left, right)) / NUM_PERMUTATIONS
+
+
+def cluster_file_changes(files: Dict[str, str], threshold: float = DEFAULT_DEDUP_THRESHOLD) -> List[List[str]]:
+    """
+    Group near-identical diffs.
+    :param files: path -> cleaned diff, in commit order
+    :param threshold: estimated Jaccard similarity of the normalized shingles above which two diffs are the same change
+    :return: clusters of paths in commit order, the first path of each cluster is its representative
+    """
+    if len(files) < 2:
+        return [[path] for path in files]
+    paths = list(files)
+    shingles = {path: _shingles(tokens) for path, tokens in normalize_diffs(files).items()}
+    changes = {path: changed_tokens(path, diff) for path, diff in files.items()}
+    signatures = {path: minhash(shingles[path]) for path in paths if MIN_SHINGLES <= len(shingles[path]) <= MAX_SHINGLES}
+    order = {path: idx for idx, path in enumerate(paths)}
+
+    parent = {path: path for path in paths}
+
+    def find(path: str) -> str:
+        while parent[path] != path:
+            parent[path] = parent[parent[path]]
+            path = parent[path]
+        return path
+
+    rows = NUM_PERMUTATIONS // LSH_BANDS
+    compared: Set[Tuple[str, str]] = set()
+    for band in range(LSH_BANDS):
+        buckets: Dict[Tuple[int, ...], List[str]] = defaultdict(list)
+        for path, signature in signatures.items():
+            buckets[signature[band * rows:(band + 1) * rows]].append(path)
+        for bucket in buckets.values():
+            for i, left in enumerate(bucket):
+                for right in bucket[i + 1:]:
+                    if (left, right) in compared or find(left) == find(right):
+                        continue
+                    compared.add((left, right))
+                    if _similarity(signatures[left], signatures[right]) < threshold:
+                        continue
+                    # The estimate over masked diffs only nominates pairs: the changed lines must agree as well, and
+                    # so must those of the two clusters' representatives, the only files the model will see
+                    # The earlier file stays the root, so the representative is the first file of the cluster
+                    roots = sorted((find(left), find(right)), key=order.__getitem__)
+                    if _jaccard(changes[left], changes[right]) >= threshold and _jaccard(changes[roots[0]], changes[roots[1]]) >= threshold:
+                        parent[roots[1]] = roots[0]
+
+    clusters: Dict[str, List[str]] = {}
+    for path in paths:
+        clusters.setdefault(find(path), []).append(path)
+    return list(clusters.values())
@@ -0,0 +1,107 @@
+from typing import Dict, List, Optional, Tuple
+from cli_git_changelog.git_interface_strategies.parsed_diff import ParsedDiff
+from cli_git_changelog.formatters.changelog_prompt_formatters import build_file_change_summary_prompt, build_packed_file_changes_summary_prompt, describe_file_group
+from cli_git_changelog.formatters.diff_dedup import DEFAULT_DEDUP_THRESHOLD, cluster_file_changes
+from cli_git_changelog.utils.tokens import CHARS_PER_TOKEN, estimate_tokens
+
+
+DEFAULT_CONTEXT_BUDGET = 16_000  # tokens per file-level prompt
+MIN_CHANGED_LINES = 5            # smaller diffs are not worth a summary
+SMALL_DIFF_LINES = 10            # smaller diffs are packed together, without their pre-image
+OLD_CONTENT_WINDOW = 20          # lines of pre-image kept on each side of a hunk
+
+
+def hunk_old_ranges(diff: ParsedDiff) -> List[Tuple[int, int]]:
+    """
+    :return: (start, count) of the pre-image lines each hunk touches, 1-based; count is 0 for pure insertions
+    """
+    return [(hunk.old_start, hunk.old_count) for hunk in diff.hunks]
+
+
+def trim_to_hunk_windows(old: str, ranges: List[Tuple[int, int]], window: int = OLD_CONTENT_WINDOW) -> str:
+    """
+    Keep only the pre-image lines within `window` lines of a hunk, merging overlapping windows. Each kept
+    window is labelled with its line numbers so the model can line it up with the hunk headers.
+    """
+    lines = old.splitlines()
+    if not ranges or not lines:
+        return old
+    windows: List[List[int]] = []
+    for start, count in sorted(ranges):
+        lo = max(1, start - window)
+        hi = min(len(lines), start + max(count, 1) - 1 + window)
+        if windows and lo <= windows[-1][1] + 1:
+            windows[-1][1] = max(windows[-1][1], hi)
+        else:
+            windows.append([lo, hi])
+    if windows == [[1, len(lines)]]:
+        return old
+    return "\n".join(f"[lines {lo}-{hi}]\n" + "\n".join(lines[lo - 1:hi]) for lo, hi in windows)
+
+
+def _old_context(old, diff: ParsedDiff, budget: int) -> str:
+    if budget <= 0:
+        return ""
+    # old is usually a LazyBlob: the pre-image is only read from git here, for files that need it
+    old = str(old)
+    if not old:
+        return ""
+    trimmed = trim_to_hunk_windows(old, hunk_old_ranges(diff))
+    if estimate_tokens(trimmed) > budget:
+        trimmed = trimmed[:budget * CHARS_PER_TOKEN] + "\n[... truncated]"
+    return trimmed
+
+
+def _pack(small: List[Tuple[int, str, str, int]], capacity: int) -> List[List[Tuple[int, str, str, int]]]:
+    # First-fit decreasing: place the largest diffs first so the bins end up as full as possible
+    bins: List[List[Tuple[int, str, str, int]]] = []
+    loads: List[int] = []
+    for change in sorted(small, key=lambda c: c[3], reverse=True):
+        for i, load in enumerate(loads):
+            if load + change[3] <= capacity:
+                bins[i].append(change)
+                loads[i] += change[3]
+                break
+        else:
+            bins.append([change])
+            loads.append(change[3])
+    # Back to commit order inside each bin, so the same commit always yields the same prompts
+    return sorted((sorted(b) for b in bins), key=lambda b: b[0][0])
+
+
+def pack_file_change_prompts(files: Dict[str, Tuple[object, str]], context_budget: int = DEFAULT_CONTEXT_BUDGET, dedup_threshold: Optional[float] = DEFAULT_DEDUP_THRESHOLD) -> List[Tuple[str, str]]:
+    """
+    Turn a commit's file changes into as few file-level prompts as fit `context_budget` tokens each.
+    Each file's size is estimated once. Near-identical diffs are clustered first and only the first file of
+    each cluster is summarized, named together with the others. Large diffs get a prompt of their own with the
+    pre-image trimmed to the windows around their hunks; small diffs are bin-packed together without a pre-image.
+    :param files: path -> (old content, cleaned diff), diffs from `clean_diff` are already parsed
+    :param dedup_threshold: similarity above which two diffs count as the same change, None to summarize every file
+    :return: (label, prompt) pairs, the label names the file(s) the prompt covers
+    """
+    capacity = max(context_budget - estimate_tokens(build_packed_file_changes_summary_prompt({})), 1)
+    kept: Dict[str, Tuple[object, ParsedDiff]] = {}
+    for path, (old, diff) in files.items():
+        diff = ParsedDiff.of(diff)
+        if diff.changed_lines >= MIN_CHANGED_LINES:
+            kept[path] = (old, diff)
+    clusters = cluster_file_changes({path: diff for path, (_, diff) in kept.items()}, dedup_threshold) if dedup_threshold is not None else [[path] for path in kept]
+
+    prompts: List[Tuple[str, str]] = []
+    small: List[Tuple[int, str, str, int]] = []
+    for idx, cluster in enumerate(clusters):
+        path = describe_file_group(cluster)
+        old, diff = kept[cluster[0]]
+        changed = diff.changed_lines
+        tokens = estimate_tokens(diff) + estimate_tokens(path)
+        if changed < SMALL_DIFF_LINES:
+            small.append((idx, path, diff, tokens))
+            continue
+        prompts.append((path, build_file_change_summary_prompt(path, _old_context(old, diff, capacity - tokens), diff)))
+    for packed in _pack(small, capacity):
+        if len(packed) == 1:
+            _, path, diff, _ = packed[0]
+            prompts.append((path, build_file_change_summary_prompt(path, "", diff)))
+        else:
+            prompts.append((", ".join(c[1] for c in packed), build_packed_file_changes_summary_prompt({c[1]: c[2] for c in packed})))
+    return prompts
@@ -1,14 +1,27 @@
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, List, Union
+import itertools
+import threading
+from concurrent.futures import as_completed
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 from cli_git_changelog.utils.logger import get_logger
 from pathlib import Path
 from datetime import datetime
-from cli_git_changelog.git_interface_strategies import get_git_history_configured
+from cli_git_changelog.git_interface_strategies import iter_git_history_configured, revision_range_for_last_n, count_commits_in_range, resolve_revision
+from cli_git_changelog.git_interface_strategies.git_blob_reader import blob_reader_scope
+from cli_git_changelog.changelog_watermark import current_branch, read_watermark, write_watermark
 from cli_git_changelog import BASE_URL
 from cli_git_changelog.model_interface.model_interface import ModelInterface
-from cli_git_changelog.formatters.changelog_prompt_formatters import build_file_change_summary_prompt, build_changelog_prompt, build_full_commit_batch_changelog_prompt
+from cli_git_changelog.formatters.changelog_prompt_formatters import build_changelog_prompt
+from cli_git_changelog.formatters.prompt_packer import pack_file_change_prompts, DEFAULT_CONTEXT_BUDGET
+from cli_git_changelog.formatters.diff_dedup import DEFAULT_DEDUP_THRESHOLD
 from cli_git_changelog.model_interface import get_model
+from cli_git_changelog.summary_cache import SummaryCache, DEFAULT_CACHE_MAX_BYTES
+from cli_git_changelog.tree_reduce import tree_reduce, resolve_commit_groups, top_level_directory, DEFAULT_FAN_IN, RELEASE_MAX_TOKENS
+from cli_git_changelog.utils.progressive_writer import ProgressiveFileWriter
+from cli_git_changelog.utils.atomic_write import atomic_write_text
+from cli_git_changelog.utils.context_executor import ContextThreadPoolExecutor
+from cli_git_changelog.run_journal import RunJournal
+from cli_git_changelog.utils.tracing import count, span, traced, traced_iter
 
 
 logger = get_logger(__name__)
@@ -18,26 +31,12 @@ API_ENDPOINT = os.getenv("API_ENDPOINT", '')
 API_URL = f"{BASE_URL}{API_ENDPOINT}"
 
 
-def _lines(diff: str) -> int:
-    """Count non‑blank lines in an already‑stripped diff."""
-    return sum(1 for ln in diff.splitlines() if ln.strip())
-
-
-def build_file_change_prompts(commit: dict) -> List[str]:
-    prompts = []
-    carry_over = [[],[]]
-    for f, (old, diff) in commit['files'].items():
-        if _lines(diff) < 5:
-            continue
-        if _lines(diff) < 10:
-            carry_over[0].append(f)
-            carry_over[1].append(diff)
-            if sum(_lines(i) for i in carry_over[1]) > 1000:
-                prompts.append(build_file_change_summary_prompt("\n".join(carry_over[0]), "\n".join(carry_over[1]), ""))
-                carry_over = [[],[]]
-            continue
-        prompts.append(build_file_change_summary_prompt(f, old, diff))
-    return prompts
+def build_file_change_prompts(commit: dict, context_budget: int = DEFAULT_CONTEXT_BUDGET, dedup_threshold: Optional[float] = DEFAULT_DEDUP_THRESHOLD) -> List[Tuple[str, str]]:
+    """
+    :param dedup_threshold: similarity above which near-identical diffs share one summary, None to disable
+    :return: (label, prompt) pairs for the commit's file changes, packed to `context_budget` tokens per prompt
+    """
+    return pack_file_change_prompts(commit["files"], context_budget, dedup_threshold)
 
 
 def call_model(
@@ -45,23 +44,86 @@ def call_model(
     prompt: str,
     max_tokens: int = 4096,
     temperature: float = 0.5,
+    cache: Optional[SummaryCache] = None,
+    kind: str = "file",
 ) -> str:
+    key = None
+    if cache is not None:
+        key = SummaryCache.make_key(getattr(model, "model", type(model).__name__), prompt, max_tokens, temperature)
+        cached = cache.get(kind, key)
+        if cached is not None:
+            count("summaries", kind=kind, source="cache")
+            return cached
     try:
-        res = model.call_model(prompt=prompt, max_tokens=max_tokens, temperature=temperature)
+        with span(f"summary.{kind}"):
+            res = model.call_model(prompt=prompt, max_tokens=max_tokens, temperature=temperature)
         if res is None:
-            raise RuntimeError(f"Failed to get summary of {prompt}")
+            raise RuntimeError("The model returned no summary")
+        count("summaries", kind=kind, source="model")
+        if cache is not None:
+            cache.put(kind, key, res)
         return res
     except Exception as e:
-        logger.error(f"Failed to get summary of {prompt}: {e}")
+        count("summary_failures", kind=kind)
+        logger.error(f"Failed to get {kind} summary of a {len(prompt)} character prompt: {e}")
         return None
 
 
-def configure_output_dirs(output_dir: Path, disable_commit_writing: bool = False, disable_batch_writing: bool = False):
+def stream_model_to_file(
+    model: ModelInterface,
+    prompt: str,
+    path: Path,
+    max_tokens: int = 4096,
+    temperature: float = 0.5,
+    cache: Optional[SummaryCache] = None,
+    kind: str = "commit",
+) -> Optional[str]:
+    """
+    `call_model` for a summary that is written to `path`: the response is streamed into `<path>.partial` as it
+    is generated and moved into place once complete. Cache hits and models without streaming are written at once.
+    """
+    key = None
+    if cache is not None:
+        key = SummaryCache.make_key(getattr(model, "model", type(model).__name__), prompt, max_tokens, temperature)
+    cached = cache.get(kind, key) if cache is not None else None
+    if cached is not None or not hasattr(model, "stream_model"):
+        if cached is not None:
+            count("summaries", kind=kind, source="cache")
+        res = cached if cached is not None else call_model(model, prompt, max_tokens, temperature, cache, kind)
+        if res is not None:
+            atomic_write_text(path, res)
+            logger.info(f"Wrote {path}")
+        return res
+    writer = ProgressiveFileWriter(path)
+    try:
+        with span(f"summary.{kind}", stream=True):
+            res = model.stream_model(prompt, writer.write, temperature=temperature, max_tokens=max_tokens, on_restart=writer.restart)
+        if res is None:
+            raise RuntimeError("The model returned no summary")
+        writer.commit(res)
+        logger.info(f"Wrote {path}")
+        count("summaries", kind=kind, source="model")
+        if cache is not None:
+            cache.put(kind, key, res)
+        return res
+    except Exception as e:
+        count("summary_failures", kind=kind)
+        logger.error(f"Failed to get {kind} summary of a {len(prompt)} character prompt: {e}")
+        return None
+    finally:
+        writer.close()
+
+
+def configure_output_dirs(output_dir: Path, disable_commit_writing: bool = False, disable_batch_writing: bool = False, incremental: bool = False, run_dir: Optional[Path] = None):
+    """
+    :param run_dir: directory of the run to write into, a new timestamped one under `output_dir` by default;
+        its batch output goes to `<run_dir>/batch`, so the run directory is always the batch directory's parent
+    """
     if not output_dir.exists():
         output_dir.mkdir(parents=True, exist_ok=True)
-    ts = datetime.now().strftime("%Y%m%dT%H%M%S")
-    base_out = output_dir / ts
-    commits_out = base_out / "commits"
+    base_out = Path(run_dir) if run_dir is not None else output_dir / datetime.now().strftime("%Y%m%dT%H%M%S")
+    # Incremental runs share one commits/ directory so later runs can reuse earlier per-commit summaries
+    commits_out = (output_dir if incremental else base_out) / "commits"
     batch_out = base_out / "batch"
     if not disable_commit_writing:
         commits_out.mkdir(parents=True, exist_ok=True)
@@ -70,44 +132,197 @@ def configure_output_dirs(output_dir: Path, disable_commit_writing: bool = False
     return commits_out, batch_out
 
 
-def create_commit_changelog(LLM_model: ModelInterface, commits_out: Union[str, Path], info: dict, sha: str, concurrency: bool = False, max_workers_per_commit: int = 5, disable_commit_writing: bool = False):
-    file_prompts = build_file_change_prompts(info)
+@traced("commit")
+def create_commit_changelog(LLM_model: ModelInterface, commits_out: Union[str, Path], info: dict, sha: str, concurrency: bool = False, max_workers_per_commit: int = 5, disable_commit_writing: bool = False, cache: Optional[SummaryCache] = None, context_budget: int = DEFAULT_CONTEXT_BUDGET, dedup_threshold: Optional[float] = DEFAULT_DEDUP_THRESHOLD, stream: bool = True):
+    file_prompts = build_file_change_prompts(info, context_budget, dedup_threshold)
     file_summaries: Dict[str, str] = {}
-    file_paths = list(info["files"].keys())
 
     if concurrency:
-        with ThreadPoolExecutor(max_workers=max_workers_per_commit) as executor:
+        with ContextThreadPoolExecutor(max_workers=max_workers_per_commit) as executor:
             futures = {
-                executor.submit(call_model, LLM_model, prompt): idx
-                for idx, prompt in enumerate(file_prompts)
+                executor.submit(call_model, LLM_model, prompt, cache=cache): label
+                for label, prompt in file_prompts
             }
+            summaries_by_label: Dict[str, str] = {}
             for future in as_completed(futures):
-                idx = futures[future]
+                label = futures[future]
                 try:
                     summary = future.result()
                     if summary is not None:
-                        file_summaries[file_paths[idx]] = summary
-                        logger.info(f"File {file_paths[idx]} summary: {summary}")
+                        summaries_by_label[label] = summary
+                        logger.info(f"Summarized {label} in {len(summary)} characters")
                 except Exception as e:
-                    logger.error(f"Failed to summarize {file_paths[idx]}: {e}")
+                    logger.error(f"Failed to summarize {label}: {e}")
+            # Prompt order rather than completion order, so the commit prompt (and its cache key) is deterministic
+            file_summaries = {label: summaries_by_label[label] for label, _ in file_prompts if label in summaries_by_label}
     else:
-        for idx, prompt in enumerate(file_prompts):
-            summary = call_model(LLM_model, prompt)
+        for label, prompt in file_prompts:
+            summary = call_model(LLM_model, prompt, cache=cache)
             if summary is not None:
-                file_summaries[file_paths[idx]] = summary
-                logger.info(f"File {file_paths[idx]} summary: {summary}")
+                file_summaries[label] = summary
+                logger.info(f"Summarized {label} in {len(summary)} characters")
 
-    commit_prompt = build_changelog_prompt(file_summaries)
-    commit_summary = call_model(LLM_model, commit_prompt)
+    commit_prompt = build_changelog_prompt(file_summaries, info.get("renames"), info.get("copies"))
+    if stream and not disable_commit_writing:
+        return stream_model_to_file(LLM_model, commit_prompt, commits_out / f"{sha}.md", cache=cache, kind="commit")
+    commit_summary = call_model(LLM_model, commit_prompt, cache=cache, kind="commit")
     if commit_summary is not None:
         if not disable_commit_writing:
-            (commits_out / f"{sha}.md").write_text(commit_summary)
+            atomic_write_text(commits_out / f"{sha}.md", commit_summary)
             logger.info(f"Wrote {sha} to {commits_out / f'{sha}.md'}")
         return commit_summary
 
     return None
 
 
+def _load_written_commit_summary(commits_out: Path, sha: str) -> Optional[str]:
+    written = commits_out / f"{sha}.md"
+    if not written.exists():
+        return None
+    logger.info(f"Reusing existing summary for {sha} from {written}")
+    return written.read_text()
+
+
+def _guard_extraction(commits: Iterator[Tuple[str, dict]]) -> Iterator[Tuple[str, dict]]:
+    try:
+        yield from commits
+    except RuntimeError as e:
+        logger.error(f"Error fetching commits: {e}")
+        raise RuntimeError(f"Error fetching commits: {e}")
+
+
+def pin_revision_range(revision_range: str, working_directory: str) -> str:
+    """
+    Resolve both ends of a range (`v1.2.0..HEAD`, `A...B`, or a single revision) to commit SHAs, so the range means
+    the same commits for as long as the run (or its resumption) lasts, even after HEAD or a branch moves.
+    """
+    for separator in ("...", ".."):
+        if separator in revision_range:
+            start, end = revision_range.split(separator, 1)
+            # Like git, an omitted end of the range is HEAD
+            return f"{resolve_revision(start or 'HEAD', working_directory)}{separator}{resolve_revision(end or 'HEAD', working_directory)}"
+    return resolve_revision(revision_range, working_directory)
+
+
+def resolve_run_range(working_directory: str,
+                      output_dir: Path,
+                      n_commits: int,
+                      commit_strategy: bool,
+                      revision_range: Optional[str] = None,
+                      incremental: bool = False) -> Optional[Tuple[str, Optional[int], str, Optional[str]]]:
+    """
+    Work out which commits a run covers.
+    :return: (revision_range, max_count, head_sha, branch) or None when there is nothing new to summarize
+    """
+    max_count = None
+    head_sha = resolve_revision("HEAD", working_directory)
+    branch = current_branch(working_directory) if incremental else None
+    if revision_range is None and incremental:
+        watermark = read_watermark(output_dir, branch)
+        if watermark is None:
+            logger.info(f"No watermark for {branch} in {output_dir} yet, falling back to the last {n_commits} commits")
+        else:
+            try:
+                watermark = resolve_revision(watermark, working_directory)
+                revision_range = f"{watermark}..{head_sha}"
+            except RuntimeError:
+                logger.warning(f"Watermark {watermark} for {branch} no longer exists, falling back to the last {n_commits} commits")
+    if revision_range is None:
+        revision_range, max_count = revision_range_for_last_n(n_commits, working_directory, commit_strategy)
+    else:
+        pinned = pin_revision_range(revision_range, working_directory)
+        logger.info(f"Summarizing {revision_range} as {pinned}")
+        revision_range = pinned
+    if count_commits_in_range(revision_range, working_directory) == 0:
+        logger.info(f"No new commits in {revision_range}, nothing to summarize")
+        return None
+    return revision_range, max_count, head_sha, branch
+
+
+def resume_run(resume_dir: Path, cache: Optional[SummaryCache], model: str, commit_strategy: bool) -> Tuple[Tuple[str, Optional[int], str, Optional[str]], RunJournal]:
+    """
+    Reopen an interrupted run: its range is pinned to what the journal recorded, even if HEAD has moved since,
+    and every summary the journal holds is replayed instead of requested again.
+    :return: (revision_range, max_count, head_sha, branch) of the run and its journal
+    """
+    journal = RunJournal(resume_dir, cache)
+    header = journal.header
+    if header is None:
+        logger.error(f"No run journal in {resume_dir}, nothing to resume")
+        raise RuntimeError(f"No run journal in {resume_dir}, nothing to resume")
+    if header["commit_strategy"] != commit_strategy:
+        logger.error(f"{resume_dir} was run with{'' if header['commit_strategy'] else 'out'} --commit-strategy, resume it the same way")
+        raise RuntimeError(f"{resume_dir} was run with{'' if header['commit_strategy'] else 'out'} --commit-strategy, resume it the same way")
+    if header["model"] != model:
+        logger.warning(f"{resume_dir} was run with {header['model']}, summaries from {model} will not match its journal")
+    logger.info(f"Resuming run {resume_dir} over {header['revision_range']}")
+    return (header["revision_range"], header["max_count"], header["head_sha"], header["branch"]), journal
+
+
+def start_run_journal(run_dir: Path, cache: Optional[SummaryCache], run_range: Tuple[str, Optional[int], str, Optional[str]], model: str, commit_strategy: bool) -> RunJournal:
+    revision_range, max_count, head_sha, branch = run_range
+    journal = RunJournal(run_dir, cache)
+    journal.start({
+        "revision_range": revision_range,
+        "max_count": max_count,
+        "head_sha": head_sha,
+        "branch": branch,
+        "model": model,
+        "commit_strategy": commit_strategy,
+    })
+    return journal
+
+
+def open_commit_stream(revision_range: str, working_directory: str, commit_strategy: bool, single_pass: bool, max_count: Optional[int], git_workers: int = 1) -> Iterator[Tuple[str, dict]]:
+    """
+    Commits are streamed out of git and handed to the workers as they are parsed, so extraction and
+    model calls overlap. The first one is pulled eagerly so git failures surface before anything is written.
+    """
+    commits = traced_iter("extract.commit", _guard_extraction(iter_git_history_configured(revision_range, working_directory, commit_strategy=commit_strategy, single_pass=single_pass, max_count=max_count, git_workers=git_workers)))
+    first = next(commits)
+    return itertools.chain([first], commits)
+
+
+def collect_release_inputs(shas: List[str], commit_summaries_by_sha: Dict[str, str], directories: Dict[str, str], group_by: str, working_directory: str) -> Tuple[List[str], Optional[List[str]]]:
+    """
+    :return: the commit summaries in log order rather than completion order, so the release prompts (and their
+             cache keys) are deterministic, and the tree reduce group of each
+    """
+    summarized = [sha for sha in shas if sha in commit_summaries_by_sha]
+    return [commit_summaries_by_sha[sha] for sha in summarized], resolve_commit_groups(group_by, summarized, directories, working_directory)
+
+
+def batch_output_path(shas: List[str], batch_out: Path, batch_output_override: Union[str, Path, None] = None) -> Path:
+    if batch_output_override is not None:
+        return Path(batch_output_override)
+    return batch_out / f"{shas[0]}-{shas[-1]}.md"
+
+
+def write_batch_summary(batch_summary: str, shas: List[str], batch_out: Path, batch_output_override: Union[str, Path, None] = None) -> None:
+    if batch_output_override is None:
+        batch_file = batch_output_path(shas, batch_out)
+        atomic_write_text(batch_file, batch_summary)
+        logger.info(f"Wrote batch summary to {batch_file}")
+    else:
+        try:
+            atomic_write_text(batch_output_override, batch_summary)
+            logger.info(f"Wrote batch summary to {batch_output_override}")
+        except Exception as e:
+            logger.error(f"Error writing batch file: {e}")
+            raise RuntimeError(f"Error writing batch file: {e}")
+
+
+def finish_run(output_dir: Path, incremental: bool, complete: bool, branch: Optional[str], head_sha: str, cache: Optional[SummaryCache]) -> None:
+    if incremental:
+        if complete:
+            write_watermark(output_dir, branch, head_sha)
+        else:
+            logger.warning(f"Some summaries failed, leaving the watermark for {branch} unchanged so the next run retries them")
+
+    if cache is not None:
+        cache.log_stats()
+
+
 def create_changelog(api_key: str, 
                      model: str, 
                      working_directory: str, 
@@ -119,61 +334,110 @@ def create_changelog(api_key: str,
                      disable_commit_writing: bool = False, 
                      disable_batch_writing: bool = False, 
                      batch_output_override: Union[str, Path, None] = None, 
-                     commit_strategy: bool = True):
-    try:
-        commits = get_git_history_configured(n_commits, working_directory, commit_strategy=commit_strategy)
-    except RuntimeError as e:
-        logger.error(f"Error fetching commits: {e}")
-        raise RuntimeError(f"Error fetching commits: {e}")
+                     commit_strategy: bool = True,
+                     single_pass: bool = True,
+                     cache_dir: Union[str, Path, None] = None,
+                     cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+                     revision_range: Optional[str] = None,
+                     incremental: bool = False,
+                     context_budget: int = DEFAULT_CONTEXT_BUDGET,
+                     fan_in: int = DEFAULT_FAN_IN,
+                     group_by: str = "time",
+                     git_workers: int = 1,
+                     dedup_threshold: Optional[float] = DEFAULT_DEDUP_THRESHOLD,
+                     stream: bool = True,
+                     resume_dir: Union[str, Path, None] = None) -> Optional[str]:
+    """
+    :return: the release changelog, None when it was not written, failed or there was nothing new to summarize
+    """
+    # Closes this run's git blob reader when done, so the daemon does not keep one per repository forever
+    with blob_reader_scope(working_directory):
+        cache = SummaryCache.shared(cache_dir, cache_max_bytes) if cache_dir is not None else None
+        journal = None
+        if resume_dir is not None:
+            run_range, journal = resume_run(Path(resume_dir), cache, model, commit_strategy)
+        else:
+            run_range = resolve_run_range(working_directory, output_dir, n_commits, commit_strategy, revision_range, incremental)
+            if run_range is None:
+                return
+        revision_range, max_count, head_sha, branch = run_range
+        commits = open_commit_stream(revision_range, working_directory, commit_strategy, single_pass, max_count, git_workers)
 
-    commits_out, batch_out = configure_output_dirs(output_dir, disable_commit_writing, disable_batch_writing)
+        commits_out, batch_out = configure_output_dirs(output_dir, disable_commit_writing, disable_batch_writing, incremental, resume_dir)
+        # The journal wraps the summary cache, so every summary below is also recorded in the run directory
+        cache = journal or start_run_journal(batch_out.parent, cache, run_range, model, commit_strategy)
+        reuse_written = incremental and commit_strategy and not disable_commit_writing
 
-    commit_summaries: List[str] = []
-    shas = list(commits.keys())
-    LLM_model = get_model(api_url=API_URL, api_key=api_key, model=model)
-    if concurrency:
-        if commit_strategy:
-            logger.warning(f"Running with concurrency: Max workers per commit: {max_workers_per_commit} & Max commit workers: {max_commit_workers}")
+        commit_summaries_by_sha: Dict[str, str] = {}
+        shas: List[str] = []
+        directories: Dict[str, str] = {}
+        LLM_model = get_model(api_url=API_URL, api_key=api_key, model=model)
+        if concurrency:
+            if commit_strategy:
+                logger.warning(f"Running with concurrency: Max workers per commit: {max_workers_per_commit} & Max commit workers: {max_commit_workers}")
+            else:
+                logger.warning(f"Running with concurrency: Max workers per batch: {max_workers_per_commit}")
+
+            # Bounds how many parsed commits may wait for a worker, which keeps peak memory at a few commits
+            in_flight = threading.BoundedSemaphore(max_commit_workers * 2)
+            with ContextThreadPoolExecutor(max_workers=max_commit_workers) as executor:
+                future_to_sha = {}
+                for sha, info in commits:
+                    shas.append(sha)
+                    directories[sha] = top_level_directory(info["files"])
+                    written = _load_written_commit_summary(commits_out, sha) if reuse_written else None
+                    if written is not None:
+                        commit_summaries_by_sha[sha] = written
+                        continue
+                    in_flight.acquire()
+                    future = executor.submit(create_commit_changelog, LLM_model, commits_out, info, sha, concurrency, max_workers_per_commit, disable_commit_writing, cache, context_budget, dedup_threshold, stream)
+                    future.add_done_callback(lambda _: in_flight.release())
+                    future_to_sha[future] = sha
+                for future in as_completed(future_to_sha):
+                    sha = future_to_sha[future]
+                    try:
+                        commit_summary = future.result()
+                        if commit_summary is not None:
+                            commit_summaries_by_sha[sha] = commit_summary
+                    except Exception as e:
+                        logger.error(f"Error creating commit summary for {sha}: {e}")
         else:
-            logger.warning(f"Running with concurrency: Max workers per batch: {max_workers_per_commit}")
+            for sha, info in commits:
+                shas.append(sha)
+                directories[sha] = top_level_directory(info["files"])
+                written = _load_written_commit_summary(commits_out, sha) if reuse_written else None
+                if written is not None:
+                    commit_summaries_by_sha[sha] = written
+                    continue
+                commit_summary = create_commit_changelog(LLM_model, commits_out, info, sha, disable_commit_writing=disable_commit_writing, cache=cache, context_budget=context_budget, dedup_threshold=dedup_threshold, stream=stream)
+                if commit_summary is not None:
+                    commit_summaries_by_sha[sha] = commit_summary
 
-        with ThreadPoolExecutor(max_workers=max_commit_workers) as executor:
-            future_to_sha = {
-                executor.submit(create_commit_changelog, LLM_model, commits_out, commits[sha], sha, concurrency, max_workers_per_commit, disable_commit_writing): sha
-                for sha in shas
-            }
-            for future in as_completed(future_to_sha):
-                sha = future_to_sha[future]
-                try:
-                    commit_summary = future.result()
-                    if commit_summary is not None:
-                        commit_summaries.append(commit_summary)
-                except Exception as e:
-                    logger.error(f"Error creating commit summary for {sha}: {e}")
-    else:
-        for sha in shas:
-            info = commits[sha]
-            commit_summary = create_commit_changelog(LLM_model, commits_out, info, sha, disable_commit_writing)
-            if commit_summary is not None:
-                commit_summaries.append(commit_summary)
+        commit_summaries, groups = collect_release_inputs(shas, commit_summaries_by_sha, directories, group_by, working_directory)
+        complete = len(commit_summaries) == len(shas)
 
-    if not disable_commit_writing or not commit_strategy:
-        logger.info(f"Wrote {len(shas)} per‑commit files to {commits_out}")
+        if not disable_commit_writing or not commit_strategy:
+            logger.info(f"Wrote {len(shas)} per‑commit files to {commits_out}")
 
-    if not disable_batch_writing:
-        first_sha, last_sha = shas[0], shas[-1]
-        batch_prompt = build_full_commit_batch_changelog_prompt(commit_summaries)
-        batch_summary = call_model(LLM_model, batch_prompt, max_tokens=8192)
-        if batch_output_override is None:
-            batch_file = batch_out / f"{first_sha}-{last_sha}.md"
-            batch_file.write_text(batch_summary)
-            logger.info(f"Wrote batch summary to {batch_file}")
+        batch_summary = None
+        if not disable_batch_writing:
+            reduce_workers = max_commit_workers * max_workers_per_commit if concurrency else 1
+
+            def summarize(prompts: List[str], max_tokens: int) -> List[Optional[str]]:
+                with ContextThreadPoolExecutor(max_workers=reduce_workers) as executor:
+                    return list(executor.map(lambda prompt: call_model(LLM_model, prompt, max_tokens=max_tokens, cache=cache, kind="batch"), prompts))
+
+            def finalize(prompt: str) -> Optional[str]:
+                # The release changelog is the long one, stream it into its output file as it is generated
+                return stream_model_to_file(LLM_model, prompt, batch_output_path(shas, batch_out, batch_output_override), max_tokens=RELEASE_MAX_TOKENS, cache=cache, kind="batch")
+
+            with span("reduce"):
+                batch_summary = tree_reduce(commit_summaries, summarize, fan_in, context_budget, groups, finalize if stream else None)
+            complete = complete and batch_summary is not None
+            if batch_summary is not None and not stream:
+                write_batch_summary(batch_summary, shas, batch_out, batch_output_override)
         else:
-            try:
-                Path(batch_output_override).write_text(batch_summary)
-                logger.info(f"Wrote batch summary to {batch_output_override}")
-            except Exception as e:
-                logger.error(f"Error writing batch file: {e}")
-                raise RuntimeError(f"Error writing batch file: {e}")
-    else:
-        logger.warning("Batch writing is disabled, skipping batch file creation and model call")
+            logger.warning("Batch writing is disabled, skipping batch file creation and model call")
+
+        finish_run(output_dir, incremental, complete, branch, head_sha, cache)
+        return batch_summary
\ No newline at end of file
@@ -0,0 +1,237 @@
+import asyncio
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+from cli_git_changelog.utils.logger import get_logger
+from cli_git_changelog.model_interface.model_interface import ModelInterface
+from cli_git_changelog.model_interface import get_model
+from cli_git_changelog.formatters.changelog_prompt_formatters import build_changelog_prompt
+from cli_git_changelog.summary_cache import SummaryCache, DEFAULT_CACHE_MAX_BYTES
+from cli_git_changelog.formatters.prompt_packer import DEFAULT_CONTEXT_BUDGET
+from cli_git_changelog.formatters.diff_dedup import DEFAULT_DEDUP_THRESHOLD
+from cli_git_changelog.tree_reduce import atree_reduce, top_level_directory, DEFAULT_FAN_IN, RELEASE_MAX_TOKENS
+from cli_git_changelog.utils.progressive_writer import ProgressiveFileWriter
+from cli_git_changelog.utils.atomic_write import atomic_write_text
+from cli_git_changelog.utils.tracing import count, record_span, span, traced
+from cli_git_changelog.generate_changelog import (
+    API_URL,
+    batch_output_path,
+    build_file_change_prompts,
+    collect_release_inputs,
+    configure_output_dirs,
+    finish_run,
+    open_commit_stream,
+    resolve_run_range,
+    resume_run,
+    start_run_journal,
+    write_batch_summary,
+    _load_written_commit_summary,
+)
+
+
+logger = get_logger(__name__)
+
+
+async def acall_model(
+    model: ModelInterface,
+    prompt: str,
+    semaphore: asyncio.Semaphore,
+    max_tokens: int = 4096,
+    temperature: float = 0.5,
+    cache: Optional[SummaryCache] = None,
+    kind: str = "file",
+) -> Optional[str]:
+    key = None
+    if cache is not None:
+        key = SummaryCache.make_key(getattr(model, "model", type(model).__name__), prompt, max_tokens, temperature)
+        # The cache reads files and the run journal fsyncs its appends, keep both off the event loop
+        cached = await asyncio.to_thread(cache.get, kind, key)
+        if cached is not None:
+            count("summaries", kind=kind, source="cache")
+            return cached
+    try:
+        waiting = time.perf_counter()
+        async with semaphore:
+            record_span("asyncio.semaphore_wait", waiting, time.perf_counter() - waiting)
+            with span(f"summary.{kind}"):
+                res = await model.acall_model(prompt=prompt, max_tokens=max_tokens, temperature=temperature)
+        if res is None:
+            raise RuntimeError("The model returned no summary")
+        count("summaries", kind=kind, source="model")
+        if cache is not None:
+            await asyncio.to_thread(cache.put, kind, key, res)
+        return res
+    except Exception as e:
+        count("summary_failures", kind=kind)
+        logger.error(f"Failed to get {kind} summary of a {len(prompt)} character prompt: {e}")
+        return None
+
+
+async def astream_model_to_file(
+    model: ModelInterface,
+    prompt: str,
+    path: Path,
+    semaphore: asyncio.Semaphore,
+    max_tokens: int = 4096,
+    temperature: float = 0.5,
+    cache: Optional[SummaryCache] = None,
+    kind: str = "commit",
+) -> Optional[str]:
+    """asyncio counterpart of `stream_model_to_file`."""
+    key = None
+    if cache is not None:
+        key = SummaryCache.make_key(getattr(model, "model", type(model).__name__), prompt, max_tokens, temperature)
+    cached = await asyncio.to_thread(cache.get, kind, key) if cache is not None else None
+    if cached is not None or not hasattr(model, "astream_model"):
+        if cached is not None:
+            count("summaries", kind=kind, source="cache")
+        res = cached if cached is not None else await acall_model(model, prompt, semaphore, max_tokens, temperature, cache, kind)
+        if res is not None:
+            atomic_write_text(path, res)
+            logger.info(f"Wrote {path}")
+        return res
+    writer = ProgressiveFileWriter(path)
+    try:
+        waiting = time.perf_counter()
+        async with semaphore:
+            record_span("asyncio.semaphore_wait", waiting, time.perf_counter() - waiting)
+            with span(f"summary.{kind}", stream=True):
+                res = await model.astream_model(prompt, writer.write, temperature=temperature, max_tokens=max_tokens, on_restart=writer.restart)
+        if res is None:
+            raise RuntimeError("The model returned no summary")
+        writer.commit(res)
+        logger.info(f"Wrote {path}")
+        count("summaries", kind=kind, source="model")
+        if cache is not None:
+            await asyncio.to_thread(cache.put, kind, key, res)
+        return res
+    except Exception as e:
+        count("summary_failures", kind=kind)
+        logger.error(f"Failed to get {kind} summary of a {len(prompt)} character prompt: {e}")
+        return None
+    finally:
+        writer.close()
+
+
+@traced("commit")
+async def acreate_commit_changelog(LLM_model: ModelInterface, commits_out: Union[str, Path], info: dict, sha: str, semaphore: asyncio.Semaphore, disable_commit_writing: bool = False, cache: Optional[SummaryCache] = None, context_budget: int = DEFAULT_CONTEXT_BUDGET, dedup_threshold: Optional[float] = DEFAULT_DEDUP_THRESHOLD, stream: bool = True) -> Optional[str]:
+    # Building prompts may read pre-images from git, keep that off the event loop
+    file_prompts = await asyncio.to_thread(build_file_change_prompts, info, context_budget, dedup_threshold)
+
+    summaries = await asyncio.gather(*(acall_model(LLM_model, prompt, semaphore, cache=cache) for _, prompt in file_prompts))
+    file_summaries: Dict[str, str] = {}
+    for (label, _), summary in zip(file_prompts, summaries):
+        if summary is not None:
+            file_summaries[label] = summary
+            logger.info(f"Summarized {label} in {len(summary)} characters")
+
+    commit_prompt = build_changelog_prompt(file_summaries, info.get("renames"), info.get("copies"))
+    if stream and not disable_commit_writing:
+        return await astream_model_to_file(LLM_model, commit_prompt, commits_out / f"{sha}.md", semaphore, cache=cache, kind="commit")
+    commit_summary = await acall_model(LLM_model, commit_prompt, semaphore, cache=cache, kind="commit")
+    if commit_summary is not None:
+        if not disable_commit_writing:
+            atomic_write_text(commits_out / f"{sha}.md", commit_summary)
+            logger.info(f"Wrote {sha} to {commits_out / f'{sha}.md'}")
+        return commit_summary
+
+    return None
+
+
+async def acreate_changelog(api_key: str,
+                            model: str,
+                            working_directory: str,
+                            output_dir: Path,
+                            n_commits: int,
+                            max_in_flight: int = 64,
+                            disable_commit_writing: bool = False,
+                            disable_batch_writing: bool = False,
+                            batch_output_override: Union[str, Path, None] = None,
+                            commit_strategy: bool = True,
+                            single_pass: bool = True,
+                            cache_dir: Union[str, Path, None] = None,
+                            cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+                            revision_range: Optional[str] = None,
+                            incremental: bool = False,
+                            context_budget: int = DEFAULT_CONTEXT_BUDGET,
+                            fan_in: int = DEFAULT_FAN_IN,
+                            group_by: str = "time",
+                            git_workers: int = 1,
+                            dedup_threshold: Optional[float] = DEFAULT_DEDUP_THRESHOLD,
+                            stream: bool = True,
+                            resume_dir: Union[str, Path, None] = None):
+    """
+    asyncio implementation of `create_changelog`. Every file, commit and batch request runs as a task on
+    one event loop, and a single semaphore caps how many of them are in flight at once.
+    """
+    cache = SummaryCache.shared(cache_dir, cache_max_bytes) if cache_dir is not None else None
+    journal = None
+    if resume_dir is not None:
+        run_range, journal = resume_run(Path(resume_dir), cache, model, commit_strategy)
+    else:
+        run_range = await asyncio.to_thread(resolve_run_range, working_directory, output_dir, n_commits, commit_strategy, revision_range, incremental)
+        if run_range is None:
+            return
+    revision_range, max_count, head_sha, branch = run_range
+    commits = await asyncio.to_thread(open_commit_stream, revision_range, working_directory, commit_strategy, single_pass, max_count, git_workers)
+
+    commits_out, batch_out = configure_output_dirs(output_dir, disable_commit_writing, disable_batch_writing, incremental, resume_dir)
+    # The journal wraps the summary cache, so every summary below is also recorded in the run directory
+    cache = journal or start_run_journal(batch_out.parent, cache, run_range, model, commit_strategy)
+    reuse_written = incremental and commit_strategy and not disable_commit_writing
+
+    LLM_model = get_model(api_url=API_URL, api_key=api_key, model=model)
+    logger.warning(f"Running on asyncio with at most {max_in_flight} requests in flight")
+
+    semaphore = asyncio.Semaphore(max_in_flight)
+    # Bounds how many parsed commits may wait on the request semaphore, which keeps peak memory bounded
+    pending_commits = asyncio.Semaphore(max_in_flight)
+    commit_summaries_by_sha: Dict[str, str] = {}
+    tasks: Dict[str, asyncio.Task] = {}
+    shas: List[str] = []
+    directories: Dict[str, str] = {}
+    while True:
+        item = await asyncio.to_thread(next, commits, None)
+        if item is None:
+            break
+        sha, info = item
+        shas.append(sha)
+        directories[sha] = top_level_directory(info["files"])
+        written = _load_written_commit_summary(commits_out, sha) if reuse_written else None
+        if written is not None:
+            commit_summaries_by_sha[sha] = written
+            continue
+        await pending_commits.acquire()
+        task = asyncio.create_task(acreate_commit_changelog(LLM_model, commits_out, info, sha, semaphore, disable_commit_writing, cache, context_budget, dedup_threshold, stream))
+        task.add_done_callback(lambda _: pending_commits.release())
+        tasks[sha] = task
+
+    results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+    for sha, result in zip(tasks.keys(), results):
+        if isinstance(result, BaseException):
+            logger.error(f"Error creating commit summary for {sha}: {result}")
+        elif result is not None:
+            commit_summaries_by_sha[sha] = result
+
+    commit_summaries, groups = await asyncio.to_thread(collect_release_inputs, shas, commit_summaries_by_sha, directories, group_by, working_directory)
+    complete = len(commit_summaries) == len(shas)
+
+    if not disable_commit_writing or not commit_strategy:
+        logger.info(f"Wrote {len(shas)} per‑commit files to {commits_out}")
+
+    if not disable_batch_writing:
+        async def summarize(prompts: List[str], max_tokens: int) -> List[Optional[str]]:
+            return list(await asyncio.gather(*(acall_model(LLM_model, prompt, semaphore, max_tokens=max_tokens, cache=cache, kind="batch") for prompt in prompts)))
+
+        async def finalize(prompt: str) -> Optional[str]:
+            return await astream_model_to_file(LLM_model, prompt, batch_output_path(shas, batch_out, batch_output_override), semaphore, max_tokens=RELEASE_MAX_TOKENS, cache=cache, kind="batch")
+
+        with span("reduce"):
+            batch_summary = await atree_reduce(commit_summaries, summarize, fan_in, context_budget, groups, finalize if stream else None)
+        complete = complete and batch_summary is not None
+        if batch_summary is not None and not stream:
+            write_batch_summary(batch_summary, shas, batch_out, batch_output_override)
+    else:
+        logger.warning("Batch writing is disabled, skipping batch file creation and model call")
+
+    finish_run(output_dir, incremental, complete, branch, head_sha, cache)
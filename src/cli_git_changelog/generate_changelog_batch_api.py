@@ -0,0 +1,195 @@
+import itertools
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+from cli_git_changelog.utils.logger import get_logger
+from cli_git_changelog.model_interface.model_interface import ModelInterface
+from cli_git_changelog.model_interface import get_model
+from cli_git_changelog.formatters.changelog_prompt_formatters import build_changelog_prompt
+from cli_git_changelog.summary_cache import SummaryCache, DEFAULT_CACHE_MAX_BYTES
+from cli_git_changelog.batch_checkpoint import BatchCheckpoint
+from cli_git_changelog.utils.atomic_write import atomic_write_text
+from cli_git_changelog.formatters.prompt_packer import DEFAULT_CONTEXT_BUDGET
+from cli_git_changelog.formatters.diff_dedup import DEFAULT_DEDUP_THRESHOLD
+from cli_git_changelog.tree_reduce import tree_reduce, top_level_directory, DEFAULT_FAN_IN
+from cli_git_changelog.generate_changelog import (
+    API_URL,
+    build_file_change_prompts,
+    collect_release_inputs,
+    configure_output_dirs,
+    finish_run,
+    open_commit_stream,
+    resolve_run_range,
+    write_batch_summary,
+    _load_written_commit_summary,
+)
+
+
+logger = get_logger(__name__)
+
+
+DEFAULT_POLL_INTERVAL = 30.0
+
+
+def run_batch_round(LLM_model: ModelInterface,
+                    checkpoint: BatchCheckpoint,
+                    name: str,
+                    prompts: Dict[str, str],
+                    max_tokens: int = 4096,
+                    temperature: float = 0.5,
+                    cache: Optional[SummaryCache] = None,
+                    poll_interval: float = DEFAULT_POLL_INTERVAL,
+                    kind: Optional[str] = None) -> Dict[str, str]:
+    """
+    Summarize `prompts` (keyed by request custom id) through the Message Batches API. Batches submitted by an
+    earlier, interrupted run are polled rather than resubmitted; prompts that failed in a finished batch are
+    resubmitted once per run.
+    :param name: checkpoint round the batches are recorded under
+    :param kind: summary cache kind, defaults to `name`
+    :return: the summaries that succeeded, keyed by custom id
+    """
+    kind = kind or name
+    results = checkpoint.results(name)
+    pending = checkpoint.pending(name)
+    model_name = getattr(LLM_model, "model", type(LLM_model).__name__)
+    keys = {cid: SummaryCache.make_key(model_name, prompt, max_tokens, temperature) for cid, prompt in prompts.items()} if cache is not None else {}
+    for cid, key in keys.items():
+        if cid not in results:
+            cached = cache.get(kind, key)
+            if cached is not None:
+                results[cid] = cached
+
+    submitted = False
+    while True:
+        while pending:
+            for batch_id in list(pending):
+                if not LLM_model.batch_ended(batch_id):
+                    continue
+                for cid, text in LLM_model.batch_results(batch_id).items():
+                    if text is None:
+                        continue
+                    results[cid] = text
+                    if cid in keys:
+                        cache.put(kind, keys[cid], text)
+                pending.remove(batch_id)
+                checkpoint.save()
+            if pending:
+                time.sleep(poll_interval)
+        todo = {cid: prompt for cid, prompt in prompts.items() if cid not in results}
+        if not todo or submitted:
+            break
+        logger.info(f"Submitting {len(todo)} {name} prompts as message batches")
+        pending.extend(LLM_model.submit_batch(todo, temperature=temperature, max_tokens=max_tokens))
+        submitted = True
+        checkpoint.save()
+
+    missing = [cid for cid in prompts if cid not in results]
+    if missing:
+        logger.error(f"{len(missing)} {name} prompts did not get a summary: {missing[:10]}")
+    return {cid: results[cid] for cid in prompts if cid in results}
+
+
+def create_changelog_batch_api(api_key: str,
+                               model: str,
+                               working_directory: str,
+                               output_dir: Path,
+                               n_commits: int,
+                               disable_commit_writing: bool = False,
+                               disable_batch_writing: bool = False,
+                               batch_output_override: Union[str, Path, None] = None,
+                               commit_strategy: bool = True,
+                               single_pass: bool = True,
+                               cache_dir: Union[str, Path, None] = None,
+                               cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+                               revision_range: Optional[str] = None,
+                               incremental: bool = False,
+                               poll_interval: float = DEFAULT_POLL_INTERVAL,
+                               context_budget: int = DEFAULT_CONTEXT_BUDGET,
+                               fan_in: int = DEFAULT_FAN_IN,
+                               group_by: str = "time",
+                               git_workers: int = 1,
+                               dedup_threshold: Optional[float] = DEFAULT_DEDUP_THRESHOLD):
+    """
+    Message Batches implementation of `create_changelog` for large backfills, where cost and rate limit headroom
+    matter more than latency. Every file prompt of every commit goes out as one round of batches, then every
+    commit prompt, then the release prompt. Progress is checkpointed in the output directory, so rerunning the
+    same command after an interruption resumes the job.
+    """
+    run_range = resolve_run_range(working_directory, output_dir, n_commits, commit_strategy, revision_range, incremental)
+    if run_range is None:
+        return
+    revision_range, max_count, head_sha, branch = run_range
+    commits = open_commit_stream(revision_range, working_directory, commit_strategy, single_pass, max_count, git_workers)
+
+    commits_out, batch_out = configure_output_dirs(output_dir, disable_commit_writing, disable_batch_writing, incremental)
+    reuse_written = incremental and commit_strategy and not disable_commit_writing
+
+    LLM_model = get_model(api_url=API_URL, api_key=api_key, model=model)
+    if not hasattr(LLM_model, "submit_batch"):
+        logger.error(f"Model {model} does not support the Message Batches API")
+        raise RuntimeError(f"Model {model} does not support the Message Batches API")
+    cache = SummaryCache(cache_dir, cache_max_bytes) if cache_dir is not None else None
+    checkpoint = BatchCheckpoint(output_dir, {"range": revision_range, "head": head_sha, "max_count": str(max_count), "model": model})
+
+    # Custom ids are positional (c<commit>-f<prompt>) because batch keys like A..B are not valid ids
+    commit_summaries_by_sha: Dict[str, str] = {}
+    shas: List[str] = []
+    file_prompts: Dict[str, str] = {}
+    file_requests_by_sha: Dict[str, List[Tuple[str, str]]] = {}
+    commit_ids: Dict[str, str] = {}
+    moves_by_sha: Dict[str, Tuple[Optional[Dict[str, str]], Optional[Dict[str, str]]]] = {}
+    directories: Dict[str, str] = {}
+    for commit_idx, (sha, info) in enumerate(commits):
+        shas.append(sha)
+        directories[sha] = top_level_directory(info["files"])
+        written = _load_written_commit_summary(commits_out, sha) if reuse_written else None
+        if written is not None:
+            commit_summaries_by_sha[sha] = written
+            continue
+        commit_ids[sha] = f"c{commit_idx}"
+        moves_by_sha[sha] = (info.get("renames"), info.get("copies"))
+        file_requests_by_sha[sha] = []
+        for idx, (label, prompt) in enumerate(build_file_change_prompts(info, context_budget, dedup_threshold)):
+            custom_id = f"c{commit_idx}-f{idx}"
+            file_prompts[custom_id] = prompt
+            file_requests_by_sha[sha].append((custom_id, label))
+
+    file_summaries = run_batch_round(LLM_model, checkpoint, "file", file_prompts, cache=cache, poll_interval=poll_interval)
+
+    commit_prompts: Dict[str, str] = {}
+    for sha, requests in file_requests_by_sha.items():
+        summaries = {label: file_summaries[cid] for cid, label in requests if cid in file_summaries}
+        commit_prompts[commit_ids[sha]] = build_changelog_prompt(summaries, *moves_by_sha[sha])
+    commit_results = run_batch_round(LLM_model, checkpoint, "commit", commit_prompts, cache=cache, poll_interval=poll_interval)
+    for sha, custom_id in commit_ids.items():
+        if custom_id not in commit_results:
+            continue
+        commit_summaries_by_sha[sha] = commit_results[custom_id]
+        if not disable_commit_writing:
+            atomic_write_text(commits_out / f"{sha}.md", commit_results[custom_id])
+            logger.info(f"Wrote {sha} to {commits_out / f'{sha}.md'}")
+
+    commit_summaries, groups = collect_release_inputs(shas, commit_summaries_by_sha, directories, group_by, working_directory)
+    complete = len(commit_summaries) == len(shas)
+
+    if not disable_batch_writing:
+        # Every level of the tree reduce is one more round of batches, checkpointed as batch-0, batch-1, ...
+        levels = itertools.count()
+
+        def summarize(prompts: List[str], max_tokens: int) -> List[Optional[str]]:
+            ids = [f"p{i}" for i in range(len(prompts))]
+            results = run_batch_round(LLM_model, checkpoint, f"batch-{next(levels)}", dict(zip(ids, prompts)), max_tokens=max_tokens, cache=cache, poll_interval=poll_interval, kind="batch")
+            return [results.get(custom_id) for custom_id in ids]
+
+        batch_summary = tree_reduce(commit_summaries, summarize, fan_in, context_budget, groups)
+        complete = complete and batch_summary is not None
+        if batch_summary is not None:
+            write_batch_summary(batch_summary, shas, batch_out, batch_output_override)
+    else:
+        logger.warning("Batch writing is disabled, skipping batch file creation and model call")
+
+    if complete:
+        checkpoint.clear()
+    else:
+        logger.warning(f"Some summaries failed, keeping {checkpoint.path} so a rerun retries only those")
+    finish_run(output_dir, incremental, complete, branch, head_sha, cache)
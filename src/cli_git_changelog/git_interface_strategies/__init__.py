@@ -1,72 +1,123 @@
 from pathlib import Path
-from typing import Dict
-from cli_git_changelog.git_interface_strategies.extract_git_commits_diff import get_git_commits_diff
-from cli_git_changelog.git_interface_strategies.extract_git_batch_diff import get_git_batch_diff
+from typing import Dict, Iterator, List, Optional, Tuple
+from cli_git_changelog.git_interface_strategies.extract_git_commits_diff import iter_git_commits_diff
+from cli_git_changelog.git_interface_strategies.extract_git_batch_diff import get_git_batch_diff, resolve_revision
+from cli_git_changelog.git_interface_strategies.extract_git_log_stream import iter_git_log_stream_diff
+from cli_git_changelog.git_interface_strategies.file_filter import FileFilter, is_generated_path
+from cli_git_changelog.git_interface_strategies.parallel_extraction import iter_git_commits_parallel
+from cli_git_changelog.git_interface_strategies.parsed_diff import ParsedDiff
 from cli_git_changelog.utils.logger import get_logger
-import functools
+from cli_git_changelog.utils.tracing import traced
 import subprocess
 
 
 logger = get_logger(__name__)
 
 
-METADATA_PREFIXES = ("diff --git", "index ", "@@ ", "+++ ", "--- ")
-REJECT_FILE_TYPES = (".png", ".jpg", ".jpeg", ".gif", ".svg", ".ico", ".webp", ".mp4", ".mp3", ".wav", ".ogg", ".webm", ".pdf", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx", ".json", ".txt")
+REJECT_FILE_TYPES = (".png", ".jpg", ".jpeg", ".gif", ".svg", ".ico", ".webp", ".mp4", ".mp3", ".wav", ".ogg", ".webm", ".pdf", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx", ".zip", ".gz", ".tar", ".jar", ".woff", ".woff2", ".ttf", ".eot", ".otf")
 
 
-def clean_diff(raw: str) -> str:
-    cleaned = []
-    for ln in raw.splitlines():
-        # keep the actual additions / deletions / context lines
-        if ln.startswith(METADATA_PREFIXES):
-            continue
-        # Git sometimes adds this sentinel line:
-        if ln == r"\ No newline at end of file":
-            continue
-        cleaned.append(ln)
-    return "\n".join(cleaned)
+def clean_diff(raw: str) -> ParsedDiff:
+    """
+    Strip the per-file header of a raw `git diff` section, keeping the hunk headers and the added / removed
+    lines. The result is parsed once, and its hunks and line counts are reused by sizing and prompt building.
+    """
+    return ParsedDiff.parse(raw)
 
 
 def reject_file_types(file_path: str) -> bool:
-    return Path(file_path).suffix.lower() in REJECT_FILE_TYPES
-
-
-def clamp_commits_to_branch_depth(func):
-    @functools.wraps(func)
-    def wrapper(n: int, working_directory: str, *args, **kwargs):
-        try:
-            total_commits = int(subprocess.check_output(
-                ["git", "rev-list", "--count", "HEAD"],
-                cwd=working_directory
-            ).decode().strip())
-            if n > total_commits - (0 if kwargs.get("commit_strategy", False) else 1):
-                logger.warn(
-                    f"Requested {n} commits, but branch only has {total_commits}. "
-                    f"Reducing to {total_commits}."
-                )
-
-                commit_strategy = kwargs.get("commit_strategy", False)
-
-                if not commit_strategy:
-                    logger.warn("Since you are not using the batch strategy, manually clamping to the branch depth - 1")
-                    n = total_commits - 1
-                else:
-                    n = total_commits
-
-        except subprocess.CalledProcessError:
-            logger.error("Failed to count commits — are you in a Git repo?")
-            raise
-
-        return func(n, working_directory, *args, **kwargs)
-
-    return wrapper
-
-
-@clamp_commits_to_branch_depth
-def get_git_history_configured(n: int, working_directory: str, *, commit_strategy: bool = False) -> Dict[str, Dict[str, dict]]:
+    """
+    Cheap path-only check run before anything else: media and document types, lockfiles, minified bundles and
+    vendored directories. Binary, generated and oversized files are caught by the `FileFilter` stage.
+    """
+    return Path(file_path).suffix.lower() in REJECT_FILE_TYPES or is_generated_path(file_path)
+
+
+@traced("git.rev-list")
+def count_commits_in_range(revision_range: str, working_directory: str) -> int:
+    try:
+        return int(subprocess.check_output(
+            ["git", "rev-list", "--count", revision_range],
+            cwd=working_directory,
+            stderr=subprocess.DEVNULL,
+        ).decode().strip())
+    except subprocess.CalledProcessError:
+        logger.error(f"Failed to count commits in {revision_range} — are you in a Git repo?")
+        raise RuntimeError(f"Failed to count commits in {revision_range} — are you in a Git repo?")
+
+
+@traced("git.log")
+def get_commit_authors(shas: List[str], working_directory: str) -> Dict[str, str]:
+    """
+    Author name of every commit in `shas`, read with a single `git log --no-walk` call.
+    """
+    if not shas:
+        return {}
+    try:
+        out = subprocess.run(
+            ["git", "log", "--no-walk=unsorted", "--stdin", "--format=%H%x00%an"],
+            cwd=working_directory,
+            input="\n".join(shas) + "\n",
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    except subprocess.CalledProcessError as e:
+        logger.error(f"Failed to read commit authors: {e.stderr.strip()}")
+        raise RuntimeError(f"Failed to read commit authors: {e.stderr.strip()}")
+    return dict(line.split("\0", 1) for line in out.splitlines() if "\0" in line)
+
+
+def clamp_commits_to_branch_depth(n: int, working_directory: str, commit_strategy: bool = False) -> int:
+    total_commits = count_commits_in_range("HEAD", working_directory)
+    if n > total_commits - (0 if commit_strategy else 1):
+        logger.warn(
+            f"Requested {n} commits, but branch only has {total_commits}. "
+            f"Reducing to {total_commits}."
+        )
+        if not commit_strategy:
+            logger.warn("Since you are not using the batch strategy, manually clamping to the branch depth - 1")
+            n = total_commits - 1
+        else:
+            n = total_commits
+    return n
+
+
+def revision_range_for_last_n(n: int, working_directory: str, commit_strategy: bool = False) -> Tuple[str, Optional[int]]:
+    """
+    Translate `-n/--commits` into a revision range pinned to the current HEAD commit.
+    :return: (revision_range, max_count) - the commit strategy walks the last n commits of HEAD's history,
+             the batch strategy diffs HEAD~n..HEAD
+    """
+    n = clamp_commits_to_branch_depth(n, working_directory, commit_strategy)
+    head = resolve_revision("HEAD", working_directory)
     if commit_strategy:
-        logger.info("Using commit strategy")
-        return get_git_commits_diff(n, working_directory, clean_diff, reject_file_types)
+        return head, n
+    return f"{head}~{n}..{head}", None
+
+
+def iter_git_history_configured(revision_range: str, working_directory: str, *, commit_strategy: bool = False, single_pass: bool = True, max_count: Optional[int] = None, git_workers: int = 1) -> Iterator[Tuple[str, dict]]:
+    """
+    Yield (key, {"desc", "files"}) pairs as soon as each one has been extracted. File pre-images are lazy
+    and only read from git when something converts them with str().
+    :param revision_range: any revision range git log understands, e.g. `v1.2.0..HEAD`
+    :param max_count: optional cap on the number of commits walked (commit strategy only)
+    :param git_workers: extract commits on this many worker processes (commit strategy only)
+    """
+    file_filter = FileFilter(working_directory)
+    if commit_strategy:
+        if git_workers > 1:
+            logger.info(f"Using commit strategy ({'git log stream' if single_pass else 'per-file git calls'} on {git_workers} workers) over {revision_range}")
+            return iter_git_commits_parallel(revision_range, working_directory, clean_diff, reject_file_types, max_count, git_workers, single_pass, file_filter)
+        if single_pass:
+            logger.info(f"Using commit strategy (single-pass git log stream) over {revision_range}")
+            return iter_git_log_stream_diff(revision_range, working_directory, clean_diff, reject_file_types, max_count, file_filter=file_filter)
+        logger.info(f"Using commit strategy (per-file git calls) over {revision_range}")
+        return iter_git_commits_diff(revision_range, working_directory, clean_diff, reject_file_types, max_count, file_filter=file_filter)
     else:
-        logger.info("Using batch strategy")
-        return get_git_batch_diff(n, working_directory, clean_diff, reject_file_types)
+        logger.info(f"Using batch strategy over {revision_range}")
+        return iter(get_git_batch_diff(revision_range, working_directory, clean_diff, reject_file_types, file_filter).items())
+
+
+def get_git_history_configured(revision_range: str, working_directory: str, *, commit_strategy: bool = False, single_pass: bool = True, max_count: Optional[int] = None, git_workers: int = 1) -> Dict[str, Dict[str, dict]]:
+    return dict(iter_git_history_configured(revision_range, working_directory, commit_strategy=commit_strategy, single_pass=single_pass, max_count=max_count, git_workers=git_workers))
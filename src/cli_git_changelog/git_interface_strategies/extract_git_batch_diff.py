@@ -1,77 +1,115 @@
 import subprocess
-from typing import Dict, Callable
+from typing import Dict, Callable, Optional, Tuple
+from cli_git_changelog.git_interface_strategies.file_filter import FileFilter, list_changed_files, record_move
+from cli_git_changelog.git_interface_strategies.git_blob_reader import LazyBlob
 from cli_git_changelog.utils.logger import get_logger
+from cli_git_changelog.utils.tracing import span, traced
 
 
 logger = get_logger(__name__)
 
 
-def get_git_batch_diff(n: int, working_directory: str, clean_protocol: Callable[[str],str], reject_file_types: Callable[[str],bool]) -> Dict[str, Dict[str, dict]]:
+@traced("git.rev-parse")
+def resolve_revision(revision: str, working_directory: str) -> str:
+    """Resolve any revision (branch, tag, `HEAD~3`, ...) to a full commit SHA."""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--verify", f"{revision}^{{commit}}"],
+            cwd=working_directory,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except subprocess.CalledProcessError:
+        logger.error(f"Failed to resolve revision {revision} — are you in a Git repo?")
+        raise RuntimeError(f"Failed to resolve revision {revision} — are you in a Git repo?")
+
+
+@traced("git.merge-base")
+def split_revision_range(revision_range: str, working_directory: str) -> Tuple[str, str]:
+    """
+    Resolve `base..tip` (or `base...tip`, diffed from the merge base) into the two commit SHAs the batch diff spans.
+    """
+    if "..." in revision_range:
+        left, right = revision_range.split("...", 1)
+        tip = resolve_revision(right or "HEAD", working_directory)
+        try:
+            base = subprocess.check_output(
+                ["git", "merge-base", left or "HEAD", tip],
+                cwd=working_directory,
+                stderr=subprocess.DEVNULL,
+                text=True,
+            ).strip()
+        except subprocess.CalledProcessError:
+            logger.error(f"No merge base for {revision_range}.")
+            raise RuntimeError(f"No merge base for {revision_range}.")
+        return base, tip
+    if ".." in revision_range:
+        left, right = revision_range.split("..", 1)
+        return resolve_revision(left or "HEAD", working_directory), resolve_revision(right or "HEAD", working_directory)
+    logger.error(f"The batch strategy needs a range of the form base..tip, got {revision_range}")
+    raise RuntimeError(f"The batch strategy needs a range of the form base..tip, got {revision_range}")
+
+
+def get_git_batch_diff(revision_range: str, working_directory: str, clean_protocol: Callable[[str],str], reject_file_types: Callable[[str],bool], file_filter: Optional[FileFilter] = None) -> Dict[str, Dict[str, dict]]:
     """
-    Return a single entry keyed by the diff‑range (e.g. 'HEAD~3..HEAD') containing:
+    Return a single entry keyed by the resolved diff‑range (e.g. '<base_sha>..<tip_sha>') containing:
       - 'desc': concatenated commit subjects in the range
-      - 'files': {file_path: (old_content_from_HEAD~n, cleaned_diff)}
+      - 'files': {file_path: (old_content_from_base, cleaned_diff)}
+      - 'renames' / 'copies': {new_path: old_path} of files moved without edits, when there are any
+    Files rejected by `file_filter` (binary, generated, oversized) are dropped before they are diffed.
     """
-    range_spec = f"HEAD~{n}..HEAD"
+    # Pin both ends so lazily read pre-images stay correct if HEAD moves mid-run
+    base_sha, tip_sha = split_revision_range(revision_range, working_directory)
+    range_spec = f"{base_sha}..{tip_sha}"
     commits: Dict[str, Dict[str, dict]] = {range_spec: {"desc": "", "files": {}}}
 
     # Collect subjects for all commits in the range
     try:
-        subjects = subprocess.check_output(
-            ["git", "log", "--pretty=%s", range_spec],
-            cwd=working_directory,
-            stderr=subprocess.DEVNULL,
-            text=True,
-        ).strip().splitlines()
+        with span("git.log"):
+            subjects = subprocess.check_output(
+                ["git", "log", "--pretty=%s", range_spec],
+                cwd=working_directory,
+                stderr=subprocess.DEVNULL,
+                text=True,
+            ).strip().splitlines()
         commits[range_spec]["desc"] = "\n".join(subjects) if subjects else "(no commit messages)"
     except subprocess.CalledProcessError:
         logger.error("Failed to retrieve commit messages; are you in a git repo?")
         raise RuntimeError("Failed to retrieve commit messages; are you in a git repo?")
 
-    # List affected files once for the whole range
-    try:
-        files = subprocess.check_output(
-            ["git", "diff", "--name-only", range_spec],
-            cwd=working_directory,
-            stderr=subprocess.DEVNULL,
-            text=True,
-        ).splitlines()
-    except subprocess.CalledProcessError:
-        logger.error("Failed to list files changed in the batch diff.")
-        raise RuntimeError("Failed to list files changed in the batch diff.")
+    # List affected files, with their blob OIDs and numstat, once for the whole range
+    changed = [f for f in list_changed_files(["diff", base_sha, tip_sha], working_directory) if not reject_file_types(f.path)]
+    for f in changed:
+        if f.pure_move:
+            record_move(commits[range_spec], f)
+    changed = [f for f in changed if not f.pure_move]
+    rejected = file_filter.reject(changed) if file_filter is not None else {}
 
-    for fpath in files:
-        if reject_file_types(fpath):
+    for f in changed:
+        fpath = f.path
+        if fpath in rejected:
             continue
 
-        # File content at the start of the range
-        try:
-            old_content = subprocess.check_output(
-                ["git", "show", f"HEAD~{n}:{fpath}"],
-                cwd=working_directory,
-                stderr=subprocess.DEVNULL,
-                text=True,
-            )
-        except subprocess.CalledProcessError:
-            old_content = ""
+        # File content at the start of the range, from the source path of a rename or copy
+        old_content = LazyBlob(working_directory, f"{base_sha}:{f.old_path or fpath}")
+        # An edited rename or copy is diffed blob to blob, against its source rather than as a whole new file
+        revisions = [f.old_oid, f.new_oid] if f.moved else [base_sha, tip_sha, "--", fpath]
 
         # Full diff for this file over the range
         try:
-            raw_diff = subprocess.check_output(
-                [
-                    "git", "diff", "--unified=0", "--no-prefix", "--color=never",
-                    f"HEAD~{n}", "HEAD", "--", fpath
-                ],
-                cwd=working_directory,
-                stderr=subprocess.DEVNULL,
-                text=True,
-            )
+            with span("git.diff"):
+                raw_diff = subprocess.check_output(
+                    ["git", "diff", "--unified=0", "--no-prefix", "--color=never"] + revisions,
+                    cwd=working_directory,
+                    stderr=subprocess.DEVNULL,
+                    text=True,
+                )
             diff = clean_protocol(raw_diff)
         except subprocess.CalledProcessError:
             diff = ""
 
         commits[range_spec]["files"][fpath] = (old_content, diff)
 
-    if not commits[range_spec]["files"]:
+    if not commits[range_spec]["files"] and not commits[range_spec].keys() & {"renames", "copies"}:
         raise RuntimeError("No changes found in the specified range.")
     return commits
\ No newline at end of file
@@ -1,74 +1,77 @@
 import subprocess
-from typing import Dict, Callable
+from typing import Dict, Callable, Iterator, List, Optional, Tuple
+from cli_git_changelog.git_interface_strategies.file_filter import FileFilter, list_changed_files, record_move
+from cli_git_changelog.git_interface_strategies.git_blob_reader import LazyBlob
 from cli_git_changelog.utils.logger import get_logger
+from cli_git_changelog.utils.tracing import span
 
 
 logger = get_logger(__name__)
 
 
-def get_git_commits_diff(n: int, working_directory: str, clean_protocol: Callable[[str],str], reject_file_types: Callable[[str],bool]) -> Dict[str, Dict[str, dict]]:
+def iter_git_commits_diff(revision_range: str, working_directory: str, clean_protocol: Callable[[str],str], reject_file_types: Callable[[str],bool], max_count: Optional[int] = None, shas: Optional[List[str]] = None, file_filter: Optional[FileFilter] = None) -> Iterator[Tuple[str, dict]]:
     """
-    :param n: Number of commits to get
-    :param working_directory: Path in which to run all git commands
-    :param clean_protocol: Function to clean the diff protocol
-    :param reject_file_types: Function to reject file types
-    :return: a dict mapping the last n commits to their message and file changes:
-    Dict[str (commit_hashes): Dict[str (file_paths): Tuple[str (old_content), str (diff)] && str (desc) : commit message]]:
+    Per-file extraction of the commits of a revision range, yielding each commit as soon as its files have been diffed.
+    Pre-images are LazyBlob placeholders that are only read when a prompt needs them.
+    :param shas: extract exactly these commits, in this order, instead of walking `revision_range`
+    :param file_filter: optional bulk filter dropping binary, generated and oversized files before they are diffed
+    :return: an iterator of (commit_hash, {"desc": commit message, "files": {file_path: (old_content, diff)}}), plus
+        "renames" / "copies" ({new_path: old_path}) for files moved without edits
     """
-    commits: Dict[str, Dict[str, dict]] = {}
     log_fmt = "--pretty=format:%H%x01%s"
 
     try:
-        raw = subprocess.check_output(
-            ["git", "log", f"-n{n}", log_fmt],
-            cwd=working_directory,
-            stderr=subprocess.DEVNULL,
-            text=True,
-        )
+        with span("git.log"):
+            if shas is not None:
+                raw = subprocess.check_output(
+                    ["git", "log", log_fmt, "--no-walk=unsorted", "--stdin", "--"],
+                    cwd=working_directory,
+                    input="\n".join(shas) + "\n",
+                    stderr=subprocess.DEVNULL,
+                    text=True,
+                )
+            else:
+                raw = subprocess.check_output(
+                    ["git", "log", log_fmt] + ([f"-n{max_count}"] if max_count is not None else []) + [revision_range, "--"],
+                    cwd=working_directory,
+                    stderr=subprocess.DEVNULL,
+                    text=True,
+                )
     except subprocess.CalledProcessError:
         logger.error("Failed to run git log; are you in a repo?")
         raise RuntimeError("Failed to run git log; are you in a repo?")
 
+    yielded = 0
     for line in raw.splitlines():
         if not line.strip():
             continue
         commit_hash, message = line.split("\x01", 1)
-        commits[commit_hash] = {"desc": message, "files": {}}
+        info = {"desc": message, "files": {}}
 
-        try:
-            files = subprocess.check_output(
-                ["git", "diff-tree", "--no-commit-id", "--name-only", "-r", commit_hash],
-                cwd=working_directory,
-                stderr=subprocess.DEVNULL,
-                text=True,
-            ).splitlines()
-        except subprocess.CalledProcessError:
-            files = []
+        changed = [f for f in list_changed_files(["diff-tree", "--no-commit-id", "-r", commit_hash], working_directory) if not reject_file_types(f.path)]
+        for f in changed:
+            if f.pure_move:
+                record_move(info, f)
+        changed = [f for f in changed if not f.pure_move]
+        rejected = file_filter.reject(changed) if file_filter is not None else {}
 
-        for fpath in files:
-            if reject_file_types(fpath):
+        for f in changed:
+            fpath = f.path
+            if fpath in rejected:
                 continue
 
-            try:
-                old_content = subprocess.check_output(
-                    ["git", "show", f"{commit_hash}^:{fpath}"],
-                    cwd=working_directory,
-                    stderr=subprocess.DEVNULL,
-                    text=True,
-                )
-            except subprocess.CalledProcessError:
-                old_content = ""
+            old_content = LazyBlob(working_directory, f"{commit_hash}^:{f.old_path or fpath}")
+            # An edited rename or copy is diffed blob to blob, against its source rather than as a whole new file
+            revisions = [f.old_oid, f.new_oid] if f.moved else [f"{commit_hash}^", commit_hash, "--", fpath]
 
             try:
-                raw_diff = subprocess.check_output(
-                    [
-                        "git", "diff", "--unified=0", "--no-prefix", "--color=never",
-                        f"{commit_hash}^", commit_hash, "--", fpath
-                    ],
-                    cwd=working_directory,
-                    stderr=subprocess.DEVNULL,
-                    text=True,
-                )
+                with span("git.diff"):
+                    raw_diff = subprocess.check_output(
+                        ["git", "diff", "--unified=0", "--no-prefix", "--color=never"] + revisions,
+                        cwd=working_directory,
+                        stderr=subprocess.DEVNULL,
+                        text=True,
+                    )
                 try:
                     diff = clean_protocol(raw_diff)
                 except Exception as e:
@@ -77,8 +80,23 @@ def get_git_commits_diff(n: int, working_directory: str, clean_protocol: Callabl
             except subprocess.CalledProcessError:
                 diff = ""
 
-            commits[commit_hash]["files"][fpath] = (old_content, diff)
+            info["files"][fpath] = (old_content, diff)
 
-    if not commits:
+        yielded += 1
+        yield commit_hash, info
+
+    if not yielded:
         raise RuntimeError("No commits found.")
-    return commits
\ No newline at end of file
+
+
+def get_git_commits_diff(revision_range: str, working_directory: str, clean_protocol: Callable[[str],str], reject_file_types: Callable[[str],bool], max_count: Optional[int] = None) -> Dict[str, Dict[str, dict]]:
+    """
+    :param revision_range: Revision range to walk, e.g. `v1.2.0..HEAD`
+    :param max_count: Optional cap on the number of commits to get
+    :param working_directory: Path in which to run all git commands
+    :param clean_protocol: Function to clean the diff protocol
+    :param reject_file_types: Function to reject file types
+    :return: a dict mapping the commits of the range to their message and file changes:
+    Dict[str (commit_hashes): Dict[str (file_paths): Tuple[str (old_content), str (diff)] && str (desc) : commit message]]:
+    """
+    return dict(iter_git_commits_diff(revision_range, working_directory, clean_protocol, reject_file_types, max_count))
@@ -0,0 +1,168 @@
+import subprocess
+from typing import Dict, Callable, Iterator, List, Optional, Set, Tuple
+from cli_git_changelog.git_interface_strategies.file_filter import RENAME_DETECTION, ChangedFile, FileFilter, pair_numstat, parse_numstat_line, parse_raw_line, record_move
+from cli_git_changelog.git_interface_strategies.git_blob_reader import LazyBlob, NULL_OID
+from cli_git_changelog.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+COMMIT_MARKER = "\x00"
+SUBJECT_SEPARATOR = "\x01"
+LOG_STREAM_FORMAT = "--format=%x00%H%x01%s"
+
+
+class _CommitStreamParser:
+    """
+    Incremental parser for the output of `git log --raw --numstat -p`. Lines are fed one at a time, and a finished
+    commit is returned as soon as the marker line of the next commit (or the end of the stream) is seen.
+    The file filter runs once per commit, on its raw and numstat entries, before its first diff section. Pure
+    renames and copies are kept as metadata entries of the commit rather than as file diffs.
+    """
+
+    def __init__(self, working_directory: str, clean_protocol: Callable[[str], str], reject_file_types: Callable[[str], bool], file_filter: Optional[FileFilter] = None) -> None:
+        self.working_directory = working_directory
+        self.clean_protocol = clean_protocol
+        self.reject_file_types = reject_file_types
+        self.file_filter = file_filter
+        self.sha: Optional[str] = None
+        self.info: dict = {}
+        self.entries: List[ChangedFile] = []
+        self.stats: List[ChangedFile] = []
+        self.rejected: Optional[Set[str]] = None
+        self.section: Optional[ChangedFile] = None
+        self.section_lines: List[str] = []
+
+    def _flush_section(self) -> None:
+        if self.section is None:
+            return
+        section, fpath = self.section, self.section.path
+        raw_diff = "\n".join(self.section_lines)
+        self.section, self.section_lines = None, []
+        if self.reject_file_types(fpath) or fpath in self.rejected:
+            return
+        if section.pure_move:
+            record_move(self.info, section)
+            return
+        try:
+            diff = self.clean_protocol(raw_diff)
+        except Exception as e:
+            logger.error(f"Failed to clean diff for {fpath}: {e}")
+            diff = raw_diff
+        old_content = "" if section.old_oid == NULL_OID else LazyBlob(self.working_directory, section.old_oid)
+        self.info["files"][fpath] = (old_content, diff)
+
+    def _finish_commit(self) -> Optional[Tuple[str, dict]]:
+        if self.sha is None:
+            return None
+        self._flush_section()
+        done = (self.sha, self.info)
+        self.sha, self.info, self.entries = None, {}, []
+        self.stats, self.rejected = [], None
+        return done
+
+    def _filter_commit(self) -> Set[str]:
+        self.entries = pair_numstat(self.entries, self.stats)
+        if self.file_filter is None:
+            return set()
+        return set(self.file_filter.reject([f for f in self.entries if not f.pure_move and not self.reject_file_types(f.path)]))
+
+    def feed(self, line: str) -> Optional[Tuple[str, dict]]:
+        if line.startswith(COMMIT_MARKER):
+            done = self._finish_commit()
+            sha, message = line[1:].split(SUBJECT_SEPARATOR, 1)
+            self.sha, self.info = sha, {"desc": message, "files": {}}
+            return done
+        if self.sha is None:
+            return None
+        if line.startswith("diff --git "):
+            self._flush_section()
+            if self.rejected is None:
+                self.rejected = self._filter_commit()
+            if self.entries:
+                self.section = self.entries.pop(0)
+            else:
+                logger.warn(f"Unpaired diff section in {self.sha}: {line}")
+            return None
+        if self.section is not None:
+            self.section_lines.append(line)
+        elif line.startswith(":"):
+            self.entries.append(parse_raw_line(line))
+        else:
+            stat = parse_numstat_line(line)
+            if stat is not None:
+                self.stats.append(stat)
+        return None
+
+    def close(self) -> Optional[Tuple[str, dict]]:
+        return self._finish_commit()
+
+
+def iter_git_log_stream_diff(revision_range: str, working_directory: str, clean_protocol: Callable[[str],str], reject_file_types: Callable[[str],bool], max_count: Optional[int] = None, shas: Optional[List[str]] = None, file_filter: Optional[FileFilter] = None) -> Iterator[Tuple[str, dict]]:
+    """
+    Stream the commits of a revision range out of a single `git log --raw -p --unified=0` process, yielding each
+    commit as soon as it has been parsed.
+    :param revision_range: Revision range to walk, e.g. `v1.2.0..HEAD`
+    :param max_count: Optional cap on the number of commits to get
+    :param working_directory: Path in which to run all git commands
+    :param clean_protocol: Function to clean the diff protocol
+    :param reject_file_types: Function to reject file types
+    :param shas: extract exactly these commits, in this order, instead of walking `revision_range`
+    :param file_filter: optional bulk filter dropping binary, generated and oversized files of each commit
+    :return: an iterator of (commit_hash, {"desc": commit message, "files": {file_path: (old_content, diff)}}),
+        where old_content is a LazyBlob that is only read when converted with str()
+    """
+    # log.showRoot=false leaves the root commit without files, as `diff-tree` without --root does in the per-file backend
+    cmd = [
+        "git", "-c", "core.quotePath=false", "-c", "log.showRoot=false", "log", LOG_STREAM_FORMAT,
+        "--raw", "--numstat", "--no-abbrev", "-p", "--unified=0", "--no-prefix", "--color=never", "--no-ext-diff",
+    ] + RENAME_DETECTION
+    if shas is not None:
+        cmd += ["--no-walk=unsorted", "--stdin", "--"]
+    else:
+        if max_count is not None:
+            cmd.append(f"-n{max_count}")
+        cmd += [revision_range, "--"]
+    proc = subprocess.Popen(
+        cmd,
+        cwd=working_directory,
+        stdin=subprocess.PIPE if shas is not None else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        errors="replace",
+    )
+    if shas is not None:
+        # git reads all of stdin before it writes anything, so this cannot deadlock against stdout
+        proc.stdin.write("\n".join(shas) + "\n")
+        proc.stdin.close()
+    parser = _CommitStreamParser(working_directory, clean_protocol, reject_file_types, file_filter)
+    yielded = 0
+    try:
+        for line in proc.stdout:
+            done = parser.feed(line.rstrip("\n"))
+            if done is not None:
+                yielded += 1
+                yield done
+        done = parser.close()
+        if done is not None:
+            yielded += 1
+            yield done
+    finally:
+        proc.stdout.close()
+        returncode = proc.wait()
+
+    if returncode != 0:
+        logger.error("Failed to run git log; are you in a repo?")
+        raise RuntimeError("Failed to run git log; are you in a repo?")
+    if not yielded:
+        raise RuntimeError("No commits found.")
+
+
+def get_git_log_stream_diff(revision_range: str, working_directory: str, clean_protocol: Callable[[str],str], reject_file_types: Callable[[str],bool], max_count: Optional[int] = None) -> Dict[str, Dict[str, dict]]:
+    """
+    Single-pass equivalent of `get_git_commits_diff`: every commit, file list and diff comes out of one git process.
+    :return: Dict[str (commit_hashes): Dict[str (file_paths): Tuple[str (old_content), str (diff)] && str (desc) : commit message]]
+    """
+    return dict(iter_git_log_stream_diff(revision_range, working_directory, clean_protocol, reject_file_types, max_count))
@@ -0,0 +1,203 @@
+import re
+import subprocess
+from fnmatch import fnmatch
+from pathlib import PurePosixPath
+from typing import Dict, List, NamedTuple, Optional
+from cli_git_changelog.git_interface_strategies.git_blob_reader import NULL_OID, get_blob_reader
+from cli_git_changelog.utils.logger import get_logger
+from cli_git_changelog.utils.tracing import traced
+
+
+logger = get_logger(__name__)
+
+
+# Files nobody writes by hand: their churn says nothing a changelog reader cares about
+GENERATED_FILE_PATTERNS = (
+    "*.lock", "package-lock.json", "npm-shrinkwrap.json", "pnpm-lock.yaml", "pnpm-lock.yml", "packages.lock.json",
+    "go.sum", "*.min.js", "*.min.mjs", "*.min.css", "*.map", "*_pb2.py", "*_pb2_grpc.py", "*.pb.go",
+)
+VENDORED_DIRECTORIES = ("node_modules", "vendor", "bower_components")
+MAX_CHANGED_LINES = 5_000          # numstat added + removed lines above which a diff is not summarized
+MAX_BLOB_BYTES = 1024 * 1024       # pre- or post-image size above which a file is not summarized
+FILTER_ATTRIBUTES = ("linguist-generated", "linguist-vendored", "diff")
+NUMSTAT_LINE = re.compile(r"^(\d+|-)\t(\d+|-)\t(.*)$")
+# Renames and copies (from files modified in the same diff) are paired up instead of listed as a delete and an add
+RENAME_DETECTION = ["-M", "-C"]
+
+
+def is_generated_path(file_path: str) -> bool:
+    """Lockfiles, minified bundles, generated code and anything inside a vendored dependency directory."""
+    path = PurePosixPath(file_path)
+    return any(fnmatch(path.name, pattern) for pattern in GENERATED_FILE_PATTERNS) or any(part in VENDORED_DIRECTORIES for part in path.parts[:-1])
+
+
+class ChangedFile(NamedTuple):
+    path: str
+    old_oid: str
+    new_oid: str
+    binary: bool = False
+    changed_lines: int = 0
+    status: str = ""
+    old_path: str = ""  # source path of a rename or copy
+
+    @property
+    def moved(self) -> bool:
+        return self.status[:1] in ("R", "C")
+
+    @property
+    def pure_move(self) -> bool:
+        """A rename or copy without edits: the blob is the same on both sides."""
+        return self.moved and self.old_oid == self.new_oid
+
+
+def parse_raw_line(line: str) -> ChangedFile:
+    """
+    Parse a `--raw` entry of the form ':old_mode new_mode old_oid new_oid status<TAB>path', where renames and
+    copies carry '<TAB>old_path<TAB>new_path' instead.
+    """
+    meta, paths = line[1:].split("\t", 1)
+    _, _, old_oid, new_oid, status = meta.split(" ", 4)
+    if status[:1] in ("R", "C") and "\t" in paths:
+        old_path, path = paths.split("\t", 1)
+        return ChangedFile(path, old_oid, new_oid, status=status, old_path=old_path)
+    return ChangedFile(paths, old_oid, new_oid, status=status)
+
+
+def with_numstat(file: ChangedFile, stat: Optional[ChangedFile]) -> ChangedFile:
+    return file._replace(binary=stat.binary, changed_lines=stat.changed_lines) if stat is not None else file
+
+
+def pair_numstat(files: List[ChangedFile], stats: List[ChangedFile]) -> List[ChangedFile]:
+    """
+    Attach numstat line counts to the raw entries of the same diff. git prints both in the same order; renames show
+    in numstat as 'old => new', so entries are paired by position and only fall back to the path otherwise.
+    """
+    if len(files) == len(stats):
+        return [with_numstat(f, stat) for f, stat in zip(files, stats)]
+    by_path = {stat.path: stat for stat in stats}
+    return [with_numstat(f, by_path.get(f.path)) for f in files]
+
+
+def record_move(info: dict, file: ChangedFile) -> None:
+    """Keep a pure rename or copy as one metadata entry of the commit instead of a file diff."""
+    info.setdefault("renames" if file.status.startswith("R") else "copies", {})[file.path] = file.old_path
+
+
+def parse_numstat_line(line: str) -> Optional[ChangedFile]:
+    """
+    Parse a `--numstat` line of the form 'added<TAB>removed<TAB>path', binary files show '-' for both counts.
+    :return: a ChangedFile carrying only the path and the line counts, or None for other lines
+    """
+    match = NUMSTAT_LINE.match(line)
+    if match is None:
+        return None
+    added, removed, path = match.groups()
+    if added == "-":
+        return ChangedFile(path, "", "", binary=True)
+    return ChangedFile(path, "", "", changed_lines=int(added) + int(removed))
+
+
+@traced("git.diff-tree")
+def list_changed_files(diff_args: List[str], working_directory: str) -> List[ChangedFile]:
+    """
+    Every file a diff touches with its blob OIDs and numstat, read from one rename and copy aware
+    `--raw --numstat` call.
+    :param diff_args: the diff command and its revisions, e.g. ["diff-tree", "--no-commit-id", "-r", sha]
+    """
+    try:
+        out = subprocess.check_output(
+            ["git", "-c", "core.quotePath=false"] + diff_args + RENAME_DETECTION + ["--raw", "--numstat", "--no-abbrev"],
+            cwd=working_directory,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            errors="replace",
+        )
+    except subprocess.CalledProcessError:
+        return []
+    raw: List[ChangedFile] = []
+    stats: List[ChangedFile] = []
+    for line in out.splitlines():
+        if line.startswith(":"):
+            raw.append(parse_raw_line(line))
+        else:
+            stat = parse_numstat_line(line)
+            if stat is not None:
+                stats.append(stat)
+    return pair_numstat(raw, stats)
+
+
+class FileFilter:
+    """
+    Bulk filter stage run over a commit's changed files before any diff is summarized or any blob is read:
+    numstat binary markers and line counts first, then `.gitattributes` (linguist-generated, linguist-vendored,
+    -diff / binary) with one `git check-attr` call for the paths not seen before, then blob sizes through the
+    run-wide `cat-file --batch-check` pipe. Holds no open processes, so it pickles into extraction workers.
+    """
+
+    def __init__(self, working_directory: str, max_changed_lines: int = MAX_CHANGED_LINES, max_blob_bytes: int = MAX_BLOB_BYTES) -> None:
+        self.working_directory = working_directory
+        self.max_changed_lines = max_changed_lines
+        self.max_blob_bytes = max_blob_bytes
+        self._attribute_verdicts: Dict[str, Optional[str]] = {}
+
+    @traced("git.check-attr")
+    def _load_attributes(self, paths: List[str]) -> None:
+        paths = [p for p in dict.fromkeys(paths) if p not in self._attribute_verdicts]
+        if not paths:
+            return
+        try:
+            out = subprocess.run(
+                ["git", "check-attr", "-z", "--stdin"] + list(FILTER_ATTRIBUTES),
+                cwd=self.working_directory,
+                input="\0".join(paths) + "\0",
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+        except subprocess.CalledProcessError as e:
+            logger.warn(f"Failed to read git attributes, keeping {len(paths)} files: {e.stderr.strip()}")
+            self._attribute_verdicts.update(dict.fromkeys(paths))
+            return
+        fields = out.split("\0")
+        for i in range(0, len(fields) - 2, 3):
+            path, attribute, value = fields[i:i + 3]
+            self._attribute_verdicts.setdefault(path, None)
+            if attribute == "diff" and value == "unset":
+                self._attribute_verdicts[path] = "marked -diff"
+            elif attribute != "diff" and value in ("set", "true"):
+                self._attribute_verdicts[path] = f"marked {attribute}"
+
+    def _too_large(self, file: ChangedFile) -> bool:
+        reader = get_blob_reader(self.working_directory)
+        for oid in (file.old_oid, file.new_oid):
+            if oid and oid != NULL_OID:
+                found = reader.resolve(oid)
+                if found is not None and found[2] > self.max_blob_bytes:
+                    return True
+        return False
+
+    def reject(self, files: List[ChangedFile]) -> Dict[str, str]:
+        """
+        :return: path -> reason for every file that should not be summarized
+        """
+        rejected: Dict[str, str] = {}
+        remaining: List[ChangedFile] = []
+        for file in files:
+            if file.binary:
+                rejected[file.path] = "binary"
+            elif file.changed_lines > self.max_changed_lines:
+                rejected[file.path] = f"{file.changed_lines} changed lines"
+            else:
+                remaining.append(file)
+
+        self._load_attributes([f.path for f in remaining])
+        for file in remaining:
+            verdict = self._attribute_verdicts.get(file.path)
+            if verdict is not None:
+                rejected[file.path] = verdict
+            elif self._too_large(file):
+                rejected[file.path] = f"larger than {self.max_blob_bytes} bytes"
+
+        for path, reason in rejected.items():
+            logger.debug(f"Skipping {path}: {reason}")
+        return rejected
@@ -0,0 +1,182 @@
+import atexit
+import subprocess
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+from cli_git_changelog.utils.logger import get_logger
+from cli_git_changelog.utils.tracing import traced
+
+
+logger = get_logger(__name__)
+
+
+NULL_OID = "0" * 40
+DEFAULT_MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class GitBlobReader:
+    """
+    Long-lived `git cat-file` pipes for a single repository. Object names (`rev:path` or raw OIDs) are
+    resolved with `--batch-check` first so that identical pre-images are only transferred once; their
+    contents come from `--batch` and are kept in a byte-bounded LRU keyed by blob OID.
+    """
+
+    def __init__(self, working_directory: str, max_cache_bytes: int = DEFAULT_MAX_CACHE_BYTES) -> None:
+        self.working_directory = working_directory
+        self.max_cache_bytes = max_cache_bytes
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._cache_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._check = self._spawn("--batch-check")
+        self._batch = self._spawn("--batch")
+
+    def _spawn(self, mode: str) -> subprocess.Popen:
+        try:
+            return subprocess.Popen(
+                ["git", "cat-file", mode],
+                cwd=self.working_directory,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError as e:
+            logger.error(f"Failed to start git cat-file {mode}: {e}")
+            raise RuntimeError(f"Failed to start git cat-file {mode}: {e}")
+
+    @staticmethod
+    @traced("git.cat-file")
+    def _request(proc: subprocess.Popen, name: str) -> Optional[Tuple[str, str, int]]:
+        proc.stdin.write(f"{name}\n".encode())
+        proc.stdin.flush()
+        header = proc.stdout.readline().decode().rstrip("\n")
+        if not header or header.endswith(" missing") or header.endswith(" ambiguous"):
+            return None
+        oid, obj_type, size = header.rsplit(" ", 2)
+        return oid, obj_type, int(size)
+
+    def _remember(self, oid: str, content: str) -> None:
+        self._cache[oid] = content
+        self._cache_bytes += len(content)
+        while self._cache_bytes > self.max_cache_bytes and len(self._cache) > 1:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= len(evicted)
+
+    def _read_locked(self, oid: str) -> str:
+        if oid in self._cache:
+            self.hits += 1
+            self._cache.move_to_end(oid)
+            return self._cache[oid]
+        self.misses += 1
+        found = self._request(self._batch, oid)
+        if found is None:
+            return ""
+        _, obj_type, size = found
+        data = self._batch.stdout.read(size)
+        self._batch.stdout.read(1)  # trailing LF after every object
+        content = data.decode("utf-8", errors="replace") if obj_type == "blob" else ""
+        self._remember(oid, content)
+        return content
+
+    def resolve(self, name: str) -> Optional[Tuple[str, str, int]]:
+        """
+        :param name: any object name git understands, e.g. `HEAD~3:src/app.py`
+        :return: (oid, type, size) or None when the object does not exist
+        """
+        with self._lock:
+            return self._request(self._check, name)
+
+    def read_oid(self, oid: str) -> str:
+        """Return the text of the blob with the given OID, or "" for the null OID / missing objects."""
+        if not oid or oid == NULL_OID:
+            return ""
+        with self._lock:
+            return self._read_locked(oid)
+
+    def read(self, name: str) -> str:
+        """Return the text of the blob at `rev:path`, or "" when the path did not exist at that revision."""
+        with self._lock:
+            found = self._request(self._check, name)
+            if found is None:
+                return ""
+            return self._read_locked(found[0])
+
+    def close(self) -> None:
+        with self._lock:
+            for proc in (self._check, self._batch):
+                try:
+                    proc.stdin.close()
+                    proc.wait(timeout=5)
+                except Exception:
+                    proc.kill()
+        logger.info(f"Blob reader for {self.working_directory} closed: {self.hits} cache hits, {self.misses} blob reads")
+
+
+_readers: Dict[str, GitBlobReader] = {}
+_reader_scopes: Dict[str, int] = {}
+_readers_lock = threading.Lock()
+
+
+def get_blob_reader(working_directory: str) -> GitBlobReader:
+    """Return the run-wide blob reader for a repository, starting it on first use."""
+    with _readers_lock:
+        reader = _readers.get(working_directory)
+        if reader is None:
+            reader = GitBlobReader(working_directory)
+            _readers[working_directory] = reader
+        return reader
+
+
+@contextmanager
+def blob_reader_scope(working_directory: str) -> Iterator[None]:
+    """
+    Keep the repository's blob reader for the duration of one run, then close it once no other run of the same
+    repository still uses it. A long-lived process (the daemon) would otherwise keep two git processes and a blob
+    cache per repository forever, and read stale objects after a repository is re-created at the same path.
+    """
+    with _readers_lock:
+        _reader_scopes[working_directory] = _reader_scopes.get(working_directory, 0) + 1
+    try:
+        yield
+    finally:
+        with _readers_lock:
+            _reader_scopes[working_directory] -= 1
+            reader = None
+            if not _reader_scopes[working_directory]:
+                del _reader_scopes[working_directory]
+                reader = _readers.pop(working_directory, None)
+        if reader is not None:
+            reader.close()
+
+
+class LazyBlob:
+    """
+    Pre-image placeholder stored in a commit's file map instead of the text itself. The blob is only read
+    (through the run-wide reader) when the object is converted with `str()`, e.g. while building a prompt.
+    """
+
+    __slots__ = ("working_directory", "name")
+
+    def __init__(self, working_directory: str, name: str) -> None:
+        self.working_directory = working_directory
+        self.name = name
+
+    def __str__(self) -> str:
+        reader = get_blob_reader(self.working_directory)
+        if ":" in self.name:
+            return reader.read(self.name)
+        return reader.read_oid(self.name)
+
+    def __repr__(self) -> str:
+        return f"LazyBlob({self.name!r})"
+
+
+@atexit.register
+def close_blob_readers() -> None:
+    with _readers_lock:
+        readers = list(_readers.values())
+        _readers.clear()
+    for reader in readers:
+        reader.close()
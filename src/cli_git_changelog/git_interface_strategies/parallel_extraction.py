@@ -0,0 +1,72 @@
+import subprocess
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Iterator, List, Optional, Tuple
+from cli_git_changelog.git_interface_strategies.extract_git_commits_diff import iter_git_commits_diff
+from cli_git_changelog.git_interface_strategies.extract_git_log_stream import iter_git_log_stream_diff
+from cli_git_changelog.git_interface_strategies.file_filter import FileFilter
+from cli_git_changelog.utils.logger import get_logger
+from cli_git_changelog.utils.tracing import traced
+
+
+logger = get_logger(__name__)
+
+
+SHARD_SIZE = 8  # commits per task handed to an extraction worker
+
+
+@traced("git.rev-list")
+def list_commits(revision_range: str, working_directory: str, max_count: Optional[int] = None) -> List[str]:
+    """
+    :return: the SHAs of a revision range in `git log` order
+    """
+    try:
+        return subprocess.check_output(
+            ["git", "rev-list"] + ([f"-n{max_count}"] if max_count is not None else []) + [revision_range, "--"],
+            cwd=working_directory,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).split()
+    except subprocess.CalledProcessError:
+        logger.error(f"Failed to list the commits of {revision_range}; are you in a repo?")
+        raise RuntimeError(f"Failed to list the commits of {revision_range}; are you in a repo?")
+
+
+def _extract_shard(shas: List[str], working_directory: str, clean_protocol: Callable[[str],str], reject_file_types: Callable[[str],bool], single_pass: bool, file_filter: Optional[FileFilter]) -> List[Tuple[str, dict]]:
+    # Runs in a worker process with git processes of its own; LazyBlob pre-images pickle as (working directory, name)
+    extract = iter_git_log_stream_diff if single_pass else iter_git_commits_diff
+    return list(extract("", working_directory, clean_protocol, reject_file_types, shas=shas, file_filter=file_filter))
+
+
+def iter_git_commits_parallel(revision_range: str,
+                              working_directory: str,
+                              clean_protocol: Callable[[str],str],
+                              reject_file_types: Callable[[str],bool],
+                              max_count: Optional[int] = None,
+                              git_workers: int = 2,
+                              single_pass: bool = True,
+                              file_filter: Optional[FileFilter] = None) -> Iterator[Tuple[str, dict]]:
+    """
+    Commit strategy extraction sharded over a pool of `git_workers` processes. The SHA list is cut into shards
+    of SHARD_SIZE commits, each extracted by one worker with its own git processes, and the results are
+    yielded back in log order. At most two shards per worker are queued at a time so memory stays bounded.
+    :return: the same (commit_hash, {"desc", "files"}) pairs, in the same order, as the single process extractors
+    """
+    shas = list_commits(revision_range, working_directory, max_count)
+    if not shas:
+        raise RuntimeError("No commits found.")
+    shards = [shas[i:i + SHARD_SIZE] for i in range(0, len(shas), SHARD_SIZE)]
+    logger.info(f"Extracting {len(shas)} commits in {len(shards)} shards on {git_workers} git workers")
+
+    # multiprocessing is only imported once more than one git worker is asked for
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    # spawn rather than fork: by now the parent may be running dispatcher and logging threads
+    with ProcessPoolExecutor(max_workers=git_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        queued: Deque[Future] = deque()
+        next_shard = 0
+        while queued or next_shard < len(shards):
+            while next_shard < len(shards) and len(queued) < git_workers * 2:
+                queued.append(executor.submit(_extract_shard, shards[next_shard], working_directory, clean_protocol, reject_file_types, single_pass, file_filter))
+                next_shard += 1
+            yield from queued.popleft().result()
@@ -0,0 +1,71 @@
+import re
+from functools import cached_property
+from typing import NamedTuple, Tuple
+
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@.*$", re.MULTILINE)
+NO_NEWLINE_MARKER = re.compile(r"^\\ No newline at end of file\n?", re.MULTILINE)
+# Blank lines are rare, so lines are counted with str.count and only the blank ones go through a regex. The text
+# always starts with a hunk header, so every line but the first is preceded by a newline
+BLANK_LINE = re.compile(r"\n[ \t]*(?=\n|\Z)")
+BLANK_CHANGED_LINE = re.compile(r"\n[+-][ \t]*(?=\n|\Z)")
+
+
+class Hunk(NamedTuple):
+    old_start: int
+    old_count: int
+    new_start: int
+    new_count: int
+    start: int  # offset of the hunk header in the parsed text
+    end: int    # offset just past the hunk's last line
+
+
+class ParsedDiff(str):
+    """
+    A cleaned unified diff: the text from the first hunk header on, without the per-file header
+    (diff --git, index, ---/+++, mode and rename lines) or "\\ No newline at end of file" markers. It is a str, so
+    it drops into prompts unchanged, and carries its line counts, computed once over the whole text instead of
+    by splitting it into Python lines. The hunk structure is parsed on first use.
+    """
+
+    added: int
+    removed: int
+    changed_lines: int
+    line_count: int
+
+    @classmethod
+    def parse(cls, raw: str) -> "ParsedDiff":
+        # Everything before the first hunk header is metadata; hunk lines never start with "@@", so a removed
+        # line such as "--- a comment" is not mistaken for a header
+        first = HUNK_HEADER.search(raw)
+        body = raw[first.start():] if first is not None else ""
+        if "\\ No newline" in body:
+            body = NO_NEWLINE_MARKER.sub("", body)
+        parsed = super().__new__(cls, body.rstrip("\n"))
+        lines = parsed.count("\n") + 1 if parsed else 0
+        parsed.added = parsed.count("\n+")
+        parsed.removed = parsed.count("\n-")
+        parsed.changed_lines = parsed.added + parsed.removed - len(BLANK_CHANGED_LINE.findall(parsed))
+        parsed.line_count = lines - len(BLANK_LINE.findall(parsed))
+        return parsed
+
+    @classmethod
+    def of(cls, diff: str) -> "ParsedDiff":
+        """`diff` itself when it is already parsed, otherwise its parse. Parsing a cleaned diff is a no-op on its text."""
+        return diff if isinstance(diff, ParsedDiff) else cls.parse(diff)
+
+    @cached_property
+    def hunks(self) -> Tuple[Hunk, ...]:
+        headers = list(HUNK_HEADER.finditer(self))
+        return tuple(
+            Hunk(
+                int(m.group(1)), int(m.group(2)) if m.group(2) else 1,
+                int(m.group(3)), int(m.group(4)) if m.group(4) else 1,
+                m.start(), headers[i + 1].start() - 1 if i + 1 < len(headers) else len(self),
+            )
+            for i, m in enumerate(headers)
+        )
+
+    def payload(self, hunk: Hunk) -> str:
+        """The lines of one hunk, header included."""
+        return self[hunk.start:hunk.end]
@@ -1,67 +1,244 @@
+import contextvars
 import threading
 import time
-from queue import Queue
-from concurrent.futures import Future
-from typing import Callable
+from collections import deque
+from queue import Empty
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
 from cli_git_changelog.utils.logger import get_logger
+from cli_git_changelog.utils.tracing import count, record_span
 
 
 logger = get_logger(__name__)
 
 
-class RateLimitedTaskDispatcher:
-    def __init__(self, capacity: int, refill_interval: float, idle_timeout: float = 10.0):
+# Who a call is made for, e.g. the repository of a multi-repo run. Calls are queued per tenant and started
+# round-robin, so a tenant with a long backlog cannot starve the others of the shared budget
+current_tenant: contextvars.ContextVar[str] = contextvars.ContextVar("dispatcher_tenant", default="")
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, refill_per_second: float):
         """
-        :param capacity: max number of allowed calls per time window
-        :param refill_interval: how often to refill one token (e.g., 60 / 50 = 1.2s)
+        :param capacity: max number of units the bucket holds (e.g. requests or tokens per minute)
+        :param refill_per_second: how many units are earned back per second (e.g. 50 / 60)
         """
         self.capacity = capacity
-        self.tokens = capacity
-        self.refill_interval = refill_interval
-        self.token_lock = threading.Lock()
+        self.refill_per_second = refill_per_second
+        self.level = capacity
+        self._last_refill = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._last_refill) * self.refill_per_second)
+        self._last_refill = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units are available; 0 when they already are."""
+        self._refill(now)
+        # A single request larger than the whole bucket would otherwise wait forever
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.refill_per_second
+
+    def consume(self, amount: float) -> None:
+        # May go negative: usage reported after a call that exceeded its reservation is paid back by waiting
+        self.level -= amount
+
+    def resize(self, capacity: float, refill_per_second: float) -> None:
+        self._refill(time.monotonic())
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.level = min(self.level, capacity)
+
+
+class FairQueue:
+    """
+    FIFO per tenant, served round-robin across the tenants with queued work. Like `queue.Queue.get`, `get`
+    raises `queue.Empty` on timeout.
+    """
+
+    def __init__(self) -> None:
+        self._queues: Dict[str, Deque[Any]] = {}
+        self._ready: Deque[str] = deque()   # tenants with queued items, in the order they are served next
+        self._not_empty = threading.Condition()
+
+    def put(self, tenant: str, item: Any) -> None:
+        with self._not_empty:
+            queue = self._queues.setdefault(tenant, deque())
+            if not queue:
+                self._ready.append(tenant)
+            queue.append(item)
+            self._not_empty.notify()
 
-        self.queue = Queue()
-        self.idle_timeout = idle_timeout
+    def get(self, timeout: Optional[float] = None) -> Any:
+        with self._not_empty:
+            if not self._ready and not self._not_empty.wait_for(lambda: self._ready, timeout=timeout):
+                raise Empty
+            tenant = self._ready.popleft()
+            queue = self._queues[tenant]
+            item = queue.popleft()
+            if queue:
+                self._ready.append(tenant)
+            return item
+
+
+class RateLimitedTaskDispatcher:
+    def __init__(self,
+                 requests_per_minute: int,
+                 input_tokens_per_minute: Optional[int] = None,
+                 output_tokens_per_minute: Optional[int] = None,
+                 max_workers: int = 8):
+        """
+        Tokens are taken from the budgets on the dispatcher thread, but the calls themselves run on a bounded
+        worker pool so up to `max_workers` requests are in flight at once.
+        :param requests_per_minute: max number of calls started per minute
+        :param input_tokens_per_minute: optional budget of prompt tokens per minute
+        :param output_tokens_per_minute: optional budget of completion tokens per minute (reserved up front from
+            max_tokens, then settled against the real usage)
+        :param max_workers: size of the worker pool the calls run on
+        """
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60)
+        self.input_tokens = TokenBucket(input_tokens_per_minute, input_tokens_per_minute / 60) if input_tokens_per_minute else None
+        self.output_tokens = TokenBucket(output_tokens_per_minute, output_tokens_per_minute / 60) if output_tokens_per_minute else None
+        self.token_lock = threading.Condition()
+        self._paused_until = 0.0
+
+        self.max_workers = max_workers
+        self._worker_slots = threading.BoundedSemaphore(max_workers)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rate-limited-worker")
+
+        self.queue = FairQueue()
         self._shutdown_event = threading.Event()
         self.dispatcher_thread = threading.Thread(target=self._run, daemon=True)
-        self.refiller_thread = threading.Thread(target=self._refill, daemon=True)
-
         self.dispatcher_thread.start()
-        self.refiller_thread.start()
 
-    def _refill(self):
-        while not self._shutdown_event.is_set():
+    def _buckets(self, input_tokens: int, output_tokens: int) -> List[Tuple[TokenBucket, float]]:
+        buckets = [(self.requests, 1)]
+        if self.input_tokens is not None:
+            buckets.append((self.input_tokens, input_tokens))
+        if self.output_tokens is not None:
+            buckets.append((self.output_tokens, output_tokens))
+        return buckets
+
+    def _try_consume(self, input_tokens: int, output_tokens: int) -> float:
+        """
+        Consume one request and the given token amounts if every budget allows it.
+        :return: 0 on success, otherwise the exact number of seconds until the scarcest budget has refilled enough
+        """
+        now = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+        buckets = self._buckets(input_tokens, output_tokens)
+        wait = max(bucket.wait_time(amount, now) for bucket, amount in buckets)
+        if wait > 0:
+            return wait
+        for bucket, amount in buckets:
+            bucket.consume(amount)
+        return 0.0
+
+    @staticmethod
+    def _record_stall(started: Optional[float]) -> None:
+        if started is not None:
+            record_span("dispatcher.token_stall", started, time.perf_counter() - started)
+            count("token_stalls")
+
+    def acquire(self, input_tokens: int = 0, output_tokens: int = 0) -> None:
+        """Block the calling thread until the budgets allow one more request."""
+        stalled = None
+        with self.token_lock:
+            while True:
+                wait = self._try_consume(input_tokens, output_tokens)
+                if wait == 0:
+                    break
+                stalled = stalled or time.perf_counter()
+                logger.debug(f"Rate limited, waiting {wait:.2f}s for the next refill")
+                self.token_lock.wait(timeout=wait)
+        self._record_stall(stalled)
+
+    async def acquire_async(self, input_tokens: int = 0, output_tokens: int = 0) -> None:
+        """Wait (without blocking the event loop) until the budgets allow one more request."""
+        # Only the asyncio mode gets here, with asyncio already loaded; the threaded modes skip its import
+        import asyncio
+        stalled = None
+        while True:
             with self.token_lock:
-                if self.tokens < self.capacity:
-                    self.tokens += 1
-            time.sleep(self.refill_interval)
+                wait = self._try_consume(input_tokens, output_tokens)
+            if wait == 0:
+                break
+            stalled = stalled or time.perf_counter()
+            logger.debug(f"Rate limited, waiting {wait:.2f}s for the next refill")
+            await asyncio.sleep(wait)
+        self._record_stall(stalled)
 
-    def _consume_token(self) -> bool:
+    def settle(self, reserved_input: int, reserved_output: int, input_tokens: int, output_tokens: int) -> None:
+        """
+        Reconcile a reservation with the usage the API actually reported, refunding or charging the difference.
+        """
+        with self.token_lock:
+            if self.input_tokens is not None:
+                self.input_tokens.consume(input_tokens - reserved_input)
+            if self.output_tokens is not None:
+                self.output_tokens.consume(output_tokens - reserved_output)
+            self.token_lock.notify_all()
+
+    def pause_for(self, seconds: float) -> None:
+        """Stop handing out budget to every caller for the next `seconds` (extends, never shortens, a running pause)."""
         with self.token_lock:
-            if self.tokens > 0:
-                self.tokens -= 1
-                return True
-            logger.warn("Rate limited, no tokens available WAITING")
-            return False
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def set_budget(self, budget: str, per_minute: float) -> None:
+        """
+        Resize one of the budgets ("requests", "input-tokens" or "output-tokens") to `per_minute`, creating the
+        token budgets on first use when they were not configured up front.
+        """
+        with self.token_lock:
+            if budget == "requests":
+                bucket = self.requests
+            elif budget == "input-tokens":
+                bucket = self.input_tokens = self.input_tokens or TokenBucket(per_minute, per_minute / 60)
+            elif budget == "output-tokens":
+                bucket = self.output_tokens = self.output_tokens or TokenBucket(per_minute, per_minute / 60)
+            else:
+                raise ValueError(f"Unknown budget: {budget}")
+            if abs(bucket.capacity - per_minute) > 0.01 * bucket.capacity:
+                bucket.resize(per_minute, per_minute / 60)
+            self.token_lock.notify_all()
+
+    def _execute(self, fn: Callable, args: tuple, kwargs: dict, future: Future, context: contextvars.Context, queued: float) -> None:
+        record_span("dispatcher.queue_wait", queued, time.perf_counter() - queued)
+        try:
+            if future.set_running_or_notify_cancel():
+                # Runs in the submitter's context, so the call's spans nest under the span that submitted it
+                future.set_result(context.run(fn, *args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            self._worker_slots.release()
 
     def _run(self):
         while not self._shutdown_event.is_set():
             try:
-                fn, args, kwargs, future = self.queue.get(timeout=self.idle_timeout)
-            except Exception:
-                self._shutdown_event.set()
-                break
-
-            while not self._consume_token():
-                time.sleep(0.1)
+                fn, args, kwargs, future, input_tokens, output_tokens, context, queued = self.queue.get(timeout=1.0)
+            except Empty:
+                continue
+            # Hold a worker slot before spending budget so tokens are never consumed for calls that cannot start yet
+            self._worker_slots.acquire()
+            self.acquire(input_tokens, output_tokens)
+            self.executor.submit(self._execute, fn, args, kwargs, future, context, queued)
 
-            try:
-                result = fn(*args, **kwargs)
-                future.set_result(result)
-            except Exception as e:
-                future.set_exception(e)
+    def submit_with_cost(self, input_tokens: int, output_tokens: int, fn: Callable, *args, **kwargs) -> Future:
+        """
+        Queue `fn` to run once one request plus the given input/output token amounts fit the budgets. It is
+        queued for the caller's `current_tenant`.
+        """
+        future = Future()
+        self.queue.put(current_tenant.get(), (fn, args, kwargs, future, input_tokens, output_tokens, contextvars.copy_context(), time.perf_counter()))
+        return future
 
     def submit(self, fn: Callable, *args, **kwargs) -> Future:
-        future = Future()
-        self.queue.put((fn, args, kwargs, future))
-        return future
\ No newline at end of file
+        return self.submit_with_cost(0, 0, fn, *args, **kwargs)
+
+    def shutdown(self) -> None:
+        self._shutdown_event.set()
+        self.executor.shutdown(wait=False)
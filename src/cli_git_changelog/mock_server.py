@@ -0,0 +1,313 @@
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# ----------------------------------------------------------------------------------------------------
+# MARK: STUB ANTHROPIC API
+# ----------------------------------------------------------------------------------------------------
+# A stand-in for the parts of the Anthropic API the changelog uses (/v1/messages, streamed or not, and the
+# Message Batches endpoints), so every execution mode can be exercised offline. Point the client at it with
+# ANTHROPIC_BASE_URL=http://127.0.0.1:<port>. Answers are deterministic in the prompt, so reruns hit the cache.
+# Response latency and injected 429s make it usable as the model side of a benchmark, and the server counts
+# what it was sent (requests, tokens, concurrency) so the benchmark can report it.
+
+
+def mock_summary(prompt: str) -> str:
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+    return f"- Mock summary {digest} of a {len(prompt)} character prompt"
+
+
+def mock_message(params: Dict[str, Any]) -> Dict[str, Any]:
+    prompt = "".join(m.get("content", "") if isinstance(m.get("content"), str) else json.dumps(m.get("content"))
+                     for m in params.get("messages", []))
+    text = mock_summary(prompt)
+    return {
+        "id": f"msg_{uuid.uuid4().hex[:24]}",
+        "type": "message",
+        "role": "assistant",
+        "model": params.get("model", "mock"),
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": max(len(prompt) // 4, 1), "output_tokens": max(len(text) // 4, 1)},
+    }
+
+
+def mock_stream_events(message: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """The server-sent events of a streamed `message`, its text split into word-sized deltas."""
+    text = message["content"][0]["text"]
+    start = dict(message, content=[], stop_reason=None, usage=dict(message["usage"], output_tokens=0))
+    events: List[Tuple[str, Dict[str, Any]]] = [
+        ("message_start", {"type": "message_start", "message": start}),
+        ("content_block_start", {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}}),
+    ]
+    events += [("content_block_delta", {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": chunk}})
+               for chunk in re.findall(r"\S+\s*|\s+", text)]
+    events += [
+        ("content_block_stop", {"type": "content_block_stop", "index": 0}),
+        ("message_delta", {"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                           "usage": {"output_tokens": message["usage"]["output_tokens"]}}),
+        ("message_stop", {"type": "message_stop"}),
+    ]
+    return events
+
+
+def _timestamp(dt: Optional[datetime]) -> Optional[str]:
+    return dt.isoformat().replace("+00:00", "Z") if dt is not None else None
+
+
+class MockAnthropicServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self,
+                 address: Tuple[str, int],
+                 batch_delay: float = 0.0,
+                 latency: float = 0.0,
+                 token_delay: float = 0.0,
+                 rate_limit_probability: float = 0.0,
+                 retry_after: float = 1.0,
+                 seed: int = 0) -> None:
+        """
+        :param address: (host, port) to listen on, port 0 picks a free one
+        :param batch_delay: seconds a message batch stays `in_progress` before it ends
+        :param latency: seconds before a message response (or the first event of a stream) is sent
+        :param token_delay: seconds between the text deltas of a streamed response
+        :param rate_limit_probability: share of message requests answered with a 429
+        :param retry_after: `retry-after` seconds sent with an injected 429
+        :param seed: seed of the 429 injection, so a benchmark sees the same failures every run
+        """
+        super().__init__(address, MockAnthropicHandler)
+        self.batch_delay = batch_delay
+        self.latency = latency
+        self.token_delay = token_delay
+        self.rate_limit_probability = rate_limit_probability
+        self.retry_after = retry_after
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        with self.lock:
+            self.stats: Dict[str, Any] = {
+                "requests": 0,
+                "batched_requests": 0,
+                "rate_limited": 0,
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "peak_in_flight": 0,
+                "busy_seconds": 0.0,          # summed duration of every message request
+                "first_request_at": None,     # time.monotonic() of the first message request or batch submission
+                "last_response_at": None,     # and of the last message response
+            }
+            self._in_flight = 0
+
+    def begin_request(self) -> Tuple[float, bool]:
+        """
+        Count a message request as in flight.
+        :return: its start time and whether it should be answered with an injected 429
+        """
+        started = time.monotonic()
+        with self.lock:
+            self.stats["requests"] += 1
+            if self.stats["first_request_at"] is None:
+                self.stats["first_request_at"] = started
+            self._in_flight += 1
+            self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self._in_flight)
+            limited = self._rng.random() < self.rate_limit_probability
+            if limited:
+                self.stats["rate_limited"] += 1
+        return started, limited
+
+    def record_usage(self, usage: Dict[str, int]) -> None:
+        with self.lock:
+            self.stats["input_tokens"] += usage["input_tokens"]
+            self.stats["output_tokens"] += usage["output_tokens"]
+
+    def end_request(self, started: float, usage: Optional[Dict[str, int]] = None) -> None:
+        ended = time.monotonic()
+        with self.lock:
+            self._in_flight -= 1
+            self.stats["busy_seconds"] += ended - started
+            self.stats["last_response_at"] = ended
+        if usage is not None:
+            self.record_usage(usage)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def batch_object(self, batch_id: str) -> Dict[str, Any]:
+        batch = self.batches[batch_id]
+        n = len(batch["requests"])
+        ended = time.monotonic() - batch["started"] >= self.batch_delay
+        created = batch["created_at"]
+        return {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {
+                "processing": 0 if ended else n,
+                "succeeded": n if ended else 0,
+                "errored": 0,
+                "canceled": 0,
+                "expired": 0,
+            },
+            "created_at": _timestamp(created),
+            "expires_at": _timestamp(created + timedelta(hours=24)),
+            "ended_at": _timestamp(datetime.now(timezone.utc)) if ended else None,
+            "archived_at": None,
+            "cancel_initiated_at": None,
+            "results_url": f"{self.base_url}/v1/messages/batches/{batch_id}/results" if ended else None,
+        }
+
+
+class MockAnthropicHandler(BaseHTTPRequestHandler):
+    server: MockAnthropicServer
+    # Keep-alive like the real API, so clients reuse their pooled connections
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _send(self, status: int, body: str, content_type: str = "application/json", headers: Optional[Dict[str, str]] = None) -> None:
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("content-type", content_type)
+        self.send_header("content-length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+        self._send(status, json.dumps(body))
+
+    def _not_found(self) -> None:
+        self._send_json(404, {"type": "error", "error": {"type": "not_found_error", "message": f"No route for {self.path}"}})
+
+    def _send_events(self, events: List[Tuple[str, Dict[str, Any]]]) -> None:
+        time.sleep(self.server.latency)
+        self.send_response(200)
+        self.send_header("content-type", "text/event-stream")
+        self.send_header("cache-control", "no-cache")
+        self.send_header("transfer-encoding", "chunked")
+        self.end_headers()
+        for event, data in events:
+            if event == "content_block_delta":
+                time.sleep(self.server.token_delay)
+            chunk = f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("content-length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_POST(self) -> None:
+        path = self.path.split("?")[0].rstrip("/")
+        body = self._read_json()
+        if path == "/v1/messages":
+            started, limited = self.server.begin_request()
+            if limited:
+                time.sleep(self.server.latency)
+                error = {"type": "error", "error": {"type": "rate_limit_error", "message": "Injected rate limit"}}
+                self._send(429, json.dumps(error), headers={"retry-after": str(self.server.retry_after)})
+                self.server.end_request(started)
+                return
+            message = mock_message(body)
+            if body.get("stream"):
+                self._send_events(mock_stream_events(message))
+            else:
+                time.sleep(self.server.latency)
+                self._send_json(200, message)
+            self.server.end_request(started, message["usage"])
+        elif path == "/v1/messages/batches":
+            batch_id = f"msgbatch_{uuid.uuid4().hex[:24]}"
+            with self.server.lock:
+                self.server.batches[batch_id] = {
+                    "requests": body.get("requests", []),
+                    "started": time.monotonic(),
+                    "created_at": datetime.now(timezone.utc),
+                }
+                self.server.stats["batched_requests"] += len(body.get("requests", []))
+                # A batch submission starts the model phase of a --batch-api run
+                if self.server.stats["first_request_at"] is None:
+                    self.server.stats["first_request_at"] = time.monotonic()
+                batch = self.server.batch_object(batch_id)
+            self._send_json(200, batch)
+        else:
+            self._not_found()
+
+    def do_GET(self) -> None:
+        parts = self.path.split("?")[0].strip("/").split("/")
+        if parts[:3] != ["v1", "messages", "batches"] or len(parts) not in (4, 5):
+            return self._not_found()
+        batch_id = parts[3]
+        with self.server.lock:
+            if batch_id not in self.server.batches:
+                return self._not_found()
+            batch = self.server.batch_object(batch_id)
+            requests = self.server.batches[batch_id]["requests"]
+        if len(parts) == 4:
+            return self._send_json(200, batch)
+        if parts[4] != "results" or batch["processing_status"] != "ended":
+            return self._not_found()
+        lines = []
+        for r in requests:
+            message = mock_message(r["params"])
+            self.server.record_usage(message["usage"])
+            lines.append(json.dumps({"custom_id": r["custom_id"], "result": {"type": "succeeded", "message": message}}))
+        self._send(200, "\n".join(lines) + "\n", "application/x-jsonl")
+
+
+def start_mock_server(host: str = "127.0.0.1", port: int = 0, batch_delay: float = 0.0, **options: Any) -> MockAnthropicServer:
+    """
+    Serve the stub API from a daemon thread.
+    :param options: latency and rate limit injection, see `MockAnthropicServer`
+    :return: the running server, its address is available as `server.base_url`
+    """
+    server = MockAnthropicServer((host, port), batch_delay, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local stub of the Anthropic messages and message batches API.")
+    parser.add_argument("--host", type=str, default="127.0.0.1",
+                        help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8765,
+                        help="Port to listen on")
+    parser.add_argument("--batch-delay", type=float, default=2.0,
+                        help="Seconds a message batch stays in progress before it ends")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Seconds before each message response or the first event of a stream")
+    parser.add_argument("--token-delay", type=float, default=0.0,
+                        help="Seconds between the text deltas of a streamed response")
+    parser.add_argument("--rate-limit-probability", type=float, default=0.0,
+                        help="Share (0-1) of message requests answered with an injected 429")
+    parser.add_argument("--retry-after", type=float, default=1.0,
+                        help="retry-after seconds sent with an injected 429")
+    args = parser.parse_args()
+
+    server = MockAnthropicServer((args.host, args.port), args.batch_delay, args.latency, args.token_delay, args.rate_limit_probability, args.retry_after)
+    print(f"Stub Anthropic API listening on {server.base_url}, set ANTHROPIC_BASE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
+import importlib
 from typing import Union
-from cli_git_changelog.model_interface.anthropic_model import AnthropicModel
 from cli_git_changelog.model_interface.model_interface import ModelInterface
 from cli_git_changelog.utils.logger import get_logger
 
@@ -7,11 +7,19 @@ from cli_git_changelog.utils.logger import get_logger
 logger = get_logger(__name__)
 
 
+# module:class of each provider, imported on first use so the provider SDK only loads when a model is built
 model_map = {
-    "claude": AnthropicModel,
+    "claude": "cli_git_changelog.model_interface.anthropic_model:AnthropicModel",
 }
 
 
+def __getattr__(name: str):
+    if name == "AnthropicModel":
+        from cli_git_changelog.model_interface.anthropic_model import AnthropicModel
+        return AnthropicModel
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def classify_model_name(model: str) -> str:
     """
     Classify the model name to a standard format. For example: claude-3-5-xxxx -> claude (its the same interface)
@@ -30,6 +38,7 @@ def get_model(api_url: Union[str, None] = None, api_key: Union[str, None] = None
         raise ValueError("Model is required")
     map_model_name = classify_model_name(model)
     if map_model_name in model_map:
-        return model_map[map_model_name](api_url, api_key, model)
+        module_name, class_name = model_map[map_model_name].split(":")
+        return getattr(importlib.import_module(module_name), class_name)(api_url, api_key, model)
     logger.error(f"Unsupported model: {model}")
     raise ValueError(f"Unsupported model: {model}")
\ No newline at end of file
@@ -0,0 +1,113 @@
+import random
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Mapping, Optional
+from cli_git_changelog.global_rate_limited_dispatcher import RateLimitedTaskDispatcher
+from cli_git_changelog.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+RATE_LIMIT_BUDGETS = ("requests", "input-tokens", "output-tokens")
+
+
+def _parse_reset(value: Optional[str]) -> Optional[float]:
+    """Seconds from now until an RFC 3339 `anthropic-ratelimit-*-reset` timestamp, or None if unparsable."""
+    if not value:
+        return None
+    try:
+        reset = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return max((reset - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def _parse_float(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class AdaptiveRateController:
+    """
+    Shared feedback loop between the API's rate limit signals and the dispatcher's budgets.
+
+    - `anthropic-ratelimit-{requests,input-tokens,output-tokens}-limit` headers resize the matching budget to
+      the organisation's real limit, but never above a budget that was configured, so a run asked to stay under
+      a lower limit does. A `remaining` of 0 pauses every worker until its `reset` time.
+    - The budgets run at `limit * factor`; `factor` grows additively on success and is cut multiplicatively on
+      every 429/529 (AIMD), so the fleet settles just below the limit instead of oscillating around it.
+    - A 429 pauses the whole dispatcher for `retry-after` (or an exponential backoff when absent) plus jitter,
+      so no worker keeps hammering the API while the others wait.
+    """
+
+    def __init__(self,
+                 dispatcher: RateLimitedTaskDispatcher,
+                 limits: Dict[str, Optional[int]],
+                 increase_step: float = 0.05,
+                 decrease_factor: float = 0.5,
+                 min_factor: float = 0.1,
+                 base_backoff: float = 2.0,
+                 max_backoff: float = 60.0,
+                 jitter: float = 0.25):
+        self.dispatcher = dispatcher
+        self.limits = dict(limits)
+        self.ceilings = dict(limits)
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.min_factor = min_factor
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.factor = 1.0
+        self._consecutive_limited = 0
+        self._lock = threading.Lock()
+
+    def _apply_headers(self, headers: Mapping[str, str]) -> None:
+        for budget in RATE_LIMIT_BUDGETS:
+            limit = _parse_float(headers.get(f"anthropic-ratelimit-{budget}-limit"))
+            if limit:
+                ceiling = self.ceilings.get(budget)
+                limit = int(min(limit, ceiling)) if ceiling else int(limit)
+                if limit != self.limits.get(budget):
+                    logger.info(f"API reports a {budget} limit, resizing the budget to {limit}/min")
+                    self.limits[budget] = limit
+            remaining = _parse_float(headers.get(f"anthropic-ratelimit-{budget}-remaining"))
+            if remaining is not None and remaining <= 0:
+                reset_in = _parse_reset(headers.get(f"anthropic-ratelimit-{budget}-reset"))
+                if reset_in:
+                    logger.warning(f"{budget} budget exhausted, pausing all workers for {reset_in:.1f}s until it resets")
+                    self.dispatcher.pause_for(reset_in)
+
+    def _resize(self) -> None:
+        for budget, limit in self.limits.items():
+            if limit:
+                self.dispatcher.set_budget(budget, max(limit * self.factor, 1.0))
+
+    def on_success(self, headers: Mapping[str, str]) -> None:
+        with self._lock:
+            self._consecutive_limited = 0
+            self.factor = min(1.0, self.factor + self.increase_step)
+            self._apply_headers(headers)
+            self._resize()
+
+    def on_rate_limited(self, headers: Optional[Mapping[str, str]] = None) -> float:
+        """
+        Record a 429/529 and pause every worker.
+        :return: the pause applied, in seconds
+        """
+        headers = headers or {}
+        with self._lock:
+            self._consecutive_limited += 1
+            self.factor = max(self.min_factor, self.factor * self.decrease_factor)
+            self._apply_headers(headers)
+            self._resize()
+            retry_after = _parse_float(headers.get("retry-after"))
+            if retry_after is None:
+                retry_after = min(self.max_backoff, self.base_backoff * 2 ** (self._consecutive_limited - 1))
+            wait = retry_after + random.uniform(0, retry_after * self.jitter)
+            self.dispatcher.pause_for(wait)
+        logger.warning(f"Rate limited, pausing all workers for {wait:.1f}s and running at {self.factor:.0%} of the limit")
+        return wait
@@ -1,49 +1,54 @@
-import requests
+import asyncio
+import functools
+import os
+import random
 import time
-from typing import List, Callable, Optional, Union, Tuple, Any
-from anthropic import Anthropic, RateLimitError
+import httpx
+from typing import Dict, List, Callable, Mapping, Optional, Union, Tuple, Any
+from anthropic import Anthropic, AsyncAnthropic, APIConnectionError, APIStatusError
 from cli_git_changelog.model_interface.model_interface import ModelInterface
+from cli_git_changelog.model_interface.api_dispatcher import AnthropicAPIReliantDispatcher
+from cli_git_changelog.model_interface.http_transport import SharedHttpTransport
 from cli_git_changelog.utils.logger import get_logger
-from cli_git_changelog.global_rate_limited_dispatcher import RateLimitedTaskDispatcher
-from threading import Lock
-from concurrent.futures import Future
+from cli_git_changelog.utils.tokens import estimate_tokens
+from cli_git_changelog.utils.tracing import count, record_span, traced
 
 
 logger = get_logger(__name__)
 
 
-class AnthropicAPIReliantDispatcher:
-    _instance = None
-    _lock = Lock()
-    CALLS = 50
-    PERIOD = 60
-    REFILL_INTERVAL = PERIOD / CALLS
+# 429 is a rate limit, 529 means the API is overloaded; both are retried after backing off
+RATE_LIMIT_STATUS_CODES = (429, 529)
 
 
-    def __new__(cls):
-        if cls._instance is None:
-            with cls._lock:
-                if cls._instance is None:  # double-checked locking
-                    instance = super().__new__(cls)
-                    instance.dispatcher = RateLimitedTaskDispatcher(capacity=cls.CALLS, refill_interval=cls.REFILL_INTERVAL)
-                    cls._instance = instance
-                    logger.info(f"Anthropic API dispatcher initialized with {cls.CALLS} calls per {cls.PERIOD} seconds.")
-                    logger.warn("This is a singleton, it will not be recreated if called again. If you see this message multiple times, something is very wrong.")
-        return cls._instance
+# Server errors, dropped connections and timeouts are retried too, with a per-request exponential backoff
+TRANSIENT_BACKOFF_BASE = 1.0
+TRANSIENT_BACKOFF_MAX = 30.0
 
-    def submit(self, method: Callable[..., Any], *args, **kwargs) -> Future:
-        return self.dispatcher.submit(method, *args, **kwargs)
+
+def is_rate_limit_error(e: Exception) -> bool:
+    return isinstance(e, APIStatusError) and e.status_code in RATE_LIMIT_STATUS_CODES
+
+
+def is_transient_error(e: Exception) -> bool:
+    # APITimeoutError is an APIConnectionError
+    return isinstance(e, APIConnectionError) or (isinstance(e, APIStatusError) and e.status_code >= 500 and not is_rate_limit_error(e))
 
 
 class AnthropicModel(ModelInterface):
     MAX_RETRIES = 5
+    SDK_MAX_RETRIES = 2
+    # Message Batches API limits on a single batch
+    MAX_BATCH_REQUESTS = 100_000
+    MAX_BATCH_BYTES = 200 * 1024 * 1024
 
     def __init__(self, api_url: Union[str, None] = None, api_key: Union[str, None] = None, model: Union[str, None] = None) -> None:
         if api_url is not None and len(api_url) > 0:
             logger.warn(f"Anthropic API is auto interfered, overriding api_url: {api_url}")
             self.api_url = api_url
         else:
-            self.api_url = "https://api.anthropic.com/v1/messages"
+            # Same base URL the SDK picks up, so a local stub server can stand in for both
+            self.api_url = os.getenv("ANTHROPIC_BASE_URL", "https://api.anthropic.com").rstrip("/") + "/v1/messages"
         if api_key is None:
             raise ValueError("API Key is required")
         self.api_key = api_key
@@ -51,10 +56,26 @@ class AnthropicModel(ModelInterface):
             self.model = "claude-3-5-sonnet-latest"
         else:
             self.model = model
-        self.client = Anthropic(api_key=self.api_key)
+        self.transport = SharedHttpTransport()
+        # Retries are driven by the shared rate controller and `_retry_delay`, so the SDK must surface every error
+        self.client = Anthropic(api_key=self.api_key, max_retries=0, http_client=self.transport.client, timeout=self.transport.timeout)
+        # Batch management calls are few and outside the shared dispatcher, the SDK's own retries suit them
+        self.batch_client = self.client.with_options(max_retries=self.SDK_MAX_RETRIES)
+        self._async_client: Optional[AsyncAnthropic] = None
+        self._async_http_client: Optional[httpx.AsyncClient] = None
         self.dispatcher = AnthropicAPIReliantDispatcher()
 
 
+    @property
+    def async_client(self) -> AsyncAnthropic:
+        # Created on first use so it binds to the event loop that actually runs the requests
+        http_client = self.transport.async_client()
+        if self._async_client is None or self._async_http_client is not http_client:
+            self._async_client = AsyncAnthropic(api_key=self.api_key, max_retries=0, http_client=http_client, timeout=self.transport.timeout)
+            self._async_http_client = http_client
+        return self._async_client
+
+
     def _normalize_inputs(self, prompt: str, temperature: float = 0.5, max_tokens: int = 4096) -> Tuple[str, float, int]:
         if prompt is None or len(prompt) == 0:
             raise ValueError("Prompt is required")
@@ -66,29 +87,45 @@ class AnthropicModel(ModelInterface):
     def submit_request(self, prompt: str, temperature: float = 0.5, max_tokens: int = 4096, method: Optional[Callable] = None) -> str:
         if method is None:
             method = self.query_model
-        future = self.dispatcher.submit(method, prompt, temperature, max_tokens)
+        # Reserve the prompt's estimated input tokens and the full max_tokens; the call settles the real usage
+        future = self.dispatcher.submit_with_cost(estimate_tokens(prompt), max_tokens, method, prompt, temperature, max_tokens)
         return future.result()
 
 
+    def _retry_delay(self, e: Exception, attempt: int, action: str = "") -> float:
+        """
+        :return: seconds to sleep before retrying; 0 after a rate limit, the paused shared dispatcher holds the resubmitted request
+        :raises: `e` itself when it is not worth retrying
+        """
+        if is_rate_limit_error(e):
+            # The controller pauses the shared dispatcher, so the resubmitted request waits out the backoff
+            wait_time = self.dispatcher.observe_rate_limit(e.response.headers)
+            count("model_retries")
+            logger.warn(f"Rate limited with {e.status_code}{action} (attempt {attempt + 1}/{self.MAX_RETRIES}), retrying in {wait_time:.1f}s")
+            return 0.0
+        if is_transient_error(e):
+            wait_time = min(TRANSIENT_BACKOFF_BASE * 2 ** attempt, TRANSIENT_BACKOFF_MAX) * random.uniform(0.5, 1.0)
+            count("model_retries")
+            logger.warn(f"Transient error{action}: {e} (attempt {attempt + 1}/{self.MAX_RETRIES}), retrying in {wait_time:.1f}s")
+            return wait_time
+        raise e
+
+
+    def _settle_usage(self, prompt: str, max_tokens: int, input_tokens: int = 0, output_tokens: int = 0) -> None:
+        count("input_tokens", input_tokens)
+        count("output_tokens", output_tokens)
+        self.dispatcher.settle(estimate_tokens(prompt), max_tokens, input_tokens, output_tokens)
+
+
     def call_model(self, prompt: str, temperature: float = 0.5, max_tokens: int = 4096) -> str:
         prompt, temperature, max_tokens = self._normalize_inputs(prompt, temperature, max_tokens)
-        base_wait = 20  # seconds
         for attempt in range(self.MAX_RETRIES-1):
             try:
                 return self.submit_request(prompt, temperature, max_tokens)
-            except RateLimitError:
-                wait_time = base_wait * (attempt + 1)
-                logger.warn(f"Rate limit hit (attempt {attempt + 1}/{self.MAX_RETRIES}). Sleeping for {wait_time}s...")
-                time.sleep(wait_time)
-            except Exception as e:
-                err_msg = str(e).lower()
-                if "rate" in err_msg and "limit" in err_msg:
-                    wait_time = base_wait * (attempt + 1)
-                    logger.warn(f"Rate limit-like error: {e} (attempt {attempt + 1}/{self.MAX_RETRIES}). Sleeping for {wait_time}s...")
-                    time.sleep(wait_time)
-                else:
-                    raise
+            except (APIStatusError, APIConnectionError) as e:
+                time.sleep(self._retry_delay(e, attempt))
         try:
+            count("model_fallbacks")
             logger.warn("Falling back to raw HTTP request.")
             return self.submit_request(prompt, temperature, max_tokens, self.query_model_requests)
         except Exception as e:
@@ -96,6 +133,75 @@ class AnthropicModel(ModelInterface):
             raise
 
 
+    async def acall_model(self, prompt: str, temperature: float = 0.5, max_tokens: int = 4096) -> str:
+        prompt, temperature, max_tokens = self._normalize_inputs(prompt, temperature, max_tokens)
+        for attempt in range(self.MAX_RETRIES-1):
+            try:
+                await self.dispatcher.acquire(estimate_tokens(prompt), max_tokens)
+                return await self.aquery_model(prompt, temperature, max_tokens)
+            except (APIStatusError, APIConnectionError) as e:
+                await asyncio.sleep(self._retry_delay(e, attempt))
+        try:
+            count("model_fallbacks")
+            logger.warn("Falling back to raw HTTP request.")
+            await self.dispatcher.acquire(estimate_tokens(prompt), max_tokens)
+            return await asyncio.to_thread(self.query_model_requests, prompt, temperature, max_tokens)
+        except Exception as e:
+            logger.error(f"Anthropic request failed: {e}")
+            raise
+
+
+    def stream_model(self, prompt: str, on_text: Callable[[str], None], temperature: float = 0.5, max_tokens: int = 4096, on_restart: Optional[Callable[[], None]] = None) -> str:
+        prompt, temperature, max_tokens = self._normalize_inputs(prompt, temperature, max_tokens)
+        for attempt in range(self.MAX_RETRIES-1):
+            try:
+                return self.submit_request(prompt, temperature, max_tokens, functools.partial(self.query_model_stream, on_text=on_text))
+            except (APIStatusError, APIConnectionError) as e:
+                wait_time = self._retry_delay(e, attempt, " while streaming")
+                # An overload or a dropped connection can also end a stream midway, the retry streams the whole response again
+                if on_restart is not None:
+                    on_restart()
+                time.sleep(wait_time)
+        try:
+            count("model_fallbacks")
+            logger.warn("Falling back to raw HTTP request.")
+            res = self.submit_request(prompt, temperature, max_tokens, self.query_model_requests)
+            # The partial output still holds the last aborted stream, the fallback's response replaces it
+            if on_restart is not None:
+                on_restart()
+            on_text(res)
+            return res
+        except Exception as e:
+            logger.error(f"Anthropic request failed: {e}")
+            raise
+
+
+    async def astream_model(self, prompt: str, on_text: Callable[[str], None], temperature: float = 0.5, max_tokens: int = 4096, on_restart: Optional[Callable[[], None]] = None) -> str:
+        prompt, temperature, max_tokens = self._normalize_inputs(prompt, temperature, max_tokens)
+        for attempt in range(self.MAX_RETRIES-1):
+            try:
+                await self.dispatcher.acquire(estimate_tokens(prompt), max_tokens)
+                return await self.aquery_model_stream(prompt, temperature, max_tokens, on_text)
+            except (APIStatusError, APIConnectionError) as e:
+                wait_time = self._retry_delay(e, attempt, " while streaming")
+                if on_restart is not None:
+                    on_restart()
+                await asyncio.sleep(wait_time)
+        try:
+            count("model_fallbacks")
+            logger.warn("Falling back to raw HTTP request.")
+            await self.dispatcher.acquire(estimate_tokens(prompt), max_tokens)
+            res = await asyncio.to_thread(self.query_model_requests, prompt, temperature, max_tokens)
+            if on_restart is not None:
+                on_restart()
+            on_text(res)
+            return res
+        except Exception as e:
+            logger.error(f"Anthropic request failed: {e}")
+            raise
+
+
+    @traced("model.request")
     def query_model_requests(self, prompt: str, temperature: float = 0.5, max_tokens: int = 4096) -> str:
         try:
             headers = {
@@ -112,13 +218,24 @@ class AnthropicModel(ModelInterface):
             }
 
             try:
-                resp = requests.post(self.api_url, headers=headers, json=body, timeout=30)
+                # Shares the pooled keep-alive connections of the SDK clients instead of handshaking per request
+                resp = self.transport.client.post(self.api_url, headers=headers, json=body)
                 resp.raise_for_status()
-            except requests.exceptions.RequestException as e:
+            except httpx.HTTPStatusError as e:
+                self._settle_usage(prompt, max_tokens)
+                if e.response.status_code in RATE_LIMIT_STATUS_CODES:
+                    self.dispatcher.observe_rate_limit(e.response.headers)
+                logger.error(f"Anthropic fallback HTTP request failed: {e}")
+                raise RuntimeError(f"Anthropic fallback HTTP request failed: {e}")
+            except httpx.HTTPError as e:
+                self._settle_usage(prompt, max_tokens)
                 logger.error(f"Anthropic fallback HTTP request failed: {e}")
                 raise RuntimeError(f"Anthropic fallback HTTP request failed: {e}")
 
+            self.dispatcher.observe_success(resp.headers)
             data = resp.json()
+            usage = data.get("usage") or {}
+            self._settle_usage(prompt, max_tokens, usage.get("input_tokens", 0), usage.get("output_tokens", 0))
             if "content" in data and isinstance(data["content"], List):
                 return "".join(block.get("text", "") for block in data["content"]).strip()
 
@@ -129,24 +246,223 @@ class AnthropicModel(ModelInterface):
             raise
 
 
+    @traced("model.request")
     def query_model(self, prompt: str, temperature: float = 0.5, max_tokens: int = 4096) -> str:
         try:
-            response = self.client.messages.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=max_tokens,
-                temperature=temperature,
-            )
+            try:
+                # Raw response so the rate limit headers can feed the shared controller
+                raw = self.client.messages.with_raw_response.create(
+                    model=self.model,
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                )
+                response = raw.parse()
+            except Exception:
+                self._settle_usage(prompt, max_tokens)
+                raise
+            self.dispatcher.observe_success(raw.headers)
+            self._settle_usage(prompt, max_tokens, response.usage.input_tokens, response.usage.output_tokens)
             res = "".join(block.text for block in response.content if hasattr(block, "text")).strip()
             if not res:
                 raise Exception(f"Anthropic returned empty response.")
             return res
         
-        except RateLimitError as e:
-            logger.warn(f"Anthropic rate limit hit: {e}")
+        except APIStatusError as e:
+            if is_rate_limit_error(e):
+                logger.warn(f"Anthropic rate limit hit: {e}")
+            else:
+                logger.error(f"Anthropic request failed: {e}")
             raise
         
         except Exception as e:
             logger.error(f"Anthropic request failed: {e}")
             raise
-            
\ No newline at end of file
+
+
+    @traced("model.request")
+    async def aquery_model(self, prompt: str, temperature: float = 0.5, max_tokens: int = 4096) -> str:
+        try:
+            try:
+                # Raw response so the rate limit headers can feed the shared controller
+                raw = await self.async_client.messages.with_raw_response.create(
+                    model=self.model,
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                )
+                response = raw.parse()
+            except Exception:
+                self._settle_usage(prompt, max_tokens)
+                raise
+            self.dispatcher.observe_success(raw.headers)
+            self._settle_usage(prompt, max_tokens, response.usage.input_tokens, response.usage.output_tokens)
+            res = "".join(block.text for block in response.content if hasattr(block, "text")).strip()
+            if not res:
+                raise Exception(f"Anthropic returned empty response.")
+            return res
+
+        except APIStatusError as e:
+            if is_rate_limit_error(e):
+                logger.warn(f"Anthropic rate limit hit: {e}")
+            else:
+                logger.error(f"Anthropic request failed: {e}")
+            raise
+
+        except Exception as e:
+            logger.error(f"Anthropic request failed: {e}")
+            raise
+
+
+    def _finish_stream(self, prompt: str, max_tokens: int, response: Any, headers: Mapping[str, str], started: float, first_token: Optional[float]) -> str:
+        self.dispatcher.observe_success(headers)
+        self._settle_usage(prompt, max_tokens, response.usage.input_tokens, response.usage.output_tokens)
+        ttfb = f"{first_token - started:.2f}s" if first_token is not None else "n/a"
+        logger.info(f"Streamed {response.usage.output_tokens} tokens in {time.monotonic() - started:.2f}s, time to first token {ttfb}")
+        res = "".join(block.text for block in response.content if hasattr(block, "text")).strip()
+        if not res:
+            raise Exception(f"Anthropic returned empty response.")
+        return res
+
+
+    @traced("model.request")
+    def query_model_stream(self, prompt: str, temperature: float = 0.5, max_tokens: int = 4096, on_text: Optional[Callable[[str], None]] = None) -> str:
+        """
+        `query_model` over the streaming endpoint: every text delta is handed to `on_text` as it arrives.
+        """
+        started, first_token = time.monotonic(), None
+        try:
+            try:
+                with self.client.messages.stream(
+                    model=self.model,
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                ) as stream:
+                    for text in stream.text_stream:
+                        if first_token is None:
+                            first_token = time.monotonic()
+                            record_span("model.first_token", time.perf_counter() - (first_token - started), first_token - started)
+                            logger.info(f"First token after {first_token - started:.2f}s")
+                        if on_text is not None:
+                            on_text(text)
+                    response = stream.get_final_message()
+                    headers = stream.response.headers
+            except Exception:
+                self._settle_usage(prompt, max_tokens)
+                raise
+            return self._finish_stream(prompt, max_tokens, response, headers, started, first_token)
+
+        except APIStatusError as e:
+            if is_rate_limit_error(e):
+                logger.warn(f"Anthropic rate limit hit: {e}")
+            else:
+                logger.error(f"Anthropic request failed: {e}")
+            raise
+
+        except Exception as e:
+            logger.error(f"Anthropic request failed: {e}")
+            raise
+
+
+    @traced("model.request")
+    async def aquery_model_stream(self, prompt: str, temperature: float = 0.5, max_tokens: int = 4096, on_text: Optional[Callable[[str], None]] = None) -> str:
+        started, first_token = time.monotonic(), None
+        try:
+            try:
+                async with self.async_client.messages.stream(
+                    model=self.model,
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                ) as stream:
+                    async for text in stream.text_stream:
+                        if first_token is None:
+                            first_token = time.monotonic()
+                            record_span("model.first_token", time.perf_counter() - (first_token - started), first_token - started)
+                            logger.info(f"First token after {first_token - started:.2f}s")
+                        if on_text is not None:
+                            on_text(text)
+                    response = await stream.get_final_message()
+                    headers = stream.response.headers
+            except Exception:
+                self._settle_usage(prompt, max_tokens)
+                raise
+            return self._finish_stream(prompt, max_tokens, response, headers, started, first_token)
+
+        except APIStatusError as e:
+            if is_rate_limit_error(e):
+                logger.warn(f"Anthropic rate limit hit: {e}")
+            else:
+                logger.error(f"Anthropic request failed: {e}")
+            raise
+
+        except Exception as e:
+            logger.error(f"Anthropic request failed: {e}")
+            raise
+
+
+    # ----------------------------------------------------------------------------------------------------
+    # MARK: MESSAGE BATCHES API
+    # ----------------------------------------------------------------------------------------------------
+    def _batch_request(self, custom_id: str, prompt: str, temperature: float, max_tokens: int) -> Dict[str, Any]:
+        return {
+            "custom_id": custom_id,
+            "params": {
+                "model": self.model,
+                "messages": [{"role": "user", "content": prompt}],
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+            },
+        }
+
+    def submit_batch(self, prompts: Dict[str, str], temperature: float = 0.5, max_tokens: int = 4096) -> List[str]:
+        """
+        Submit prompts, keyed by custom id, to the Message Batches API. Prompts beyond the per-batch request or
+        size limits are split across several batches.
+        :return: the ids of the submitted batches
+        """
+        chunks: List[List[Dict[str, Any]]] = [[]]
+        chunk_bytes = 0
+        for custom_id, prompt in prompts.items():
+            prompt, temperature, max_tokens = self._normalize_inputs(prompt, temperature, max_tokens)
+            size = len(prompt.encode("utf-8"))
+            if chunks[-1] and (len(chunks[-1]) >= self.MAX_BATCH_REQUESTS or chunk_bytes + size > self.MAX_BATCH_BYTES):
+                chunks.append([])
+                chunk_bytes = 0
+            chunks[-1].append(self._batch_request(custom_id, prompt, temperature, max_tokens))
+            chunk_bytes += size
+        batch_ids = []
+        for requests_chunk in chunks:
+            if not requests_chunk:
+                continue
+            try:
+                batch = self.batch_client.messages.batches.create(requests=requests_chunk)
+            except Exception as e:
+                logger.error(f"Failed to submit message batch: {e}")
+                raise RuntimeError(f"Failed to submit message batch: {e}")
+            logger.info(f"Submitted message batch {batch.id} with {len(requests_chunk)} requests")
+            batch_ids.append(batch.id)
+        return batch_ids
+
+    def batch_ended(self, batch_id: str) -> bool:
+        batch = self.batch_client.messages.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        logger.info(f"Message batch {batch_id} is {batch.processing_status}: {counts.succeeded} succeeded, "
+                    f"{counts.errored} errored, {counts.processing} processing")
+        return batch.processing_status == "ended"
+
+    def batch_results(self, batch_id: str) -> Dict[str, Optional[str]]:
+        """
+        :return: the text of every request in an ended batch keyed by custom id, None for requests that did not succeed
+        """
+        results: Dict[str, Optional[str]] = {}
+        for entry in self.batch_client.messages.batches.results(batch_id):
+            if entry.result.type != "succeeded":
+                logger.warn(f"Batch request {entry.custom_id} {entry.result.type}")
+                results[entry.custom_id] = None
+                continue
+            message = entry.result.message
+            text = "".join(block.text for block in message.content if hasattr(block, "text")).strip()
+            results[entry.custom_id] = text or None
+        return results
@@ -0,0 +1,88 @@
+from concurrent.futures import Future
+from threading import Lock
+from typing import Any, Callable, Mapping, Optional
+from cli_git_changelog.global_rate_limited_dispatcher import RateLimitedTaskDispatcher
+from cli_git_changelog.model_interface.adaptive_rate_controller import AdaptiveRateController
+from cli_git_changelog.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# The process-wide rate limiter of the Anthropic API. It lives apart from the model so configuring it, e.g. from
+# the CLI before any git work, does not import the SDK.
+
+
+class AnthropicAPIReliantDispatcher:
+    _instance = None
+    _lock = Lock()
+    REQUESTS_PER_MINUTE = 50
+    INPUT_TOKENS_PER_MINUTE: Optional[int] = None
+    OUTPUT_TOKENS_PER_MINUTE: Optional[int] = None
+    MAX_WORKERS = 10
+
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:  # double-checked locking
+                    instance = super().__new__(cls)
+                    instance.dispatcher = RateLimitedTaskDispatcher(
+                        requests_per_minute=cls.REQUESTS_PER_MINUTE,
+                        input_tokens_per_minute=cls.INPUT_TOKENS_PER_MINUTE,
+                        output_tokens_per_minute=cls.OUTPUT_TOKENS_PER_MINUTE,
+                        max_workers=cls.MAX_WORKERS,
+                    )
+                    instance.controller = AdaptiveRateController(instance.dispatcher, {
+                        "requests": cls.REQUESTS_PER_MINUTE,
+                        "input-tokens": cls.INPUT_TOKENS_PER_MINUTE,
+                        "output-tokens": cls.OUTPUT_TOKENS_PER_MINUTE,
+                    })
+                    cls._instance = instance
+                    logger.info(
+                        f"Anthropic API dispatcher initialized with {cls.REQUESTS_PER_MINUTE} requests/min, "
+                        f"{cls.INPUT_TOKENS_PER_MINUTE or 'unlimited'} input tokens/min, "
+                        f"{cls.OUTPUT_TOKENS_PER_MINUTE or 'unlimited'} output tokens/min and {cls.MAX_WORKERS} workers."
+                    )
+                    logger.warn("This is a singleton, it will not be recreated if called again. If you see this message multiple times, something is very wrong.")
+        return cls._instance
+
+    @classmethod
+    def configure(cls,
+                  requests_per_minute: Optional[int] = None,
+                  input_tokens_per_minute: Optional[int] = None,
+                  output_tokens_per_minute: Optional[int] = None,
+                  max_workers: Optional[int] = None) -> None:
+        """
+        Set the budgets the singleton is created with. Must be called before the first AnthropicModel is built.
+        """
+        with cls._lock:
+            if cls._instance is not None:
+                logger.warn("Anthropic API dispatcher already initialized, ignoring new rate limit configuration.")
+                return
+            if requests_per_minute is not None:
+                cls.REQUESTS_PER_MINUTE = requests_per_minute
+            if input_tokens_per_minute is not None:
+                cls.INPUT_TOKENS_PER_MINUTE = input_tokens_per_minute
+            if output_tokens_per_minute is not None:
+                cls.OUTPUT_TOKENS_PER_MINUTE = output_tokens_per_minute
+            if max_workers is not None:
+                cls.MAX_WORKERS = max_workers
+
+    def submit(self, method: Callable[..., Any], *args, **kwargs) -> Future:
+        return self.dispatcher.submit(method, *args, **kwargs)
+
+    def submit_with_cost(self, input_tokens: int, output_tokens: int, method: Callable[..., Any], *args, **kwargs) -> Future:
+        return self.dispatcher.submit_with_cost(input_tokens, output_tokens, method, *args, **kwargs)
+
+    async def acquire(self, input_tokens: int = 0, output_tokens: int = 0) -> None:
+        await self.dispatcher.acquire_async(input_tokens, output_tokens)
+
+    def settle(self, reserved_input: int, reserved_output: int, input_tokens: int, output_tokens: int) -> None:
+        self.dispatcher.settle(reserved_input, reserved_output, input_tokens, output_tokens)
+
+    def observe_success(self, headers: Mapping[str, str]) -> None:
+        self.controller.on_success(headers)
+
+    def observe_rate_limit(self, headers: Optional[Mapping[str, str]] = None) -> float:
+        return self.controller.on_rate_limited(headers)
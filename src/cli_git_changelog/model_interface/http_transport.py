@@ -0,0 +1,180 @@
+import importlib.util
+import time
+from threading import Lock
+from typing import TYPE_CHECKING, Any, Dict, Optional
+from cli_git_changelog.utils.logger import get_logger
+from cli_git_changelog.utils.tracing import count, record_span
+
+if TYPE_CHECKING:
+    import httpx
+
+
+logger = get_logger(__name__)
+
+
+# httpcore trace events that mark the moment a request got a connection out of the pool: a new connection
+# starts connecting, a reused one starts sending headers right away
+NEW_CONNECTION_EVENT = "connection.connect_tcp.started"
+CONNECTION_ACQUIRED_EVENTS = (NEW_CONNECTION_EVENT, "http11.send_request_headers.started", "http2.send_request_headers.started")
+
+
+class PoolWaitProbe:
+    """
+    httpcore `trace` extension of one request: the time from sending the request to its first connection
+    event is the time it spent waiting for a free connection in the pool.
+    """
+
+    def __init__(self, transport: "SharedHttpTransport") -> None:
+        self.transport = transport
+        self.started = time.perf_counter()
+        self.acquired = False
+
+    def __call__(self, event: str, info: Dict[str, Any]) -> None:
+        if self.acquired or event not in CONNECTION_ACQUIRED_EVENTS:
+            return
+        self.acquired = True
+        wait = time.perf_counter() - self.started
+        record_span("http.pool_wait", self.started, wait)
+        if event == NEW_CONNECTION_EVENT:
+            count("http_connections")
+        self.transport.record_request(wait, event == NEW_CONNECTION_EVENT)
+
+
+class AsyncPoolWaitProbe(PoolWaitProbe):
+    # The async connection pool awaits its trace callback
+    async def __call__(self, event: str, info: Dict[str, Any]) -> None:
+        super().__call__(event, info)
+
+
+class SharedHttpTransport:
+    """
+    One pooled keep-alive HTTP client per process, shared by every model instance and worker: the SDK clients are
+    built on it and the raw HTTP fallback posts through it, so connections (and their TLS sessions) are reused
+    instead of handshaking per request. The pool is sized to the number of requests the dispatcher runs at once,
+    so no request waits for a connection the rate limiter already let it have.
+    """
+    _instance = None
+    _lock = Lock()
+    POOL_SIZE = 10
+    CONNECT_TIMEOUT = 10.0
+    READ_TIMEOUT = 600.0   # streamed release changelogs can take minutes, matches the SDK default
+    HTTP2 = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:  # double-checked locking
+                    instance = super().__new__(cls)
+                    instance._stats_lock = Lock()
+                    instance.requests = 0
+                    instance.new_connections = 0
+                    instance.waited = 0
+                    instance.total_wait = 0.0
+                    instance.max_wait = 0.0
+                    instance._client = None
+                    instance._async_client = None
+                    cls._instance = instance
+                    logger.info(
+                        f"HTTP transport initialized with a pool of {cls.POOL_SIZE} connections over HTTP/{'2' if cls.HTTP2 else '1.1'}, "
+                        f"{cls.CONNECT_TIMEOUT}s connect and {cls.READ_TIMEOUT}s read timeouts."
+                    )
+        return cls._instance
+
+    @classmethod
+    def configure(cls,
+                  pool_size: Optional[int] = None,
+                  connect_timeout: Optional[float] = None,
+                  read_timeout: Optional[float] = None,
+                  http2: Optional[bool] = None) -> None:
+        """
+        Set the pool size, timeouts and protocol the shared clients are created with. Must be called before the
+        first AnthropicModel is built.
+        """
+        with cls._lock:
+            if cls._instance is not None:
+                logger.warn("HTTP transport already initialized, ignoring new configuration.")
+                return
+            if http2 and importlib.util.find_spec("h2") is None:
+                logger.error("HTTP/2 needs the h2 package, install cli_git_changelog[http2]")
+                raise RuntimeError("HTTP/2 needs the h2 package, install cli_git_changelog[http2]")
+            if pool_size is not None:
+                cls.POOL_SIZE = pool_size
+            if connect_timeout is not None:
+                cls.CONNECT_TIMEOUT = connect_timeout
+            if read_timeout is not None:
+                cls.READ_TIMEOUT = read_timeout
+            if http2 is not None:
+                cls.HTTP2 = http2
+
+    # httpx is imported when the first client is built, so configuring the transport stays cheap
+    @property
+    def timeout(self) -> "httpx.Timeout":
+        import httpx
+        return httpx.Timeout(self.READ_TIMEOUT, connect=self.CONNECT_TIMEOUT)
+
+    def _client_options(self) -> Dict[str, Any]:
+        import httpx
+        return {
+            "timeout": self.timeout,
+            "limits": httpx.Limits(max_connections=self.POOL_SIZE, max_keepalive_connections=self.POOL_SIZE),
+            "http2": self.HTTP2,
+        }
+
+    def _trace_sync(self, request: "httpx.Request") -> None:
+        request.extensions["trace"] = PoolWaitProbe(self)
+
+    async def _trace_async(self, request: "httpx.Request") -> None:
+        request.extensions["trace"] = AsyncPoolWaitProbe(self)
+
+    @property
+    def client(self) -> "httpx.Client":
+        import httpx
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(event_hooks={"request": [self._trace_sync]}, **self._client_options())
+        return self._client
+
+    def async_client(self) -> "httpx.AsyncClient":
+        """
+        The pooled async client of the running event loop. Its connections belong to the loop that opened them,
+        so a later loop gets a fresh client.
+        """
+        import asyncio
+        import httpx
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client[0] is not loop:
+            self._async_client = (loop, httpx.AsyncClient(event_hooks={"request": [self._trace_async]}, **self._client_options()))
+        return self._async_client[1]
+
+    def record_request(self, wait: float, new_connection: bool) -> None:
+        with self._stats_lock:
+            self.requests += 1
+            self.new_connections += new_connection
+            if wait > 0.001:
+                self.waited += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "waited": self.waited,
+                "total_wait": self.total_wait,
+                "max_wait": self.max_wait,
+            }
+
+    @classmethod
+    def log_stats(cls) -> None:
+        if cls._instance is None:
+            return
+        stats = cls._instance.stats()
+        if not stats["requests"]:
+            return
+        reused = 1 - stats["new_connections"] / stats["requests"]
+        logger.info(
+            f"HTTP pool: {stats['requests']} requests over {stats['new_connections']} connections ({reused:.0%} reused), "
+            f"{stats['waited']} waited for a connection, {stats['total_wait']:.2f}s in total and {stats['max_wait']:.2f}s at most"
+        )
@@ -1,5 +1,5 @@
 from abc import abstractmethod
-from typing import Protocol, runtime_checkable, Union
+from typing import Callable, Optional, Protocol, runtime_checkable, Union
 
 @runtime_checkable
 class ModelInterface(Protocol):
@@ -32,3 +32,51 @@ class ModelInterface(Protocol):
         """
         ...
 
+    @abstractmethod
+    async def acall_model(self, prompt: str, temperature: Union[float, None] = 0.5, max_tokens: Union[int, None] = 4096) -> Union[str, None]:
+        """
+        Asynchronous counterpart of `call_model`, so many requests can be in flight from a single thread.
+        
+        Args:
+            prompt: The input prompt to send to the model
+            temperature: Controls randomness in the output (0.0 to 1.0)
+            max_tokens: Maximum number of tokens to generate
+            
+        Returns:
+            The model's response as a string
+        """
+        ...
+
+    @abstractmethod
+    def stream_model(self, prompt: str, on_text: Callable[[str], None], temperature: Union[float, None] = 0.5, max_tokens: Union[int, None] = 4096, on_restart: Optional[Callable[[], None]] = None) -> Union[str, None]:
+        """
+        Call the model and hand every piece of the response to `on_text` as soon as it arrives.
+        
+        Args:
+            prompt: The input prompt to send to the model
+            on_text: Called with each chunk of generated text, in order
+            temperature: Controls randomness in the output (0.0 to 1.0)
+            max_tokens: Maximum number of tokens to generate
+            on_restart: Called before a retry streams the response again from the start
+            
+        Returns:
+            The model's full response as a string
+        """
+        ...
+
+    @abstractmethod
+    async def astream_model(self, prompt: str, on_text: Callable[[str], None], temperature: Union[float, None] = 0.5, max_tokens: Union[int, None] = 4096, on_restart: Optional[Callable[[], None]] = None) -> Union[str, None]:
+        """
+        Asynchronous counterpart of `stream_model`.
+        
+        Args:
+            prompt: The input prompt to send to the model
+            on_text: Called with each chunk of generated text, in order
+            temperature: Controls randomness in the output (0.0 to 1.0)
+            max_tokens: Maximum number of tokens to generate
+            on_restart: Called before a retry streams the response again from the start
+            
+        Returns:
+            The model's full response as a string
+        """
+        ...
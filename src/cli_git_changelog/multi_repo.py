@@ -0,0 +1,165 @@
+import shlex
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Union
+from cli_git_changelog.formatters.changelog_prompt_formatters import build_cross_repo_release_prompt
+from cli_git_changelog.formatters.prompt_packer import DEFAULT_CONTEXT_BUDGET
+from cli_git_changelog.generate_changelog import API_URL, call_model, create_changelog, stream_model_to_file
+from cli_git_changelog.global_rate_limited_dispatcher import current_tenant
+from cli_git_changelog.model_interface import get_model
+from cli_git_changelog.summary_cache import SummaryCache, DEFAULT_CACHE_MAX_BYTES
+from cli_git_changelog.tree_reduce import tree_reduce, DEFAULT_FAN_IN, RELEASE_MAX_TOKENS
+from cli_git_changelog.utils.atomic_write import atomic_write_text
+from cli_git_changelog.utils.context_executor import ContextThreadPoolExecutor
+from cli_git_changelog.utils.logger import get_logger
+from cli_git_changelog.utils.tracing import count, span
+
+
+logger = get_logger(__name__)
+
+
+# ----------------------------------------------------------------------------------------------------
+# MARK: MULTI-REPOSITORY RUNS
+# ----------------------------------------------------------------------------------------------------
+# Every repository of a release train is summarized in one process: the repositories are extracted and
+# summarized in parallel, and all of their model calls go through the one process-wide dispatcher, queued per
+# repository and started round-robin. The shared rate limit, not the number of repositories, sets the pace.
+
+
+DEFAULT_REPO_WORKERS = 8
+
+
+class RepoSpec(NamedTuple):
+    name: str                               # also the name of its output directory
+    path: Path
+    revision_range: Optional[str] = None    # overrides --range for this repository
+
+
+def load_repo_manifest(manifest: Union[str, Path]) -> List[RepoSpec]:
+    """
+    Read a manifest of one repository per line: its path, relative to the manifest's directory, optionally
+    followed by the revision range to summarize in it (e.g. `services/billing v2.3.0..HEAD`). Blank lines and
+    `#` comments are skipped. Each repository writes to a directory named after its own, so those must be unique.
+    """
+    manifest = Path(manifest)
+    try:
+        lines = manifest.read_text().splitlines()
+    except OSError as e:
+        logger.error(f"Error reading repository manifest {manifest}: {e}")
+        raise RuntimeError(f"Error reading repository manifest {manifest}: {e}")
+
+    repos: List[RepoSpec] = []
+    for number, line in enumerate(lines, 1):
+        fields = shlex.split(line, comments=True)
+        if not fields:
+            continue
+        if len(fields) > 2:
+            logger.error(f"{manifest}:{number}: expected a repository path and an optional revision range, got {line!r}")
+            raise RuntimeError(f"{manifest}:{number}: expected a repository path and an optional revision range, got {line!r}")
+        path = (manifest.parent / Path(fields[0]).expanduser()).resolve()
+        duplicate = next((repo for repo in repos if repo.name == path.name), None)
+        if duplicate is not None:
+            logger.error(f"{manifest}:{number}: {path} and {duplicate.path} would share the output directory {path.name}")
+            raise RuntimeError(f"{manifest}:{number}: {path} and {duplicate.path} would share the output directory {path.name}")
+        repos.append(RepoSpec(path.name, path, fields[1] if len(fields) > 1 else None))
+    if not repos:
+        logger.error(f"No repositories listed in {manifest}")
+        raise RuntimeError(f"No repositories listed in {manifest}")
+    return repos
+
+
+def summarize_release_train(api_key: str,
+                            model: str,
+                            release_changelogs: Dict[str, str],
+                            path: Path,
+                            cache: Optional[SummaryCache] = None,
+                            fan_in: int = DEFAULT_FAN_IN,
+                            context_budget: int = DEFAULT_CONTEXT_BUDGET,
+                            workers: int = 1,
+                            stream: bool = True) -> Optional[str]:
+    """
+    Merge the release changelogs of the repositories into one cross-repository release summary at `path`.
+    Many repositories are first merged in groups, like the commit summaries of a large range.
+    :param release_changelogs: repository name -> its release changelog, in manifest order
+    """
+    LLM_model = get_model(api_url=API_URL, api_key=api_key, model=model)
+    labelled = [f"{name}:\n{changelog}" for name, changelog in release_changelogs.items()]
+
+    def summarize(prompts: List[str], max_tokens: int) -> List[Optional[str]]:
+        with ContextThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda prompt: call_model(LLM_model, prompt, max_tokens=max_tokens, cache=cache, kind="batch"), prompts))
+
+    def finalize(prompt: str) -> Optional[str]:
+        return stream_model_to_file(LLM_model, prompt, path, max_tokens=RELEASE_MAX_TOKENS, cache=cache, kind="batch")
+
+    with span("reduce.cross_repo"):
+        summary = tree_reduce(labelled, summarize, fan_in, context_budget, None, finalize if stream else None, build_cross_repo_release_prompt)
+    if summary is not None and not stream:
+        atomic_write_text(path, summary)
+        logger.info(f"Wrote cross-repository release summary to {path}")
+    return summary
+
+
+def create_multi_repo_changelog(api_key: str,
+                                model: str,
+                                repos: List[RepoSpec],
+                                output_dir: Path,
+                                n_commits: int,
+                                concurrency: bool,
+                                max_workers_per_commit: int,
+                                max_commit_workers: int,
+                                repo_workers: int = DEFAULT_REPO_WORKERS,
+                                cross_repo_summary: bool = False,
+                                **options: Any) -> None:
+    """
+    Run `create_changelog` for every repository, `repo_workers` at a time, each into `<output_dir>/<name>`.
+    :param cross_repo_summary: also merge the release changelogs into `<output_dir>/release-<timestamp>.md`
+    :param options: the remaining keyword arguments of `create_changelog`, applied to every repository
+    """
+    def run_repo(repo: RepoSpec) -> Optional[str]:
+        # Each repository runs in its own copy of the context, so its calls are queued under its own tenant
+        current_tenant.set(repo.name)
+        repo_options = dict(options, revision_range=repo.revision_range or options.get("revision_range"))
+        with span("repo", repo=repo.name):
+            return create_changelog(api_key, model, str(repo.path), output_dir / repo.name, n_commits, concurrency,
+                                    max_workers_per_commit, max_commit_workers, **repo_options)
+
+    logger.info(f"Summarizing {len(repos)} repositories, {min(repo_workers, len(repos))} at a time")
+    release_changelogs: Dict[str, Optional[str]] = {}
+    failed: List[str] = []
+    with ContextThreadPoolExecutor(max_workers=repo_workers, thread_name_prefix="repo") as executor:
+        futures = {repo.name: executor.submit(run_repo, repo) for repo in repos}
+        # Manifest order, so the cross-repository prompt (and its cache key) does not depend on which finished first
+        for name, future in futures.items():
+            try:
+                release_changelogs[name] = future.result()
+                count("repositories", status="summarized")
+            except Exception as e:
+                failed.append(name)
+                count("repositories", status="failed")
+                logger.error(f"Error creating the changelog of {name}: {e}")
+
+    if cross_repo_summary:
+        if failed:
+            logger.warning(f"Skipping the cross-repository release summary, it would be missing {', '.join(failed)}")
+        else:
+            missing = [name for name, changelog in release_changelogs.items() if changelog is None]
+            if missing:
+                logger.warning(f"No release changelog for {', '.join(missing)}, leaving them out of the cross-repository release summary")
+            written = {name: changelog for name, changelog in release_changelogs.items() if changelog is not None}
+            if written:
+                cache_dir = options.get("cache_dir")
+                cache = SummaryCache.shared(cache_dir, options.get("cache_max_bytes", DEFAULT_CACHE_MAX_BYTES)) if cache_dir is not None else None
+                summarize_release_train(api_key,
+                                        model,
+                                        written,
+                                        output_dir / f"release-{datetime.now().strftime('%Y%m%dT%H%M%S')}.md",
+                                        cache,
+                                        options.get("fan_in", DEFAULT_FAN_IN),
+                                        options.get("context_budget", DEFAULT_CONTEXT_BUDGET),
+                                        max_commit_workers * max_workers_per_commit if concurrency else 1,
+                                        options.get("stream", True))
+
+    if failed:
+        logger.error(f"{len(failed)} of {len(repos)} repositories failed: {', '.join(failed)}")
+        raise RuntimeError(f"{len(failed)} of {len(repos)} repositories failed: {', '.join(failed)}")
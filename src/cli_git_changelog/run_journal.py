@@ -0,0 +1,100 @@
+import json
+import os
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from cli_git_changelog.summary_cache import CACHE_KINDS, SummaryCache
+from cli_git_changelog.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+JOURNAL_FILENAME = "journal.jsonl"
+
+
+class RunJournal:
+    """
+    Append-only JSONL record of a run, kept in its run directory. The first line describes the run (range, head,
+    model, ...), every later line is one completed model call: its kind (file, commit, batch for the reduce steps),
+    the hash of its inputs (the summary cache key) and its result. Lines are flushed and synced as they are written,
+    so a crash loses at most the call in flight, and a torn last line is skipped on load.
+
+    It stands in for the summary cache: reads replay the journal first and fall through to the persistent cache,
+    writes go to both. Replaying a run therefore only sends the calls that never completed.
+    """
+
+    def __init__(self, run_dir: Path, cache: Optional[SummaryCache] = None) -> None:
+        self.run_dir = Path(run_dir)
+        self.path = self.run_dir / JOURNAL_FILENAME
+        self.cache = cache
+        self.header: Optional[Dict[str, Any]] = None
+        self._results: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+        self.replayed: Counter = Counter()
+        if self.path.exists():
+            self._load()
+
+    def _load(self) -> None:
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            complete = data.rfind(b"\n") + 1
+            if complete < len(data):
+                # A torn last line: cut it off so later appends start on a fresh line
+                logger.warning(f"Dropping the unfinished last line of {self.path}, the run was interrupted while writing it")
+                f.truncate(complete)
+        for number, line in enumerate(data[:complete].decode("utf-8", errors="replace").splitlines(), 1):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping unreadable line {number} of {self.path}")
+                continue
+            if entry.get("type") == "run":
+                self.header = entry
+            elif entry.get("type") == "summary":
+                self._results[(entry["kind"], entry["key"])] = entry["result"]
+        logger.info(f"Loaded run journal {self.path} with {len(self._results)} completed summaries")
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        line = json.dumps(entry) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def start(self, header: Dict[str, Any]) -> None:
+        """Record what a new run covers, so `--resume` can pick up the same range later."""
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        self.header = dict(header, type="run")
+        self._append(self.header)
+
+    def get(self, kind: str, key: str) -> Optional[str]:
+        with self._lock:
+            result = self._results.get((kind, key))
+            if result is not None:
+                self.replayed[kind] += 1
+        if result is None and self.cache is not None:
+            result = self.cache.get(kind, key)
+            if result is not None:
+                # Journal cache hits too, so the run directory alone is enough to replay the run
+                self._record(kind, key, result)
+        return result
+
+    def _record(self, kind: str, key: str, value: str) -> None:
+        with self._lock:
+            self._results[(kind, key)] = value
+        self._append({"type": "summary", "kind": kind, "key": key, "result": value})
+
+    def put(self, kind: str, key: str, value: str) -> None:
+        self._record(kind, key, value)
+        if self.cache is not None:
+            self.cache.put(kind, key, value)
+
+    def log_stats(self) -> None:
+        with self._lock:
+            stats = ", ".join(f"{kind}: {self.replayed[kind]}" for kind in CACHE_KINDS)
+        logger.info(f"Run journal {self.path} replayed {stats}")
+        if self.cache is not None:
+            self.cache.log_stats()
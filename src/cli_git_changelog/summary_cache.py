@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Optional, Union
+from cli_git_changelog.formatters.changelog_prompt_formatters import PROMPT_BUILDER_VERSION
+from cli_git_changelog.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+CACHE_KINDS = ("file", "commit", "batch")
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+
+def default_cache_dir() -> Path:
+    """
+    Resolve the default cache location, honouring XDG_CACHE_HOME when it is set.
+    """
+    base = os.getenv("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "cli_git_changelog"
+
+
+class SummaryCache:
+    """
+    Content-addressed on-disk cache of model summaries. Entries are keyed on the model, the prompt-builder
+    version and a hash of the prompt, and stored under one sub-directory per kind (file, commit, batch).
+    Reads refresh an entry's mtime so eviction can drop the least recently used entries once the cache
+    grows past `max_bytes`.
+    """
+    _shared: Dict[Path, "SummaryCache"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, cache_dir: Union[str, Path], max_bytes: int = DEFAULT_CACHE_MAX_BYTES) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+        for kind in CACHE_KINDS:
+            (self.cache_dir / kind).mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def shared(cls, cache_dir: Union[str, Path], max_bytes: int = DEFAULT_CACHE_MAX_BYTES) -> "SummaryCache":
+        """
+        The process-wide instance of `cache_dir`, so runs in one process (several repositories, daemon jobs) share
+        its size accounting instead of each rescanning the directory.
+        """
+        cache_dir = Path(cache_dir).resolve()
+        with cls._shared_lock:
+            if cache_dir not in cls._shared:
+                cls._shared[cache_dir] = cls(cache_dir, max_bytes)
+            return cls._shared[cache_dir]
+
+    @staticmethod
+    def make_key(model: str, prompt: str, max_tokens: int, temperature: float) -> str:
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        material = json.dumps([model, PROMPT_BUILDER_VERSION, max_tokens, temperature, prompt_hash])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _path(self, kind: str, key: str) -> Path:
+        if kind not in CACHE_KINDS:
+            raise ValueError(f"Unknown cache kind: {kind}")
+        return self.cache_dir / kind / key[:2] / f"{key}.md"
+
+    def get(self, kind: str, key: str) -> Optional[str]:
+        path = self._path(kind, key)
+        try:
+            value = path.read_text(encoding="utf-8")
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses[kind] += 1
+            return None
+        with self._lock:
+            self.hits[kind] += 1
+        return value
+
+    def put(self, kind: str, key: str, value: str) -> None:
+        path = self._path(kind, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            tmp.write_text(value, encoding="utf-8")
+            # An overwritten entry's old size is no longer part of the cache
+            replaced = path.stat().st_size if path.exists() else 0
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Failed to write cache entry {path}: {e}")
+            return
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += path.stat().st_size - replaced
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        return [p for kind in CACHE_KINDS for p in (self.cache_dir / kind).glob("*/*.md")]
+
+    def _scan_size(self) -> int:
+        return sum(p.stat().st_size for p in self._entries())
+
+    def _evict(self) -> None:
+        # Drop least recently used entries until the cache is back to 90% of its budget
+        target = int(self.max_bytes * 0.9)
+        entries = sorted(((p.stat().st_mtime, p.stat().st_size, p) for p in self._entries()), key=lambda e: e[0])
+        size = sum(e[1] for e in entries)
+        evicted = 0
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            size -= entry_size
+            evicted += 1
+        self._size = size
+        logger.info(f"Summary cache evicted {evicted} entries, now {size} bytes")
+
+    def log_stats(self) -> None:
+        with self._lock:
+            stats = ", ".join(f"{kind}: {self.hits[kind]} hits / {self.misses[kind]} misses" for kind in CACHE_KINDS)
+        logger.info(f"Summary cache ({self.cache_dir}) {stats}")
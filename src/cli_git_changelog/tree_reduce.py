@@ -0,0 +1,139 @@
+from collections import Counter
+from pathlib import PurePosixPath
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from cli_git_changelog.formatters.changelog_prompt_formatters import build_full_commit_batch_changelog_prompt, build_partial_release_changelog_prompt
+from cli_git_changelog.formatters.prompt_packer import DEFAULT_CONTEXT_BUDGET
+from cli_git_changelog.git_interface_strategies import get_commit_authors
+from cli_git_changelog.utils.tokens import estimate_tokens
+from cli_git_changelog.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# ----------------------------------------------------------------------------------------------------
+# MARK: HIERARCHICAL RELEASE SUMMARY
+# ----------------------------------------------------------------------------------------------------
+# Commit summaries are merged in a tree: each level summarizes chunks of at most `fan_in` summaries (and at
+# most a context budget of tokens) in parallel, until what is left fits the final release prompt. The number
+# of sequential model calls grows with log(commits) rather than all of them landing in one giant prompt.
+
+
+DEFAULT_FAN_IN = 8
+GROUP_BY_CHOICES = ("time", "directory", "author")
+PARTIAL_MAX_TOKENS = 4096
+RELEASE_MAX_TOKENS = 8192
+
+# Summarizes a list of prompts in parallel with the given max_tokens, None for the ones that failed
+Summarizer = Callable[[List[str], int], List[Optional[str]]]
+AsyncSummarizer = Callable[[List[str], int], Awaitable[List[Optional[str]]]]
+# Runs the final release prompt in place of the summarizer, e.g. to stream it into its output file
+Finalizer = Callable[[str], Optional[str]]
+AsyncFinalizer = Callable[[str], Awaitable[Optional[str]]]
+# Builds the final release prompt from what is left after the merges
+FinalPromptBuilder = Callable[[List[str]], str]
+
+
+def top_level_directory(paths: Iterable[str]) -> str:
+    """The top-level directory most of `paths` live in, "." for files at the repository root."""
+    dirs = Counter(PurePosixPath(p).parts[0] + "/" if len(PurePosixPath(p).parts) > 1 else "." for p in paths)
+    return dirs.most_common(1)[0][0] if dirs else "."
+
+
+def resolve_commit_groups(group_by: str, shas: List[str], directories: Dict[str, str], working_directory: str) -> Optional[List[str]]:
+    """
+    :param directories: sha -> top-level directory, recorded while the commits were extracted
+    :return: the group of every sha, or None to keep log order (time) chunks
+    """
+    if group_by == "directory":
+        return [f"changes under {directories.get(sha, '.')}" for sha in shas]
+    if group_by == "author":
+        authors = get_commit_authors(shas, working_directory)
+        return [f"changes by {authors.get(sha, 'unknown')}" for sha in shas]
+    return None
+
+
+def _fits(summaries: List[str], fan_in: int, context_budget: int) -> bool:
+    return len(summaries) <= fan_in and sum(estimate_tokens(s) for s in summaries) <= context_budget
+
+
+def plan_chunks(summaries: List[str], groups: Optional[List[str]], fan_in: int, context_budget: int) -> List[Tuple[str, List[str]]]:
+    """
+    Split one level of the tree into chunks of at most `fan_in` summaries and `context_budget` tokens. With
+    groups, a chunk only holds summaries of one group (groups in order of first appearance); without, chunks
+    are contiguous runs in log order, i.e. time windows.
+    :return: (scope, summaries) per chunk
+    """
+    ordered: Dict[str, List[str]] = {}
+    for idx, summary in enumerate(summaries):
+        ordered.setdefault(groups[idx] if groups else "", []).append(summary)
+
+    chunks: List[Tuple[str, List[str]]] = []
+    for scope, members in ordered.items():
+        chunk: List[str] = []
+        tokens = 0
+        for summary in members:
+            size = estimate_tokens(summary)
+            # A chunk always takes a second summary so every level strictly shrinks
+            if len(chunk) >= fan_in or (len(chunk) > 1 and tokens + size > context_budget):
+                chunks.append((scope, chunk))
+                chunk, tokens = [], 0
+            chunk.append(summary)
+            tokens += size
+        if chunk:
+            chunks.append((scope, chunk))
+    return chunks
+
+
+def _next_level(layer: List[str], groups: Optional[List[str]], level: int, fan_in: int, context_budget: int) -> List[str]:
+    chunks = plan_chunks(layer, groups if level == 0 else None, fan_in, context_budget)
+    logger.info(f"Tree reduce level {level}: merging {len(layer)} summaries in {len(chunks)} chunks")
+    return [build_partial_release_changelog_prompt(chunk, scope) for scope, chunk in chunks]
+
+
+def tree_reduce(commit_summaries: List[str],
+                summarize: Summarizer,
+                fan_in: int = DEFAULT_FAN_IN,
+                context_budget: int = DEFAULT_CONTEXT_BUDGET,
+                groups: Optional[List[str]] = None,
+                finalize: Optional[Finalizer] = None,
+                build_final: FinalPromptBuilder = build_full_commit_batch_changelog_prompt) -> Optional[str]:
+    """
+    Reduce commit summaries (in log order) to one release changelog. Small releases go straight to the
+    release prompt, exactly as before.
+    :param groups: optional group of every summary, only used to chunk the first level
+    :param finalize: optional runner of the release prompt, instead of `summarize` with RELEASE_MAX_TOKENS
+    :param build_final: builder of the release prompt, e.g. one that merges the releases of several repositories
+    :return: the release changelog, or None if any merge failed
+    """
+    fan_in = max(fan_in, 2)
+    layer, level = commit_summaries, 0
+    while len(layer) > 1 and not _fits(layer, fan_in, context_budget):
+        partials = summarize(_next_level(layer, groups, level, fan_in, context_budget), PARTIAL_MAX_TOKENS)
+        if any(p is None for p in partials):
+            logger.error(f"Tree reduce level {level} failed for {sum(p is None for p in partials)} chunks")
+            return None
+        layer, level = partials, level + 1
+    if finalize is not None:
+        return finalize(build_final(layer))
+    return summarize([build_final(layer)], RELEASE_MAX_TOKENS)[0]
+
+
+async def atree_reduce(commit_summaries: List[str],
+                       summarize: AsyncSummarizer,
+                       fan_in: int = DEFAULT_FAN_IN,
+                       context_budget: int = DEFAULT_CONTEXT_BUDGET,
+                       groups: Optional[List[str]] = None,
+                       finalize: Optional[AsyncFinalizer] = None) -> Optional[str]:
+    """asyncio counterpart of `tree_reduce`."""
+    fan_in = max(fan_in, 2)
+    layer, level = commit_summaries, 0
+    while len(layer) > 1 and not _fits(layer, fan_in, context_budget):
+        partials = await summarize(_next_level(layer, groups, level, fan_in, context_budget), PARTIAL_MAX_TOKENS)
+        if any(p is None for p in partials):
+            logger.error(f"Tree reduce level {level} failed for {sum(p is None for p in partials)} chunks")
+            return None
+        layer, level = partials, level + 1
+    if finalize is not None:
+        return await finalize(build_full_commit_batch_changelog_prompt(layer))
+    return (await summarize([build_full_commit_batch_changelog_prompt(layer)], RELEASE_MAX_TOKENS))[0]
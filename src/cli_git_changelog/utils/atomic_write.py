@@ -0,0 +1,19 @@
+import os
+import threading
+from pathlib import Path
+from typing import Union
+
+
+def atomic_write_text(path: Union[str, Path], text: str) -> None:
+    """
+    Write `text` to a temporary file next to `path` and rename it into place, so readers (and a resumed run)
+    only ever see the previous file or the complete new one.
+    """
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
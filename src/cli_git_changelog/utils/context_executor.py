@@ -0,0 +1,13 @@
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    ThreadPoolExecutor whose tasks run in a copy of the submitter's context variables, like asyncio tasks do, so
+    the dispatcher tenant and the open trace span carry over into the worker threads.
+    """
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
@@ -1,12 +1,25 @@
+import atexit
+import copy
+import hashlib
 import logging
 import json
+import queue
+import threading
 from datetime import datetime
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 import os
+from typing import Optional
 from cli_git_changelog import resolve_project_source
 
 
 _run_id = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+# Overridable through the environment, like QUIET_MODE and DISABLE_FILE_LOGGING
+DEFAULT_LOG_MAX_MESSAGE_CHARS = 2000            # longer messages are cut and hashed, 0 keeps them whole
+DEFAULT_LOG_MAX_BYTES = 10 * 1024 * 1024        # size at which the log file is rotated
+DEFAULT_LOG_BACKUP_COUNT = 5                    # rotated log files kept
+DEFAULT_LOG_QUEUE_SIZE = 10_000                 # records waiting for the writer thread
 RESET = "\033[0m"
 COLORS = {
     'DEBUG': "\033[36m",    # Cyan
@@ -25,48 +38,199 @@ class ColorFormatter(logging.Formatter):
         return f"{color}{message}{RESET}"
 
 
-class DataInjectingFormatter(logging.Formatter):
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, so log files can be filtered with jq or loaded by a log shipper."""
+
+    def __init__(self, max_chars: int = 0) -> None:
+        super().__init__()
+        self.max_chars = max_chars
+
     def format(self, record):
-        base = super().format(record)
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
         if hasattr(record, 'data'):
             try:
-                serialized = json.dumps(record.data, indent=4)
+                serialized = json.dumps(record.data)
+                fits = not self.max_chars or len(serialized) <= self.max_chars
+                entry["data"] = record.data if fits else truncate_payload(serialized, self.max_chars)
             except Exception as e:
-                serialized = str(e)
-            return f"{base}\n [data] {serialized}"
-        return base
+                entry["data"] = str(e)
+        return json.dumps(entry)
+
+
+def truncate_payload(text: str, max_chars: int) -> str:
+    """
+    :return: `text` cut to `max_chars` characters, followed by how much was cut and a hash of the whole text, so
+        two occurrences of the same payload can still be matched up; unchanged when it fits or `max_chars` is 0
+    """
+    if not max_chars or len(text) <= max_chars:
+        return text
+    digest = hashlib.blake2b(text.encode("utf-8", "replace"), digest_size=8).hexdigest()
+    return f"{text[:max_chars]}... [{len(text) - max_chars} more characters, blake2b {digest}]"
+
+
+@lru_cache(maxsize=None)
+def log_file_path() -> Path:
+    """
+    The log file of this run; its directory is resolved once, and only created when the first record is written.
+    """
+    return resolve_project_source() / "logs" / f"pipeline_run_{_run_id}.log"
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "false").lower() == "true"
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+# ----------------------------------------------------------------------------------------------------
+# MARK: LOGGING PIPELINE
+# ----------------------------------------------------------------------------------------------------
+# Worker threads never format to or wait on a stream or file: every logger hands its records to one bounded queue,
+# and one background thread writes them to the console and to the size-rotated JSON log file. Long messages (a
+# failed prompt, a model response) are cut before they are queued. When the writer falls behind, INFO and DEBUG
+# records are dropped rather than slowing the workers down; warnings and errors wait for room.
+
+
+class _Route(logging.Filter):
+    """Passes the records of the loggers that write to this handler, see `PipelineQueueHandler`."""
+
+    def __init__(self, attribute: str) -> None:
+        super().__init__()
+        self.attribute = attribute
+
+    def filter(self, record):
+        return getattr(record, self.attribute, True)
+
+
+class PipelineQueueHandler(QueueHandler):
+    def __init__(self, log_queue: queue.Queue, to_console: bool, to_file: bool, max_chars: int) -> None:
+        """
+        :param to_console: whether the writer passes this logger's records to the console
+        :param to_file: whether the writer passes this logger's records to the log file
+        """
+        super().__init__(log_queue)
+        self.to_console = to_console
+        self.to_file = to_file
+        self.max_chars = max_chars
+
+    def prepare(self, record):
+        # Only the message is cut, the traceback the base class appends to it is kept whole
+        record = copy.copy(record)
+        record.msg, record.args = truncate_payload(record.getMessage(), self.max_chars), None
+        record = super().prepare(record)
+        record.to_console, record.to_file = self.to_console, self.to_file
+        return record
+
+    def enqueue(self, record):
+        try:
+            if record.levelno >= logging.WARNING:
+                self.queue.put(record, timeout=1.0)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            _pipeline.dropped += 1
+
+
+class _LazyRotatingFileHandler(RotatingFileHandler):
+    """Opened with delay=True, so neither the log file nor its directory exist until a record is written."""
+
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(exist_ok=True)
+        return super()._open()
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # The default put_nowait would fail on a full queue, the writer is still draining it
+        self.queue.put(self._sentinel)
+
+
+class _LoggingPipeline:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.queue: Optional[queue.Queue] = None
+        self.listener: Optional[QueueListener] = None
+        self.file_handler: Optional[logging.Handler] = None
+        self.dropped = 0
+
+    def handler(self, to_console: bool, to_file: bool) -> PipelineQueueHandler:
+        """
+        :return: a handler feeding the shared queue; the writer thread is started with the first one, and the log
+            file is only opened once a logger writes to it
+        """
+        max_chars = _env_int("LOG_MAX_MESSAGE_CHARS", DEFAULT_LOG_MAX_MESSAGE_CHARS)
+        with self.lock:
+            if self.listener is None:
+                self.queue = queue.Queue(maxsize=_env_int("LOG_QUEUE_SIZE", DEFAULT_LOG_QUEUE_SIZE))
+                stream_handler = logging.StreamHandler()
+                stream_handler.setFormatter(ColorFormatter(
+                    '[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s',
+                    datefmt='%Y-%m-%d %H:%M:%S'
+                ))
+                stream_handler.addFilter(_Route("to_console"))
+                self.listener = _Listener(self.queue, stream_handler)
+                self.listener.start()
+                atexit.register(self.stop)
+            if to_file and self.file_handler is None:
+                self.file_handler = _LazyRotatingFileHandler(log_file_path(),
+                                                             mode="a",
+                                                             maxBytes=_env_int("LOG_MAX_BYTES", DEFAULT_LOG_MAX_BYTES),
+                                                             backupCount=_env_int("LOG_BACKUP_COUNT", DEFAULT_LOG_BACKUP_COUNT),
+                                                             encoding="utf-8",
+                                                             delay=True)
+                self.file_handler.setFormatter(JsonFormatter(max_chars))
+                self.file_handler.addFilter(_Route("to_file"))
+                # The writer thread reads its handlers on every record, the tuple is swapped in one assignment
+                self.listener.handlers = self.listener.handlers + (self.file_handler,)
+            return PipelineQueueHandler(self.queue, to_console, to_file, max_chars)
+
+    def stop(self) -> None:
+        """Write out the queued records and stop the writer thread; only registered to run at exit, nothing logs after it."""
+        with self.lock:
+            if self.listener is None:
+                return
+            self.listener.stop()
+            if self.dropped:
+                # The log file when there is one, the console otherwise
+                self.listener.handlers[-1].handle(logging.makeLogRecord({
+                    "name": __name__,
+                    "levelno": logging.WARNING,
+                    "levelname": "WARNING",
+                    "msg": f"Dropped {self.dropped} log records, the log queue was full",
+                }))
+            for handler in self.listener.handlers:
+                handler.close()
+            self.listener = None
+            self.file_handler = None
 
 
-def get_logger(name: str, quiet_mode: bool = os.environ.get("QUIET_MODE", "false").lower() == "true", disable_file_logging: bool = os.environ.get("DISABLE_FILE_LOGGING", "false").lower() == "true") -> logging.Logger:
-    project_root: Path = resolve_project_source()
-    logs_dir: Path = project_root / "logs"
-    logs_dir.mkdir(exist_ok=True)
+_pipeline = _LoggingPipeline()
 
-    log_file_path = logs_dir / f"pipeline_run_{_run_id}.log"
 
+def get_logger(name: str, quiet_mode: Optional[bool] = None, disable_file_logging: Optional[bool] = None) -> logging.Logger:
+    """
+    :param quiet_mode: no console logging, defaults to $QUIET_MODE when the logger is first configured
+    :param disable_file_logging: no log file, defaults to $DISABLE_FILE_LOGGING when the logger is first configured
+    """
     logger = logging.getLogger(name)
     if not logger.handlers:
-        
+        quiet_mode = _env_flag("QUIET_MODE") if quiet_mode is None else quiet_mode
+        disable_file_logging = _env_flag("DISABLE_FILE_LOGGING") if disable_file_logging is None else disable_file_logging
         logger.setLevel(logging.INFO)
 
-        stream_handler = logging.StreamHandler()
-        stream_formatter = ColorFormatter(
-            '[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        stream_handler.setFormatter(stream_formatter)
-
-        if not quiet_mode:
-            logger.addHandler(stream_handler)
-
-        file_handler = logging.FileHandler(log_file_path, mode="a")
-        file_formatter = DataInjectingFormatter(
-            '[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        file_handler.setFormatter(file_formatter)
-        if not disable_file_logging:
-            logger.addHandler(file_handler)
+        if quiet_mode and disable_file_logging:
+            # Nowhere to write to, so nothing is queued and the writer thread is not started for it
+            logger.addHandler(logging.NullHandler())
+            return logger
+        logger.addHandler(_pipeline.handler(to_console=not quiet_mode, to_file=not disable_file_logging))
         txt = ""
         if quiet_mode:
             txt += "Logger initialized with quiet mode enabled, no logging to console. "
@@ -75,7 +239,8 @@ def get_logger(name: str, quiet_mode: bool = os.environ.get("QUIET_MODE", "false
         if disable_file_logging:
             txt += "File logging disabled. "
         else:
-            txt += f"File logging enabled, writing to: {log_file_path} "
-        logger.info(txt)
+            txt += f"File logging enabled, writing to: {log_file_path()} "
+        # Debug, below the loggers' level: configuring a logger at import time must not create the log file
+        logger.debug(txt)
 
     return logger
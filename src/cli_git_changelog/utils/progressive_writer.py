@@ -0,0 +1,49 @@
+import os
+from pathlib import Path
+from typing import IO, Optional, Union
+from cli_git_changelog.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+PARTIAL_SUFFIX = ".partial"
+
+
+class ProgressiveFileWriter:
+    """
+    Writes a streamed response to `<path>.partial` chunk by chunk, flushing each one so the file can be tailed
+    while it is generated, and moves it over `path` once the response is complete. An interrupted run leaves
+    the partial file behind instead of losing the text, and never a truncated file under the final name.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self.partial_path = self.path.with_name(self.path.name + PARTIAL_SUFFIX)
+        self._file: Optional[IO[str]] = None
+
+    def write(self, text: str) -> None:
+        if self._file is None:
+            self._file = open(self.partial_path, "w", encoding="utf-8")
+        self._file.write(text)
+        self._file.flush()
+
+    def restart(self) -> None:
+        """Drop what was written so far, the response is about to be streamed again."""
+        if self._file is not None:
+            self._file.seek(0)
+            self._file.truncate()
+
+    def commit(self, text: str) -> None:
+        """
+        Publish the finished response under the final name. The returned text is written rather than the
+        streamed chunks, so the file matches the summary exactly (the model interface strips whitespace).
+        """
+        self.close()
+        self.partial_path.write_text(text, encoding="utf-8")
+        os.replace(self.partial_path, self.path)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,11 @@
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap, tokenizer-free estimate of how many tokens `text` will cost (roughly 4 characters per token for
+    English and code). Good enough for budgeting; the API reports the exact usage afterwards.
+    """
+    if not text:
+        return 0
+    return len(text) // CHARS_PER_TOKEN + 1
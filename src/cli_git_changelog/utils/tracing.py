@@ -0,0 +1,200 @@
+import functools
+import importlib
+import importlib.util
+import inspect
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar, Union
+from cli_git_changelog.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+T = TypeVar("T")
+F = TypeVar("F", bound=Callable[..., Any])
+# Id of the innermost open span of the running thread or task; asyncio tasks and the dispatcher's workers
+# inherit it, so a span opened there nests under the one that scheduled the work
+_current_span: ContextVar[Optional[int]] = ContextVar("current_span", default=None)
+_span_ids = itertools.count(1)
+METRIC_PREFIX = "changelog"
+SUMMARY_ROWS = 15
+
+
+class SpanStats:
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, duration: float) -> None:
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+
+
+class Tracer:
+    """
+    Process-wide spans and counters of a run. Every span is folded into per-name totals (count, summed and max
+    duration) that feed the end-of-run summary and the Prometheus text export; the individual spans are only kept
+    when a JSON trace was asked for, and are only sent to OpenTelemetry when that was enabled.
+
+    Span names are the stage ("git.diff-tree", "model.request", "dispatcher.queue_wait", ...), attributes (sha,
+    kind, ...) only go to the trace. Spans of the extraction worker processes (--git-workers) are not collected.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self.spans: Dict[str, SpanStats] = {}
+        self.counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self.events: Optional[List[Dict[str, Any]]] = None
+        self._otel = None
+
+    def record_events(self) -> None:
+        """Keep every span for `write_trace`."""
+        with self._lock:
+            if self.events is None:
+                self.events = []
+
+    def enable_opentelemetry(self) -> None:
+        """
+        Also emit every span through the OpenTelemetry API; the exporter is whatever SDK the environment
+        configures (e.g. with `opentelemetry-instrument`).
+        """
+        if importlib.util.find_spec("opentelemetry") is None:
+            logger.error("OpenTelemetry export needs the opentelemetry-api package, install cli_git_changelog[otel]")
+            raise RuntimeError("OpenTelemetry export needs the opentelemetry-api package, install cli_git_changelog[otel]")
+        self._otel = importlib.import_module("opentelemetry.trace").get_tracer("cli_git_changelog")
+
+    def record_span(self, name: str, start: float, duration: float, attributes: Optional[Dict[str, Any]] = None, span_id: Optional[int] = None, parent: Optional[int] = None) -> None:
+        """
+        Record a span measured by the caller, e.g. a wait that starts on one thread and ends on another.
+        :param start: time.perf_counter() at which it started
+        """
+        with self._lock:
+            self.spans.setdefault(name, SpanStats()).add(duration)
+            if self.events is not None:
+                self.events.append({
+                    "name": name,
+                    "ph": "X",
+                    "ts": (start - self._origin) * 1e6,
+                    "dur": duration * 1e6,
+                    "pid": os.getpid(),
+                    "tid": threading.get_ident(),
+                    "args": dict(attributes or {}, span_id=span_id or next(_span_ids), parent=parent if parent is not None else _current_span.get()),
+                })
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[None]:
+        span_id = next(_span_ids)
+        parent = _current_span.get()
+        token = _current_span.set(span_id)
+        start = time.perf_counter()
+        otel_span = self._otel.start_as_current_span(name, attributes={k: str(v) for k, v in attributes.items()}) if self._otel is not None else None
+        try:
+            if otel_span is not None:
+                with otel_span:
+                    yield
+            else:
+                yield
+        finally:
+            _current_span.reset(token)
+            self.record_span(name, start, time.perf_counter() - start, attributes, span_id, parent)
+
+    def traced(self, name: str) -> Callable[[F], F]:
+        """Decorator running every call of a function or coroutine function in a span."""
+        def decorator(fn: F) -> F:
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(name):
+                        return await fn(*args, **kwargs)
+                return async_wrapper  # type: ignore[return-value]
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return fn(*args, **kwargs)
+            return wrapper  # type: ignore[return-value]
+        return decorator
+
+    def count(self, name: str, value: float = 1, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def traced_iter(self, name: str, iterable: Iterable[T]) -> Iterator[T]:
+        """Yield from `iterable`, timing each step as a span (e.g. the git work of producing the next commit)."""
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.record_span(name, start, time.perf_counter() - start)
+            yield item
+
+    # ----------------------------------------------------------------------------------------------------
+    # MARK: EXPORT
+    # ----------------------------------------------------------------------------------------------------
+    def write_trace(self, path: Union[str, Path]) -> None:
+        """Write the recorded spans in the Chrome trace event format, which chrome://tracing and Perfetto open."""
+        with self._lock:
+            events = list(self.events or [])
+            counters = [{"name": name, "labels": dict(labels), "value": value} for (name, labels), value in self.counters.items()]
+        Path(path).write_text(json.dumps({"traceEvents": events, "counters": counters, "displayTimeUnit": "ms"}))
+        logger.info(f"Wrote {len(events)} trace spans to {path}")
+
+    def prometheus_text(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            spans = sorted(self.spans.items())
+            counters = sorted(self.counters.items())
+        if spans:
+            lines += [f"# HELP {METRIC_PREFIX}_stage_seconds Time spent in each pipeline stage, summed over threads",
+                      f"# TYPE {METRIC_PREFIX}_stage_seconds summary"]
+            for name, stats in spans:
+                lines += [f'{METRIC_PREFIX}_stage_seconds_count{{stage="{name}"}} {stats.count}',
+                          f'{METRIC_PREFIX}_stage_seconds_sum{{stage="{name}"}} {stats.total:.6f}']
+            lines += [f"# TYPE {METRIC_PREFIX}_stage_max_seconds gauge"]
+            lines += [f'{METRIC_PREFIX}_stage_max_seconds{{stage="{name}"}} {stats.max:.6f}' for name, stats in spans]
+        for name in dict.fromkeys(name for (name, _), _ in counters):
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name}_total counter")
+            for (counter, labels), value in counters:
+                if counter == name:
+                    rendered = ",".join(f'{k}="{v}"' for k, v in labels)
+                    lines.append(f"{METRIC_PREFIX}_{name}_total{{{rendered}}} {value:g}" if rendered else f"{METRIC_PREFIX}_{name}_total {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Union[str, Path]) -> None:
+        Path(path).write_text(self.prometheus_text())
+        logger.info(f"Wrote run metrics to {path}")
+
+    def summary_table(self) -> str:
+        with self._lock:
+            spans = sorted(self.spans.items(), key=lambda item: item[1].total, reverse=True)[:SUMMARY_ROWS]
+            counters = sorted(self.counters.items())
+        rows = [f"{'stage':<28} {'count':>7} {'total s':>9} {'mean ms':>9} {'max ms':>9}"]
+        rows += [f"{name:<28} {s.count:>7} {s.total:>9.2f} {s.total / s.count * 1000:>9.1f} {s.max * 1000:>9.1f}" for name, s in spans]
+        if counters:
+            rows.append("")
+            rows += [f"{name + ''.join(f' {k}={v}' for k, v in labels):<28} {value:>7g}" for (name, labels), value in counters]
+        return "\n".join(rows)
+
+
+tracer = Tracer()
+span = tracer.span
+count = tracer.count
+record_span = tracer.record_span
+traced = tracer.traced
+traced_iter = tracer.traced_iter